@@ -6,29 +6,69 @@ https://github.com/bushvin/hass_chitubox_printer
 """
 
 import logging
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable, Mapping
 from dataclasses import dataclass
-from time import sleep
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any
 
 from homeassistant.components.binary_sensor import BinarySensorEntityDescription
+from homeassistant.components.camera import CameraEntityDescription
 from homeassistant.components.image import ImageEntityDescription
 from homeassistant.components.sensor import SensorEntityDescription
 from homeassistant.components.switch import SwitchEntityDescription
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_ID, CONF_NAME, STATE_UNKNOWN
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_ID,
+    CONF_NAME,
+    STATE_UNKNOWN,
+    Platform,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.discovery import async_load_platform
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.typing import ConfigType
-from sdcpapi.wsclient import SDCPWSClient
 
 from .const import (
     CONF_BRAND,
     CONF_MACHINE_BRAND_ID,
     CONF_MAINBOARD_ID,
     CONF_MODEL,
+    DATA_CONNECTION_MANAGER,
+    DATA_FARM,
+    DATA_JOB_QUEUE,
+    DATA_LAYER_DURATIONS,
+    DATA_THUMBNAIL_CACHE,
+    DATA_TIMELAPSE_ARCHIVER,
+    DATA_VALIDATED_CLIENTS,
+    DISCOVERY_INTERVAL,
     DOMAIN,
     PLATFORMS,
+    THUMBNAIL_CACHE_ON_DISK,
+    THUMBNAIL_CACHE_SIZE,
 )
+from .client import SDCPDeviceClient
+from .capture import SDCPFrameCapture
+from .command import SDCPCommandPipeline
+from .connection import SDCPConnectionManager
 from .coordinator import SDCPDeviceCoordinator
+from .discovery import async_discover_printers, async_start_discovery_flows
+from .eta import SDCPLayerDurations, SDCPPrintEstimator
+from .farm import SDCPFarm
+from .files import SDCPFileIndex
+from .history import SDCPJobHistory
+from .jobqueue import SDCPJobQueue
+from .metrics import SDCPMetrics
+from .services import async_setup_services
+from .thumbnail import SDCPThumbnailCache
+from .timelapse import SDCPTimelapseArchiver
+from .timeseries import SDCPTimeSeries
+from .upload import SDCPFileUploader
+from .websocket import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,6 +82,37 @@ class SDCPDeviceEntityDescription:
         _client.status, "is_printing", STATE_UNKNOWN
     )
     extra_state_attributes: dict[str, Callable] = None
+    # client fields the entity depends on, eg `status.print_progress`.
+    # An entity without fields writes its state on every update.
+    fields: tuple[str, ...] = ()
+
+    @cached_property
+    def extract_attributes(self) -> Callable[[Any], Mapping[str, Any]] | None:
+        """Return the function reading the extra state attributes, if any.
+
+        It is built once per description, and returns an immutable mapping
+        which the entity keeps until its next update.
+        """
+        if not self.extra_state_attributes:
+            return None
+
+        accessors = tuple(self.extra_state_attributes.items())
+
+        def extract(_client: Any) -> Mapping[str, Any]:
+            return MappingProxyType(
+                {attr: accessor(_client) for attr, accessor in accessors}
+            )
+
+        return extract
+
+
+@dataclass(frozen=True, kw_only=True)
+class SDCPDeviceCameraEntityDescription(
+    SDCPDeviceEntityDescription, CameraEntityDescription
+):
+    """A class that describes SDCP Device camera entities."""
+
+    is_on: Callable[..., bool] = None
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -63,6 +134,14 @@ class SDCPDeviceSensorEntityDescription(
     supported_features: int = None
 
 
+@dataclass(frozen=True, kw_only=True)
+class SDCPFarmSensorEntityDescription(SensorEntityDescription):
+    """A class that describes the sensors aggregating all printers."""
+
+    native_value: Callable = None
+    extra_state_attributes: dict[str, Callable] = None
+
+
 @dataclass(frozen=True, kw_only=True)
 class SDCPDeviceSwitchEntityDescription(
     SDCPDeviceEntityDescription, SwitchEntityDescription
@@ -70,8 +149,8 @@ class SDCPDeviceSwitchEntityDescription(
     """A class that describes SDCP Device switch entities."""
 
     is_on: Callable[..., bool] = None
-    turn_on: Callable = None
-    turn_off: Callable = None
+    turn_on: Callable[..., Awaitable] = None
+    turn_off: Callable[..., Awaitable] = None
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -85,12 +164,61 @@ class SDCPDeviceBinarySensorEntityDescription(
 
 @dataclass
 class SDCPDeviceData:
-    client: SDCPWSClient
+    client: SDCPDeviceClient | None
     coordinator: SDCPDeviceCoordinator
+    commands: SDCPCommandPipeline
+    history: SDCPJobHistory
+    files: SDCPFileIndex
+    timeseries: SDCPTimeSeries
+    capture: SDCPFrameCapture
+    eta: SDCPPrintEstimator
+    metrics: SDCPMetrics
+    uploader: SDCPFileUploader
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Setup the integration from configuration.yaml"""
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][DATA_CONNECTION_MANAGER] = SDCPConnectionManager(hass)
+    hass.data[DOMAIN][DATA_THUMBNAIL_CACHE] = SDCPThumbnailCache(
+        hass,
+        max_size=THUMBNAIL_CACHE_SIZE,
+        path=(
+            hass.config.path(".storage", DOMAIN, "thumbnails")
+            if THUMBNAIL_CACHE_ON_DISK
+            else None
+        ),
+    )
+
+    hass.data[DOMAIN][DATA_LAYER_DURATIONS] = SDCPLayerDurations(hass)
+    await hass.data[DOMAIN][DATA_LAYER_DURATIONS].async_load()
+    hass.data[DOMAIN][DATA_TIMELAPSE_ARCHIVER] = SDCPTimelapseArchiver(hass)
+    hass.data[DOMAIN][DATA_JOB_QUEUE] = SDCPJobQueue(hass)
+    await hass.data[DOMAIN][DATA_JOB_QUEUE].async_load()
+
+    # the aggregates of all printers do not belong to a config entry
+    hass.data[DOMAIN][DATA_FARM] = SDCPFarm(hass)
+    hass.async_create_task(
+        async_load_platform(hass, Platform.SENSOR, DOMAIN, {}, config)
+    )
+
+    async def _async_discover(*_: Any) -> None:
+        """Discover printers on the network."""
+        try:
+            printers = await async_discover_printers()
+        except OSError as err:
+            _LOGGER.debug("Printer discovery failed: %s", err)
+            return
+        async_start_discovery_flows(hass, printers)
+
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+
+    async_at_started(hass, _async_discover)
+    async_track_time_interval(
+        hass, _async_discover, DISCOVERY_INTERVAL, cancel_on_shutdown=True
+    )
+
     if DOMAIN not in config:
         _LOGGER.debug("No config found in configuration.yaml")
         return True
@@ -119,12 +247,75 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the ChituBox Printer from a config entry."""
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
-
-    client = SDCPWSClient(entry.data[CONF_HOST], logger=_LOGGER)
+    manager: SDCPConnectionManager = hass.data[DOMAIN][DATA_CONNECTION_MANAGER]
     coordinator = SDCPDeviceCoordinator(hass, entry)
-    entry.runtime_data = SDCPDeviceData(client=client, coordinator=coordinator)
+    metrics = SDCPMetrics(hass, entry)
+    commands = SDCPCommandPipeline(hass, entry.data[CONF_MAINBOARD_ID], metrics)
+    history = SDCPJobHistory(hass, entry)
+    entry.runtime_data = SDCPDeviceData(
+        client=None,
+        coordinator=coordinator,
+        commands=commands,
+        history=history,
+        files=SDCPFileIndex(hass, entry),
+        timeseries=SDCPTimeSeries(),
+        capture=SDCPFrameCapture(),
+        eta=SDCPPrintEstimator(hass, entry, hass.data[DOMAIN][DATA_LAYER_DURATIONS]),
+        metrics=metrics,
+        uploader=SDCPFileUploader(hass, entry),
+    )
+    await history.async_load()
+
+    @callback
+    def _async_attach(client: SDCPDeviceClient | None) -> None:
+        """Attach the frame listeners of the printer to a client."""
+        entry.runtime_data.client = client
+        commands.async_attach(client)
+        entry.runtime_data.timeseries.async_attach(client)
+        entry.runtime_data.capture.async_attach(client)
+        metrics.async_attach(client)
+
+    @callback
+    def _async_coordinator_updated() -> None:
+        """Reconnect a printer which the coordinator found disconnected.
+
+        This catches the disconnections the client did not report.
+        """
+        if coordinator.data is None:
+            return
+        if coordinator.data["snapshot"].get("is_connected") is not True:
+            manager.async_check(entry.entry_id)
+
+    @callback
+    def _async_connection_changed() -> None:
+        """Follow the client managed by the connection manager."""
+        if entry.runtime_data.client is not connection.client:
+            _async_attach(connection.client)
+            coordinator.async_client_changed()
+        elif coordinator.data is not None:
+            coordinator.async_push()
+
+    connection = manager.async_add(
+        entry.entry_id,
+        entry.data[CONF_HOST],
+        _async_connection_changed,
+        client=hass.data[DOMAIN]
+        .get(DATA_VALIDATED_CLIENTS, {})
+        .pop(entry.unique_id, None),
+    )
+    # entities are set up from the device metadata in entry.data, and stay
+    # unavailable until the connection manager connected the printer.
+    _async_attach(connection.client)
+    entry.async_on_unload(coordinator.async_start_push())
+    entry.async_on_unload(coordinator.async_add_listener(_async_coordinator_updated))
+    entry.async_on_unload(lambda: _async_attach(None))
+    entry.async_on_unload(history.async_start())
+    entry.async_on_unload(entry.runtime_data.files.async_start())
+    entry.async_on_unload(entry.runtime_data.eta.async_start())
+    entry.async_on_unload(metrics.async_start())
+    entry.async_on_unload(hass.data[DOMAIN][DATA_FARM].async_track(entry))
+    entry.async_on_unload(hass.data[DOMAIN][DATA_JOB_QUEUE].async_track(entry))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     await coordinator.async_config_entry_first_refresh()
 
@@ -133,20 +324,68 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply the new update intervals."""
+    entry.runtime_data.coordinator.async_push()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        entry.runtime_data.client.disconnect()
-        hass.data[DOMAIN].pop(entry.entry_id)
+        await hass.data[DOMAIN][DATA_CONNECTION_MANAGER].async_remove(entry.entry_id)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data stored for a config entry."""
+    await SDCPJobHistory(hass, entry).async_remove()
+
+
 async def async_migrate_entry(hass, config_entry: ConfigEntry):
     """Handle version upgrades"""
 
-    # Nothing to do yet
+    if config_entry.version == 2 and config_entry.minor_version < 1:
+        # 2.1 identifies printers by their mainboard id, as discovery does
+        old_unique_id = config_entry.unique_id
+        new_unique_id = config_entry.data.get(CONF_MAINBOARD_ID)
+        if (
+            not new_unique_id
+            or hass.config_entries.async_entry_for_domain_unique_id(
+                DOMAIN, new_unique_id
+            )
+            is not None
+        ):
+            # keep the unique id of a printer which was added twice
+            new_unique_id = old_unique_id
+
+        if new_unique_id != old_unique_id:
+
+            @callback
+            def _async_migrate_unique_id(
+                entity_entry: er.RegistryEntry,
+            ) -> dict[str, Any] | None:
+                key, _, unique_id = entity_entry.unique_id.rpartition("-")
+                if unique_id != old_unique_id:
+                    return None
+                return {"new_unique_id": f"{key}-{new_unique_id}"}
+
+            await er.async_migrate_entries(
+                hass, config_entry.entry_id, _async_migrate_unique_id
+            )
+
+            device_registry = dr.async_get(hass)
+            if device := device_registry.async_get_device(
+                identifiers={(DOMAIN, old_unique_id)}
+            ):
+                device_registry.async_update_device(
+                    device.id, new_identifiers={(DOMAIN, new_unique_id)}
+                )
+
+        hass.config_entries.async_update_entry(
+            config_entry, unique_id=new_unique_id, minor_version=1
+        )
 
     return True
@@ -14,6 +14,9 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="USB Disk Connected",
         name="USB Disk Connected",
+        fields=(
+            "attributes.usbdisk_connected",
+        ),
         icon="mdi:usb-flash-drive",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -26,6 +29,10 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="UV LED Connected",
         name="UV LED Connected",
+        fields=(
+            "attributes.uvled_temp_sensor_connected",
+            "attributes.uvled_temp_sensor_status",
+        ),
         icon="mdi:led-on",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -42,6 +49,9 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="Exposure Screen Connected",
         name="Exposure Screen Connected",
+        fields=(
+            "attributes.lcd_connected",
+        ),
         icon="mdi:fit-to-screen",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -54,6 +64,10 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="Strain Gauge Connected",
         name="Strain Gauge Connected",
+        fields=(
+            "attributes.strain_gauge_connected",
+            "attributes.strain_gauge_status",
+        ),
         icon="mdi:led-on",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -72,6 +86,9 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="Z-Motor Connected",
         name="Z-Motor Connected",
+        fields=(
+            "attributes.z_motor_connected",
+        ),
         icon="mdi:axis-z-arrow",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -84,6 +101,9 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="Rotary Motor Connected",
         name="Rotary Motor Connected",
+        fields=(
+            "attributes.rotary_motor_connected",
+        ),
         icon="mdi:rotate-360",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -97,6 +117,12 @@ BINARY_SENSORS: tuple[SDCPDeviceBinarySensorEntityDescription, ...] = (
     SDCPDeviceBinarySensorEntityDescription(
         key="Camera Connected",
         name="Camera Connected",
+        fields=(
+            "attributes.camera_connected",
+            "attributes.video_streams_allowed",
+            "attributes.video_stream_connections",
+            "attributes.video_url",
+        ),
         icon="mdi:camera",
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on=lambda _client: getattr(
@@ -129,8 +155,7 @@ async def async_setup_entry(
 
     assert entry.unique_id is not None
 
-    for sensor in BINARY_SENSORS:
-        async_add_entities(
-            [SDCPDeviceBinarySensor(config_entry=entry, entity_description=sensor)],
-            update_before_add=True,
-        )
+    async_add_entities(
+        SDCPDeviceBinarySensor(config_entry=entry, entity_description=sensor)
+        for sensor in BINARY_SENSORS
+    )
@@ -0,0 +1,41 @@
+"""Camera platform for SDCP Printer integration."""
+
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from . import SDCPDeviceCameraEntityDescription
+from .entity import SDCPDeviceCamera
+
+CAMERAS: tuple[SDCPDeviceCameraEntityDescription, ...] = (
+    SDCPDeviceCameraEntityDescription(
+        key="Camera",
+        name="Camera",
+        fields=(
+            "attributes.camera_connected",
+            "attributes.video_url",
+        ),
+        icon="mdi:camera",
+        is_on=lambda _client: getattr(_client.attributes, "camera_connected", False),
+        available=lambda _client: (
+            _client.is_connected and hasattr(_client.attributes, "camera_connected")
+        ),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up the available ChituBox cameras."""
+
+    assert entry.unique_id is not None
+
+    async_add_entities(
+        SDCPDeviceCamera(config_entry=entry, entity_description=camera, hass=hass)
+        for camera in CAMERAS
+    )
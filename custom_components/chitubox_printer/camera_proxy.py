@@ -0,0 +1,214 @@
+"""Share a single camera stream of a printer between all viewers."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from homeassistant.components.ffmpeg import get_ffmpeg_manager
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    CAMERA_FRAME_TIMEOUT,
+    CAMERA_LINGER,
+    CAMERA_MAX_FRAME_SIZE,
+    CAMERA_READ_SIZE,
+    CONF_CAMERA_FRAME_RATE,
+    CONF_CAMERA_WIDTH,
+    DEFAULT_CAMERA_FRAME_RATE,
+    DEFAULT_CAMERA_WIDTH,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_JPEG_START = b"\xff\xd8"
+_JPEG_END = b"\xff\xd9"
+
+
+class SDCPCameraProxy:
+    """Share a single upstream connection to a printer's camera.
+
+    Printers allow very few concurrent video streams, so the proxy holds at
+    most one. The upstream (rtsp or mjpeg) is decoded by ffmpeg into jpeg
+    frames, at a limited frame rate and resolution, and only while somebody
+    watches: it is opened for the first viewer or snapshot, and closed
+    CAMERA_LINGER seconds after the last one left. Every frame is handed over
+    to all viewers at once.
+
+    `async_get_url` asks the printer to open its stream, `async_stop` to close
+    it again once the upstream is closed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        async_get_url: Callable[[], Awaitable[str | None]],
+        async_stop: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.config_entry = config_entry
+        self._async_get_url = async_get_url
+        self._async_stop = async_stop
+        self.viewers = 0
+        self.frame: bytes | None = None
+        self.frame_time = 0.0
+        self._next_frame: asyncio.Future[bytes] | None = None
+        self._task: asyncio.Task | None = None
+        self._unsub_linger: asyncio.TimerHandle | None = None
+
+    @property
+    def is_streaming(self) -> bool:
+        """Return True if the upstream is open."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def frame_rate(self) -> float:
+        """Return the maximum frame rate."""
+        return self.config_entry.options.get(
+            CONF_CAMERA_FRAME_RATE, DEFAULT_CAMERA_FRAME_RATE
+        )
+
+    @callback
+    def _async_acquire(self) -> None:
+        """Register a viewer, open the upstream for the first one."""
+        self.viewers += 1
+        if self._unsub_linger is not None:
+            self._unsub_linger.cancel()
+            self._unsub_linger = None
+        if not self.is_streaming:
+            # the frame of a previous upstream may be long outdated
+            self.frame = None
+            self._task = self.config_entry.async_create_background_task(
+                self.hass, self._async_run(), f"{DOMAIN} camera upstream"
+            )
+
+    @callback
+    def _async_release(self) -> None:
+        """Unregister a viewer, close the upstream after the last one."""
+        self.viewers -= 1
+        if self.viewers == 0 and self._unsub_linger is None:
+            self._unsub_linger = self.hass.loop.call_later(
+                CAMERA_LINGER, self.async_close
+            )
+
+    @callback
+    def async_close(self) -> None:
+        """Close the upstream."""
+        if self._unsub_linger is not None:
+            self._unsub_linger.cancel()
+            self._unsub_linger = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_wait_frame(self) -> bytes:
+        """Wait for the next frame."""
+        if self._next_frame is None or self._next_frame.done():
+            self._next_frame = self.hass.loop.create_future()
+        async with asyncio.timeout(CAMERA_FRAME_TIMEOUT):
+            return await asyncio.shield(self._next_frame)
+
+    @callback
+    def _async_publish(self, frame: bytes) -> None:
+        """Hand a frame over to all viewers."""
+        self.frame = frame
+        self.frame_time = time.monotonic()
+        if self._next_frame is not None and not self._next_frame.done():
+            self._next_frame.set_result(frame)
+        self._next_frame = None
+
+    async def async_snapshot(self) -> bytes | None:
+        """Return a recent frame, open the upstream when there is none."""
+        if (
+            self.frame is not None
+            and time.monotonic() - self.frame_time < 1 / self.frame_rate
+        ):
+            return self.frame
+
+        self._async_acquire()
+        try:
+            return await self._async_wait_frame()
+        except TimeoutError:
+            return self.frame
+        finally:
+            self._async_release()
+
+    async def async_frames(self) -> AsyncIterator[bytes]:
+        """Yield the frames, until the upstream closes."""
+        self._async_acquire()
+        try:
+            if self.is_streaming and self.frame is not None:
+                yield self.frame
+            while True:
+                yield await self._async_wait_frame()
+        except TimeoutError:
+            return
+        finally:
+            self._async_release()
+
+    async def _async_run(self) -> None:
+        """Open the stream of the printer and decode it, until cancelled."""
+        if (url := await self._async_get_url()) is None:
+            _LOGGER.debug("The camera of %s has no stream", self.config_entry.title)
+            return
+
+        try:
+            await self._async_decode(url)
+        finally:
+            if self._async_stop is not None:
+                await self._async_stop()
+
+    async def _async_decode(self, url: str) -> None:
+        """Decode the upstream into frames, until cancelled."""
+        command = [
+            get_ffmpeg_manager(self.hass).binary,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            url,
+            "-an",
+            "-r",
+            str(self.frame_rate),
+        ]
+        width = self.config_entry.options.get(CONF_CAMERA_WIDTH, DEFAULT_CAMERA_WIDTH)
+        if width:
+            command += ["-vf", f"scale='min({width},iw)':-2"]
+        command += ["-f", "mjpeg", "-q:v", "5", "pipe:1"]
+
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        _LOGGER.debug("Opened the camera of %s", self.config_entry.title)
+        try:
+            await self._async_read_frames(process.stdout)
+        finally:
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+            _LOGGER.debug("Closed the camera of %s", self.config_entry.title)
+
+    async def _async_read_frames(self, reader: asyncio.StreamReader) -> None:
+        """Split the jpeg frames written by ffmpeg."""
+        buffer = bytearray()
+        while chunk := await reader.read(CAMERA_READ_SIZE):
+            # only search the new data for the end of the frame
+            scan = max(0, len(buffer) - 1)
+            buffer += chunk
+            while (end := buffer.find(_JPEG_END, scan)) != -1:
+                start = buffer.find(_JPEG_START)
+                if 0 <= start < end:
+                    self._async_publish(bytes(buffer[start : end + 2]))
+                del buffer[: end + 2]
+                scan = 0
+            if len(buffer) > CAMERA_MAX_FRAME_SIZE:
+                buffer.clear()
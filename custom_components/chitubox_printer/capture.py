@@ -0,0 +1,85 @@
+"""Capture of the raw SDCP frames received from a printer."""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.core import callback
+
+from .client import SDCPDeviceClient
+from .const import FRAME_CAPTURE_SIZE
+
+REDACTED = "**REDACTED**"
+
+
+class SDCPFrameCapture:
+    """Keep the last frames received from a printer, for diagnostics.
+
+    Frames are kept exactly as received, so capturing a frame is a single
+    append to a bounded deque on the client's websocket thread. Frames are
+    only decoded when the diagnostics are downloaded.
+    """
+
+    def __init__(self, size: int = FRAME_CAPTURE_SIZE) -> None:
+        """Initialize"""
+        self.frames: deque[tuple[float, str, str | bytes]] = deque(maxlen=size)
+        self.last_frames: dict[str, tuple[float, str, str | bytes]] = {}
+        self._unsub_client: Callable[[], None] | None = None
+
+    @callback
+    def async_attach(self, client: SDCPDeviceClient | None) -> None:
+        """Capture the frames received by a (new) client."""
+        if self._unsub_client is not None:
+            self._unsub_client()
+            self._unsub_client = None
+
+        if client is not None:
+            self._unsub_client = client.add_frame_listener(self._frame_received)
+
+    def _frame_received(self, topic: str, frame: str | bytes) -> None:
+        """Capture a frame, on the client's websocket thread."""
+        captured = (time.time(), topic, frame)
+        self.frames.append(captured)
+        self.last_frames[topic] = captured
+
+    @staticmethod
+    def _decode(
+        captured: tuple[float, str, str | bytes], secrets: Iterable[str]
+    ) -> dict[str, Any]:
+        """Return a captured frame, with the secrets redacted."""
+        timestamp, topic, frame = captured
+        text = frame.decode(errors="replace") if isinstance(frame, bytes) else frame
+        for secret in secrets:
+            text = text.replace(secret, REDACTED)
+        try:
+            data: Any = json.loads(text)
+        except ValueError:
+            data = text
+
+        return {
+            "timestamp": timestamp,
+            "topic": topic,
+            "size": len(frame),
+            "frame": data,
+        }
+
+    def as_dict(self, secrets: Iterable[str] = ()) -> dict[str, Any]:
+        """Return the captured frames, oldest first.
+
+        Every occurrence of a secret (eg the host or serial number of the
+        printer) in a frame is redacted, including in urls and topics.
+        """
+        secrets = tuple(secret for secret in secrets if secret)
+        return {
+            "last_frames": {
+                topic: self._decode(captured, secrets)
+                for topic, captured in tuple(self.last_frames.items())
+            },
+            "frames": [
+                self._decode(captured, secrets) for captured in tuple(self.frames)
+            ],
+        }
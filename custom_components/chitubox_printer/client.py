@@ -0,0 +1,107 @@
+"""SDCP websocket client used by the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Callable
+
+from sdcpapi.wsclient import SDCPWSClient
+
+_LOGGER = logging.getLogger(__name__)
+
+_TOPIC_RE = re.compile(r'"Topic"\s*:\s*"sdcp/([a-z]+)/')
+
+FrameListener = Callable[[str, str | bytes], None]
+CloseListener = Callable[[], None]
+
+
+class SDCPDeviceClient(SDCPWSClient):
+    """SDCPWSClient which notifies listeners of every received frame.
+
+    sdcpapi handles websocket frames on its own thread, so listeners are
+    called from that thread with the frame's topic type (`status`,
+    `attributes`, `notice`, `response`, ...) and the raw frame. Listeners
+    must not block and must hand work over to the event loop themselves.
+    Close listeners are called the same way when the websocket closed.
+    """
+
+    def __init__(self, host: str, logger: logging.Logger | None = None) -> None:
+        """Initialize"""
+        self._frame_listeners: tuple[FrameListener, ...] = ()
+        self._close_listeners: tuple[CloseListener, ...] = ()
+        self._websocket = None
+        super().__init__(host, logger=logger)
+
+    @property
+    def supports_push(self) -> bool:
+        """Return True if received frames can be forwarded to listeners."""
+        return callable(getattr(super(), "_on_message", None))
+
+    def add_frame_listener(self, listener: FrameListener) -> Callable[[], None]:
+        """Register a frame listener, return a callable to remove it."""
+        self._frame_listeners = (*self._frame_listeners, listener)
+
+        def remove_listener() -> None:
+            self._frame_listeners = tuple(
+                _listener
+                for _listener in self._frame_listeners
+                if _listener is not listener
+            )
+
+        return remove_listener
+
+    def add_close_listener(self, listener: CloseListener) -> Callable[[], None]:
+        """Register a close listener, return a callable to remove it."""
+        self._close_listeners = (*self._close_listeners, listener)
+
+        def remove_listener() -> None:
+            self._close_listeners = tuple(
+                _listener
+                for _listener in self._close_listeners
+                if _listener is not listener
+            )
+
+        return remove_listener
+
+    def send_frame(self, frame: str) -> None:
+        """Send a raw frame to the printer.
+
+        The websocket is known once the printer sent its first frame, which
+        it does right after connecting.
+        """
+        if self._websocket is None or not self.is_connected:
+            raise ConnectionError("Not connected to the printer")
+
+        self._websocket.send(frame)
+
+    def _on_message(self, ws, message: str | bytes) -> None:
+        """Process a frame, then hand it over to the listeners."""
+        self._websocket = ws
+        super()._on_message(ws, message)
+
+        if not self._frame_listeners:
+            return
+
+        if isinstance(message, bytes):
+            match = _TOPIC_RE.search(message.decode(errors="replace"))
+        else:
+            match = _TOPIC_RE.search(message)
+        topic = match.group(1) if match is not None else ""
+
+        for listener in self._frame_listeners:
+            try:
+                listener(topic, message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in SDCP frame listener")
+
+    def _on_close(self, ws, *args) -> None:
+        """Handle the closing of the websocket, then notify the listeners."""
+        if callable(on_close := getattr(super(), "_on_close", None)):
+            on_close(ws, *args)
+
+        for listener in self._close_listeners:
+            try:
+                listener()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in SDCP close listener")
@@ -0,0 +1,147 @@
+"""Asynchronous SDCP command pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .client import SDCPDeviceClient
+from .const import COMMAND_TIMEOUT, COMMAND_TIMEOUTS, SDCPCommand
+from .metrics import SDCPMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SDCPCommandError(HomeAssistantError):
+    """A command was not acknowledged by the printer."""
+
+
+class SDCPCommandPipeline:
+    """Send SDCP commands to a printer and await their response.
+
+    Requests are sent over the websocket of the printer's current client.
+    Responses are correlated to their request by request id, so any number
+    of commands can be in flight at the same time.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        mainboard_id: str,
+        metrics: SDCPMetrics | None = None,
+    ) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.mainboard_id = mainboard_id
+        self.metrics = metrics
+        self.client: SDCPDeviceClient | None = None
+        self._connection_id = uuid.uuid4().hex
+        self._pending: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self._unsub_client: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_attach(self, client: SDCPDeviceClient | None) -> None:
+        """Send the commands through a (new) client.
+
+        Commands in flight on the previous client will not get a response.
+        """
+        if self._unsub_client is not None:
+            self._unsub_client()
+            self._unsub_client = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(SDCPCommandError("Printer disconnected"))
+
+        self.client = client
+        if client is not None:
+            self._unsub_client = client.add_frame_listener(self._frame_received)
+
+    def _frame_received(self, topic: str, frame: str | bytes) -> None:
+        """Handle a response received on the client's websocket thread."""
+        if topic != "response" or not self._pending:
+            return
+
+        try:
+            data = json.loads(frame)["Data"]
+            request_id = data["RequestID"]
+        except (ValueError, KeyError, TypeError):
+            _LOGGER.debug("Ignoring invalid response %s", frame)
+            return
+
+        self.hass.loop.call_soon_threadsafe(self._async_resolve, request_id, data)
+
+    @callback
+    def _async_resolve(self, request_id: str, data: dict[str, Any]) -> None:
+        """Hand a response over to its request."""
+        future = self._pending.get(request_id)
+        if future is None or future.done():
+            return
+
+        response = data.get("Data") or {}
+        if (ack := response.get("Ack", 0)) != 0:
+            future.set_exception(
+                SDCPCommandError(
+                    f"Command {data.get('Cmd')} was refused by the printer ({ack})"
+                )
+            )
+            return
+
+        future.set_result(response)
+
+    async def async_send(
+        self,
+        command: SDCPCommand,
+        data: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Send a command, return the data of its response."""
+        if self.client is None:
+            raise SDCPCommandError("Printer is not connected")
+
+        request_id = uuid.uuid4().hex
+        frame = json.dumps(
+            {
+                "Id": self._connection_id,
+                "Data": {
+                    "Cmd": int(command),
+                    "Data": data or {},
+                    "RequestID": request_id,
+                    "MainboardID": self.mainboard_id,
+                    "TimeStamp": int(time.time()),
+                    "From": 0,
+                },
+                "Topic": f"sdcp/request/{self.mainboard_id}",
+            }
+        )
+
+        future = self.hass.loop.create_future()
+        self._pending[request_id] = future
+        start = time.monotonic()
+        try:
+            try:
+                await self.hass.async_add_executor_job(self.client.send_frame, frame)
+            except (ConnectionError, OSError) as err:
+                raise SDCPCommandError(f"Could not send command: {err}") from err
+
+            async with asyncio.timeout(
+                timeout or COMMAND_TIMEOUTS.get(command, COMMAND_TIMEOUT)
+            ):
+                response = await future
+            if self.metrics is not None:
+                self.metrics.record(
+                    f"command.{command.name.lower()}", time.monotonic() - start
+                )
+            return response
+        except TimeoutError as err:
+            raise SDCPCommandError(
+                f"Command {command.name} was not acknowledged in time"
+            ) from err
+        finally:
+            del self._pending[request_id]
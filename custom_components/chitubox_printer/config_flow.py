@@ -1,33 +1,57 @@
 """Config flow for ChituBox Printer integration."""
 
+import asyncio
+import ipaddress
 import logging
 import re
-from time import sleep
+from functools import partial
 from typing import Any, Optional
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+import voluptuous as vol
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.data_entry_flow import AbortFlow
 from homeassistant.const import CONF_HOST, CONF_ID, CONF_NAME
 from homeassistant.core import callback
 from sdcpapi.exceptions import DeviceInvalidHostname, DeviceResolutionError
-from sdcpapi.wsclient import SDCPWSClient
 
+from .client import SDCPDeviceClient
 from .const import (
     CONF_BRAND,
     CONF_MACHINE_BRAND_ID,
     CONF_MAINBOARD_ID,
     CONF_MODEL,
     CONFIG_SCHEMA,
+    DATA_VALIDATED_CLIENTS,
     DOMAIN,
+    OPTIONS_SCHEMA,
+    VALIDATION_POLL_INTERVAL,
+    VALIDATION_TIMEOUT,
 )
+from .discovery import SDCPDiscoveredPrinter, async_discover_printers
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _is_ip_address(host: str) -> bool:
+    """Return True if host is an ip address, rather than a hostname."""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+
+    return True
+
+
 class ChituBoxPrinterConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for ChituBox Printer integration."""
 
     VERSION = 2
-    MINOR_VERSION = 0
+    MINOR_VERSION = 1
 
     _user_input: dict[str, Any] | None = None
 
@@ -35,9 +59,16 @@ class ChituBoxPrinterConfigFlow(ConfigFlow, domain=DOMAIN):
         self._host: Optional[str] = None
         self._name: Optional[str] = None
         self._uuid: Optional[str] = None
+        self._discovered: dict[str, SDCPDiscoveredPrinter] | None = None
         self._user_input = {}
         self.user_input = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow."""
+        return ChituBoxPrinterOptionsFlow()
+
     @callback
     def _async_get_entry(self):
         return self.async_create_entry(
@@ -53,10 +84,20 @@ class ChituBoxPrinterConfigFlow(ConfigFlow, domain=DOMAIN):
         self.user_input[CONF_MODEL] = self.printer.device.model
         self.user_input[CONF_BRAND] = self.printer.device.brand
 
+        # printers are identified by their mainboard id, as discovery does
         await self.async_set_unique_id(
-            self.user_input[CONF_ID], raise_on_progress=False
+            self.user_input[CONF_MAINBOARD_ID], raise_on_progress=False
         )
-        self._abort_if_unique_id_configured()
+        try:
+            self._abort_if_unique_id_configured()
+        except AbortFlow:
+            await self.hass.async_add_executor_job(self.printer.disconnect)
+            raise
+
+        # hand the connected client over to async_setup_entry
+        self.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_VALIDATED_CLIENTS, {})[
+            self.unique_id
+        ] = self.printer
         result = self.async_create_entry(
             title=self.user_input[CONF_NAME], data=self.user_input
         )
@@ -70,17 +111,22 @@ class ChituBoxPrinterConfigFlow(ConfigFlow, domain=DOMAIN):
         errors = {}
         self.user_input = user_input
 
+        if user_input is None and self._discovered is None:
+            # the integration only broadcasts once it is set up, so look for
+            # printers here too, to find the first one
+            self._discovered = await self._async_discover()
+            if self._discovered:
+                return await self.async_step_pick_printer()
+
         if user_input is not None:
-            for entry in self._async_current_entries():
+            for entry in self._async_current_entries(include_ignore=False):
                 if (
                     user_input[CONF_HOST].lower() == entry.data[CONF_HOST].lower()
                     or user_input[CONF_NAME].lower() == entry.data[CONF_NAME].lower()
                 ):
                     return self.async_abort(reason="already_configured")
 
-            if (
-                error := await self.hass.async_add_executor_job(self.validate_input)
-            ) is None:
+            if (error := await self.async_validate_input()) is None:
 
                 self.user_input[CONF_ID] = re.sub(
                     r"[._-]+", "_", self.user_input[CONF_HOST]
@@ -94,23 +140,159 @@ class ChituBoxPrinterConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=CONFIG_SCHEMA, errors=errors
         )
 
-    def validate_input(self):
-        """Validate the host/ip address."""
+    async def _async_discover(self) -> dict[str, SDCPDiscoveredPrinter]:
+        """Return the discovered printers which are not configured yet."""
+        try:
+            printers = await async_discover_printers()
+        except OSError as err:
+            _LOGGER.debug("Printer discovery failed: %s", err)
+            return {}
+
+        configured = self._async_current_ids()
+        return {
+            printer.mainboard_id: printer
+            for printer in printers
+            if printer.mainboard_id not in configured
+        }
+
+    async def async_step_pick_printer(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Pick a discovered printer, or enter a host."""
+
+        if user_input is not None:
+            printer = self._discovered.get(user_input.get(CONF_MAINBOARD_ID))
+            if printer is None:
+                return await self.async_step_user()
+
+            await self.async_set_unique_id(
+                printer.mainboard_id, raise_on_progress=False
+            )
+            self._abort_if_unique_id_configured()
+            self._host = printer.host
+            self._name = printer.name or printer.model
+            return await self.async_step_discovery_confirm()
+
+        return self.async_show_form(
+            step_id="pick_printer",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_MAINBOARD_ID): vol.In(
+                        {
+                            printer.mainboard_id: (
+                                f"{printer.name or printer.model} ({printer.host})"
+                            )
+                            for printer in self._discovered.values()
+                        }
+                    )
+                }
+            ),
+        )
+
+    async def async_step_integration_discovery(
+        self, discovery_info: dict[str, Any]
+    ) -> ConfigFlowResult:
+        """Handle a printer discovered by the UDP broadcast."""
+
+        self._host = discovery_info[CONF_HOST]
+        self._name = discovery_info[CONF_NAME] or discovery_info[CONF_MODEL]
+
+        await self.async_set_unique_id(discovery_info[CONF_MAINBOARD_ID])
+        updates = None
+        entry = self.hass.config_entries.async_entry_for_domain_unique_id(
+            DOMAIN, self.unique_id
+        )
+        # keep a hostname set by the user, it follows the printer by itself
+        if (
+            entry is not None
+            and (host := entry.data.get(CONF_HOST)) is not None
+            and host != self._host
+            and _is_ip_address(host)
+        ):
+            _LOGGER.info(
+                "Printer %s moved from %s to %s", entry.title, host, self._host
+            )
+            updates = {CONF_HOST: self._host}
+        self._abort_if_unique_id_configured(updates=updates)
+
+        self.context["title_placeholders"] = {CONF_NAME: self._name}
+        return await self.async_step_discovery_confirm()
+
+    async def async_step_discovery_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Confirm adding a discovered printer."""
+
+        if user_input is not None:
+            return await self.async_step_user(
+                {CONF_NAME: user_input[CONF_NAME], CONF_HOST: self._host}
+            )
+
+        return self.async_show_form(
+            step_id="discovery_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_NAME, default=self._name): str}),
+            description_placeholders={CONF_HOST: self._host},
+        )
+
+    def _printer_identified(self) -> bool:
+        """Return True if the printer sent its attributes."""
+        return (
+            self.printer.device.brand is not None
+            or self.printer.device.model is not None
+        )
+
+    async def async_validate_input(self) -> str | None:
+        """Validate the host/ip address.
+
+        Returns as soon as the printer sent its attributes.
+        """
 
         try:
-            self.printer = SDCPWSClient(self.user_input[CONF_HOST], logger=_LOGGER)
+            self.printer = await self.hass.async_add_executor_job(
+                partial(SDCPDeviceClient, self.user_input[CONF_HOST], logger=_LOGGER)
+            )
         except DeviceInvalidHostname:
             return "invalid_hostname"
         except DeviceResolutionError:
             return "invalid_hostname"
 
-        timeout = 10
-        while timeout > 0:
-            if self.printer.device.brand is None and self.printer.device.model is None:
-                timeout = timeout - 1
-                sleep(1)
-            else:
-                return None
+        received = asyncio.Event()
 
-        self.printer.disconnect()
-        return "cannot_connect"
+        def _frame_received(topic: str, frame: str | bytes) -> None:
+            if topic == "attributes":
+                self.hass.loop.call_soon_threadsafe(received.set)
+
+        remove_listener = self.printer.add_frame_listener(_frame_received)
+        try:
+            async with asyncio.timeout(VALIDATION_TIMEOUT):
+                while not self._printer_identified():
+                    if self.printer.supports_push:
+                        await received.wait()
+                        received.clear()
+                    else:
+                        await asyncio.sleep(VALIDATION_POLL_INTERVAL)
+        except TimeoutError:
+            await self.hass.async_add_executor_job(self.printer.disconnect)
+            return "cannot_connect"
+        finally:
+            remove_listener()
+
+        return None
+
+
+class ChituBoxPrinterOptionsFlow(OptionsFlow):
+    """Handle the options of a ChituBox Printer."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Set the update intervals."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, self.config_entry.options
+            ),
+        )
@@ -0,0 +1,212 @@
+"""Connection manager for the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import partial
+
+from homeassistant.core import HomeAssistant, callback
+from sdcpapi.exceptions import DeviceInvalidHostname, DeviceResolutionError
+
+from .client import SDCPDeviceClient
+from .const import (
+    MAX_CONCURRENT_HANDSHAKES,
+    RECONNECT_BACKOFF_MAX,
+    RECONNECT_BACKOFF_MIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SDCPConnectionState(StrEnum):
+    """State of the connection to a printer."""
+
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    DISCONNECTED = "disconnected"
+    BACKOFF = "backoff"
+
+
+@dataclass
+class SDCPConnection:
+    """Connection to a single printer."""
+
+    entry_id: str
+    host: str
+    update_callback: Callable[[], None]
+    client: SDCPDeviceClient | None = None
+    state: SDCPConnectionState = SDCPConnectionState.CONNECTING
+    attempts: int = 0
+    reconnects: int = 0
+    last_error: str | None = None
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task | None = None
+
+
+class SDCPConnectionManager:
+    """Own the clients of all configured printers.
+
+    Every printer gets a supervisor task which (re)connects the client when
+    it is not connected, with a jittered exponential backoff. The number of
+    concurrent handshakes is capped, so a network recovery does not make all
+    printers reconnect at the same moment.
+
+    The supervisor of a connected printer sleeps until the client reports
+    that its websocket closed, or until a coordinator update finds the
+    printer disconnected, see async_check.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, max_handshakes: int = MAX_CONCURRENT_HANDSHAKES
+    ) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.connections: dict[str, SDCPConnection] = {}
+        self._handshakes = asyncio.Semaphore(max_handshakes)
+
+    @callback
+    def async_add(
+        self,
+        entry_id: str,
+        host: str,
+        update_callback: Callable[[], None],
+        client: SDCPDeviceClient | None = None,
+    ) -> SDCPConnection:
+        """Start managing the connection to a printer.
+
+        `update_callback` is called whenever the client or the state of the
+        connection changed.
+        """
+        connection = SDCPConnection(
+            entry_id=entry_id,
+            host=host,
+            update_callback=update_callback,
+            client=client,
+        )
+        self.connections[entry_id] = connection
+        connection.task = self.hass.async_create_background_task(
+            self._async_supervise(connection),
+            f"chitubox_printer connection {host}",
+        )
+        return connection
+
+    async def async_remove(self, entry_id: str) -> None:
+        """Stop managing the connection to a printer and disconnect it."""
+        if (connection := self.connections.pop(entry_id, None)) is None:
+            return
+
+        if connection.task is not None:
+            connection.task.cancel()
+        if connection.client is not None:
+            await self.hass.async_add_executor_job(connection.client.disconnect)
+
+    @callback
+    def async_check(self, entry_id: str) -> None:
+        """Have the supervisor of a printer check its connection."""
+        if (connection := self.connections.get(entry_id)) is not None:
+            connection.wakeup.set()
+
+    @staticmethod
+    def backoff_delay(attempts: int) -> float:
+        """Return the jittered delay before the next connection attempt.
+
+        The first attempt after a disconnection is spread over
+        RECONNECT_BACKOFF_MIN seconds, so printers which dropped together, eg
+        on a Wi-Fi outage, do not reconnect together.
+        """
+        if attempts == 0:
+            return random.uniform(0, RECONNECT_BACKOFF_MIN)
+
+        delay = min(
+            RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_MIN * 2 ** (attempts - 1)
+        )
+        return random.uniform(delay / 2, delay)
+
+    def _set_state(
+        self, connection: SDCPConnection, state: SDCPConnectionState
+    ) -> None:
+        """Update the state of a connection, notify on change."""
+        if connection.state == state:
+            return
+
+        connection.state = state
+        connection.update_callback()
+
+    async def _async_supervise(self, connection: SDCPConnection) -> None:
+        """Keep a printer connected."""
+        watched: SDCPDeviceClient | None = None
+        remove_listener: Callable[[], None] | None = None
+        try:
+            while True:
+                connection.wakeup.clear()
+                client = connection.client
+                if client is not None and client.is_connected:
+                    if client is not watched:
+                        if remove_listener is not None:
+                            remove_listener()
+                        watched = client
+                        remove_listener = client.add_close_listener(
+                            partial(
+                                self.hass.loop.call_soon_threadsafe,
+                                connection.wakeup.set,
+                            )
+                        )
+                    connection.attempts = 0
+                    connection.ready.set()
+                    self._set_state(connection, SDCPConnectionState.CONNECTED)
+                    await connection.wakeup.wait()
+                    continue
+
+                if connection.attempts > 0:
+                    self._set_state(connection, SDCPConnectionState.BACKOFF)
+                    await asyncio.sleep(self.backoff_delay(connection.attempts))
+                elif connection.state == SDCPConnectionState.CONNECTED:
+                    self._set_state(connection, SDCPConnectionState.DISCONNECTED)
+                    await asyncio.sleep(self.backoff_delay(0))
+
+                await self._async_handshake(connection)
+                connection.ready.set()
+        finally:
+            if remove_listener is not None:
+                remove_listener()
+
+    async def _async_handshake(self, connection: SDCPConnection) -> None:
+        """Replace the client of a printer by a newly connected one."""
+        async with self._handshakes:
+            self._set_state(connection, SDCPConnectionState.CONNECTING)
+            if (previous := connection.client) is not None:
+                await self.hass.async_add_executor_job(previous.disconnect)
+
+            try:
+                client = await self.hass.async_add_executor_job(
+                    partial(SDCPDeviceClient, connection.host, logger=_LOGGER)
+                )
+            except (DeviceInvalidHostname, DeviceResolutionError, OSError) as err:
+                client = None
+                connection.last_error = str(err)
+
+        if client is None or not client.is_connected:
+            if client is not None:
+                await self.hass.async_add_executor_job(client.disconnect)
+                connection.last_error = "not connected"
+            connection.attempts += 1
+            _LOGGER.debug(
+                "Could not connect to %s (attempt %s): %s",
+                connection.host,
+                connection.attempts,
+                connection.last_error,
+            )
+            return
+
+        if previous is not None:
+            connection.reconnects += 1
+        connection.client = client
+        connection.last_error = None
+        connection.attempts = 0
+        self._set_state(connection, SDCPConnectionState.CONNECTED)
@@ -1,10 +1,17 @@
 """Constants for ChituBox Printer integration."""
 
 from datetime import timedelta
-from enum import IntFlag
+from enum import IntEnum, IntFlag
+from typing import Any
 
 import voluptuous as vol
-from homeassistant.const import CONF_FILENAME, CONF_HOST, CONF_NAME, Platform
+from homeassistant.const import (
+    CONF_FILENAME,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PATH,
+    Platform,
+)
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.typing import VolDictType
 
@@ -14,7 +21,14 @@ CONF_BRAND = "device_brand"
 CONF_MACHINE_BRAND_ID = "device_machine_brand_id"
 CONF_MAINBOARD_ID = "device_mainboard_id"
 CONF_MODEL = "device_model"
-CONF_START_LAYER = "starting_layer"
+CONF_START_LAYER = "start_layer"
+CONF_START_PRINT = "start_print"
+CONF_PRINTING_INTERVAL = "printing_interval"
+CONF_IDLE_INTERVAL = "idle_interval"
+CONF_OFFLINE_INTERVAL = "offline_interval"
+CONF_CAMERA_FRAME_RATE = "camera_frame_rate"
+CONF_CAMERA_WIDTH = "camera_width"
+CONF_TIMELAPSE_DIRECTORY = "timelapse_directory"
 
 SERVICE_PAUSE_PRINT_JOB = "pause_print_job"
 SERVICE_RESUME_PRINT_JOB = "resume_print_job"
@@ -24,28 +38,170 @@ SERVICE_TURN_TIMELAPSE_OFF = "turn_timelapse_off"
 SERVICE_TURN_TIMELAPSE_ON = "turn_timelapse_on"
 SERVICE_TURN_CAMERA_OFF = "turn_camera_off"
 SERVICE_TURN_CAMERA_ON = "turn_camera_on"
+SERVICE_QUERY_JOB_HISTORY = "query_job_history"
+SERVICE_UPLOAD_FILE = "upload_file"
+SERVICE_LIST_FILES = "list_files"
+SERVICE_BULK_COMMAND = "bulk_command"
+SERVICE_QUEUE_PRINT_JOB = "queue_print_job"
+SERVICE_REMOVE_QUEUED_JOB = "remove_queued_job"
+SERVICE_LIST_QUEUED_JOBS = "list_queued_jobs"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
 
 PLATFORMS = [
     Platform.BINARY_SENSOR,
+    Platform.CAMERA,
     Platform.IMAGE,
     Platform.SENSOR,
     Platform.SWITCH,
 ]
 
 UPDATE_INTERVAL = timedelta(seconds=5)
+# update intervals by printer state, in seconds. Offline printers back off
+# exponentially from the idle interval up to the offline interval.
+DEFAULT_PRINTING_INTERVAL = 5
+DEFAULT_IDLE_INTERVAL = 60
+DEFAULT_OFFLINE_INTERVAL = 900
+VALIDATION_TIMEOUT = 10
+VALIDATION_POLL_INTERVAL = 0.1
+# liveness fallback when the printer pushes its frames
+PUSH_UPDATE_INTERVAL = timedelta(seconds=60)
+PUSH_TOPICS = frozenset({"status", "attributes", "notice"})
 STATE_OFFLINE = "offline"
 
+DISCOVERY_BROADCAST_ADDRESS = "255.255.255.255"
+DISCOVERY_INTERVAL = timedelta(minutes=15)
+DISCOVERY_MESSAGE = b"M99999"
+DISCOVERY_PORT = 3000
+DISCOVERY_TIMEOUT = 2
+
+MAX_CONCURRENT_HANDSHAKES = 4
+RECONNECT_BACKOFF_MIN = 2
+RECONNECT_BACKOFF_MAX = 300
+
+HISTORY_DETAILS_BATCH_SIZE = 20
+HISTORY_SAVE_DELAY = 10
+HISTORY_STORAGE_VERSION = 1
+
+JOB_QUEUE_ATTEMPTS = 3
+# seconds a printer which failed to start a job waits, per attempt
+JOB_QUEUE_RETRY_DELAY = 30
+JOB_QUEUE_SAVE_DELAY = 1
+# seconds a printer is reserved for a dispatched job, until it prints
+JOB_QUEUE_START_TIMEOUT = 60
+JOB_QUEUE_STORAGE_VERSION = 1
+
+ETA_HISTORY_SIZE = 500
+ETA_HISTORY_WEIGHT = 4
+ETA_MIN_SAMPLES = 5
+ETA_OUTLIER_FACTOR = 5
+ETA_SAVE_DELAY = 10
+ETA_SMOOTHING = 0.1
+ETA_STORAGE_VERSION = 1
+
+METRICS_INTERVAL = timedelta(seconds=60)
+
+DEFAULT_CAMERA_FRAME_RATE = 5
+# 0 keeps the resolution of the printer's camera
+DEFAULT_CAMERA_WIDTH = 0
+# seconds the camera stays open after the last viewer left
+CAMERA_LINGER = 10
+CAMERA_FRAME_TIMEOUT = 10
+CAMERA_MAX_FRAME_SIZE = 4 * 1024 * 1024
+CAMERA_READ_SIZE = 64 * 1024
+
+# raw frames kept per printer for the diagnostics
+FRAME_CAPTURE_SIZE = 200
+
+# samples of status frames kept per printer, about 20 bytes each
+TIMESERIES_SIZE = 10800
+
+FILE_STORAGES = ("local", "usb")
+FILES_PAGE_SIZE = 50
+
+# seconds to wait for the acknowledgement of a command
+COMMAND_TIMEOUT = 10
+
+SDCP_HTTP_PORT = 3030
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_RETRIES = 5
+UPLOAD_RETRY_DELAY = 2
+UPLOAD_TIMEOUT = 60
+
+TIMELAPSE_CHUNK_SIZE = 256 * 1024
+# concurrent timelapse downloads, shared by all printers
+TIMELAPSE_CONCURRENCY = 2
+TIMELAPSE_RETRIES = 5
+TIMELAPSE_RETRY_DELAY = 10
+# seconds without receiving data before a download is resumed
+TIMELAPSE_TIMEOUT = 60
+
+DATA_CONNECTION_MANAGER = "connection_manager"
+DATA_FARM = "farm"
+DATA_JOB_QUEUE = "job_queue"
+DATA_LAYER_DURATIONS = "layer_durations"
+DATA_THUMBNAIL_CACHE = "thumbnail_cache"
+DATA_TIMELAPSE_ARCHIVER = "timelapse_archiver"
+DATA_VALIDATED_CLIENTS = "validated_clients"
+THUMBNAIL_CACHE_SIZE = 32
+# set to False to keep thumbnails in memory only
+THUMBNAIL_CACHE_ON_DISK = True
+
 SCHEMA_PAUSE_PRINT_JOB = {}
 SCHEMA_RESUME_PRINT_JOB = {}
 SCHEMA_START_PRINT_JOB: VolDictType = {
     vol.Required(CONF_FILENAME): cv.template,
-    vol.Optional(CONF_START_LAYER, default=30): vol.Coerce(int),
+    vol.Optional(CONF_START_LAYER, default=0): vol.Coerce(int),
 }
 SCHEMA_STOP_PRINT_JOB = {}
 SCHEMA_TURN_TIMELAPSE_OFF = {}
 SCHEMA_TURN_TIMELAPSE_ON = {}
 SCHEMA_TURN_CAMERA_OFF = {}
 SCHEMA_TURN_CAMERA_ON = {}
+SCHEMA_UPLOAD_FILE: VolDictType = {
+    vol.Required(CONF_PATH): cv.string,
+    vol.Optional(CONF_FILENAME): cv.string,
+    vol.Optional(CONF_START_PRINT, default=False): cv.boolean,
+    vol.Optional(CONF_START_LAYER, default=0): vol.Coerce(int),
+}
+SCHEMA_QUERY_JOB_HISTORY: VolDictType = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional("since"): cv.datetime,
+    vol.Optional("until"): cv.datetime,
+    vol.Optional("filename"): cv.string,
+    vol.Optional("outcome"): vol.In(["completed", "failed", "stopped", "other"]),
+    vol.Optional("limit"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+}
+SCHEMA_BULK_COMMAND: VolDictType = {
+    vol.Required("command"): vol.In(
+        ["pause", "resume", "stop", "timelapse_on", "timelapse_off"]
+    ),
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional("timeout", default=COMMAND_TIMEOUT): vol.All(
+        vol.Coerce(float), vol.Range(min=1, max=120)
+    ),
+}
+SCHEMA_QUEUE_PRINT_JOB: VolDictType = {
+    vol.Exclusive(CONF_PATH, "file"): cv.string,
+    vol.Exclusive(CONF_FILENAME, "file"): cv.string,
+    # matched against the CONF_MODEL of the printers
+    vol.Optional("model"): cv.string,
+    vol.Optional("priority", default=0): vol.Coerce(int),
+}
+SCHEMA_REMOVE_QUEUED_JOB: VolDictType = {
+    vol.Required("job_id"): cv.string,
+}
+SCHEMA_LIST_QUEUED_JOBS: VolDictType = {}
+SCHEMA_LIST_FILES: VolDictType = {
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional("storage", default="local"): vol.In(FILE_STORAGES),
+    vol.Optional(CONF_PATH): cv.string,
+    vol.Optional("offset", default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional("limit", default=FILES_PAGE_SIZE): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Optional("refresh", default=False): cv.boolean,
+}
 
 METHOD_PAUSE_PRINT_JOB = "svc_pause_print_job"
 METHOD_RESUME_PRINT_JOB = "svc_resume_print_job"
@@ -55,6 +211,7 @@ METHOD_TURN_TIMELAPSE_OFF = "svc_turn_timelapse_off"
 METHOD_TURN_TIMELAPSE_ON = "svc_turn_timelapse_on"
 METHOD_TURN_CAMERA_OFF = "svc_turn_camera_off"
 METHOD_TURN_CAMERA_ON = "svc_turn_camera_on"
+METHOD_UPLOAD_FILE = "svc_upload_file"
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -62,6 +219,26 @@ CONFIG_SCHEMA = vol.Schema(
         vol.Required(CONF_HOST): cv.string,
     }
 )
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(
+            CONF_PRINTING_INTERVAL, default=DEFAULT_PRINTING_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+        vol.Optional(CONF_IDLE_INTERVAL, default=DEFAULT_IDLE_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=3600)
+        ),
+        vol.Optional(
+            CONF_OFFLINE_INTERVAL, default=DEFAULT_OFFLINE_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=86400)),
+        vol.Optional(
+            CONF_CAMERA_FRAME_RATE, default=DEFAULT_CAMERA_FRAME_RATE
+        ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=30)),
+        vol.Optional(CONF_CAMERA_WIDTH, default=DEFAULT_CAMERA_WIDTH): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=7680)
+        ),
+        vol.Optional(CONF_TIMELAPSE_DIRECTORY, default=""): str,
+    }
+)
 
 
 class SDCPPrinterEntityFeature(IntFlag):
@@ -75,3 +252,33 @@ class SDCPPrinterEntityFeature(IntFlag):
     TIMELAPSE_ON = 32
     CAMERA_ON = 64
     CAMERA_OFF = 128
+    UPLOAD = 256
+
+
+class SDCPCommand(IntEnum):
+    """SDCP commands."""
+
+    STATUS_REFRESH = 0
+    ATTRIBUTES_REFRESH = 1
+    START_PRINT = 128
+    PAUSE_PRINT = 129
+    STOP_PRINT = 130
+    RESUME_PRINT = 131
+    FILE_LIST = 258
+    HISTORY_TASKS = 320
+    HISTORY_TASK_DETAILS = 321
+    VIDEO_STREAM = 386
+    TIMELAPSE = 387
+
+
+COMMAND_TIMEOUTS = {
+    # the printer answers once the print job actually started
+    SDCPCommand.START_PRINT: 30,
+}
+BULK_COMMANDS: dict[str, tuple[SDCPCommand, dict[str, Any] | None]] = {
+    "pause": (SDCPCommand.PAUSE_PRINT, None),
+    "resume": (SDCPCommand.RESUME_PRINT, None),
+    "stop": (SDCPCommand.STOP_PRINT, None),
+    "timelapse_on": (SDCPCommand.TIMELAPSE, {"Enable": 1}),
+    "timelapse_off": (SDCPCommand.TIMELAPSE, {"Enable": 0}),
+}
@@ -1,17 +1,61 @@
 import logging
+import time
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+from typing import Any
 
 import homeassistant.util.dt as dt_util
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_NAME
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, UPDATE_INTERVAL
+from .const import (
+    CONF_BRAND,
+    CONF_IDLE_INTERVAL,
+    CONF_MAINBOARD_ID,
+    CONF_MODEL,
+    CONF_OFFLINE_INTERVAL,
+    CONF_PRINTING_INTERVAL,
+    DEFAULT_IDLE_INTERVAL,
+    DEFAULT_OFFLINE_INTERVAL,
+    DEFAULT_PRINTING_INTERVAL,
+    DOMAIN,
+    PUSH_TOPICS,
+    PUSH_UPDATE_INTERVAL,
+    UPDATE_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+_MISSING = object()
+_FIRMWARE_VERSION = "attributes.firmware_version"
+_IS_CONNECTED = "is_connected"
+_IS_PRINTING = "status.is_printing"
+_MACHINE_STATUS = "status.machine_status"
+
+SnapshotProcessor = Callable[[dict[str, Any], frozenset[str]], None]
+
 
 class SDCPDeviceCoordinator(DataUpdateCoordinator):
-    """Gather data from the SDCP Device"""
+    """Gather data from the SDCP Device
+
+    When the client supports it, updates are pushed to the entities as soon
+    as the printer sends a status, attributes or notice frame. Polling is
+    then only used as a liveness fallback when the printer stays silent.
+
+    The update interval adapts to the state of the printer: short while it
+    prints, long while it is idle, and backing off exponentially while it is
+    offline. The intervals are set in the options of the config entry.
+
+    Every update holds a snapshot of the client fields the entities depend on,
+    and the set of fields which changed since the previous update. Entities
+    use the latter to skip writing an unchanged state. Processors derive
+    runtime data from the client fields, before the runtime fields are read
+    into the same snapshot.
+    """
 
     def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
         """Initialize update coordinator."""
@@ -22,9 +66,226 @@ class SDCPDeviceCoordinator(DataUpdateCoordinator):
             name=DOMAIN,
             update_interval=UPDATE_INTERVAL,
         )
+        self._push_pending = False
+        self._push_received = 0.0
+        self._unsub_push: CALLBACK_TYPE | None = None
+        self._tracked_fields: dict[str, tuple[bool, tuple[str, ...]]] = {}
+        self._snapshot: dict[str, Any] = {}
+        self._processors: list[SnapshotProcessor] = []
+        self.async_track_fields(
+            (_FIRMWARE_VERSION, _IS_CONNECTED, _IS_PRINTING, _MACHINE_STATUS)
+        )
+        self._firmware_version: Any = None
+        self._offline_updates = 0
+
+        # shared by all entities of the printer, built from the cached device
+        # metadata. The firmware version is updated through the registry.
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.unique_id)},
+            name=config_entry.data[CONF_NAME],
+            manufacturer=config_entry.data[CONF_BRAND],
+            model=config_entry.data[CONF_MODEL],
+            serial_number=config_entry.data[CONF_MAINBOARD_ID],
+        )
+
+    @callback
+    def async_track_fields(self, fields: Iterable[str]) -> None:
+        """Add client fields to the snapshot.
+
+        Fields are dotted paths relative to the client, eg `is_connected` or
+        `status.print_progress`. Fields starting with `runtime.` are relative
+        to the entry's runtime data, eg `runtime.uploader.offset`.
+        """
+        for field in fields:
+            if field not in self._tracked_fields:
+                names = tuple(field.split("."))
+                if names[0] == "runtime":
+                    self._tracked_fields[field] = (True, names[1:])
+                else:
+                    self._tracked_fields[field] = (False, names)
+
+    @callback
+    def async_add_processor(self, processor: SnapshotProcessor) -> CALLBACK_TYPE:
+        """Run a processor on the client fields of every update.
+
+        The processor is called with the client fields of the snapshot, and
+        those which changed, before the runtime fields are read.
+        """
+        self._processors.append(processor)
+        return lambda: self._processors.remove(processor)
+
+    @callback
+    def async_start_push(self) -> CALLBACK_TYPE:
+        """Subscribe to frames pushed by the printer, return the unsubscriber."""
+        self.async_stop_push()
+        _client = self.config_entry.runtime_data.client
+        if _client is None:
+            return self.async_stop_push
+
+        if not _client.supports_push:
+            _LOGGER.debug("SDCP client does not support push, polling instead")
+            return self.async_stop_push
+
+        self._unsub_push = _client.add_frame_listener(self._frame_received)
+        return self.async_stop_push
+
+    @callback
+    def async_stop_push(self) -> None:
+        """Unsubscribe from frames pushed by the printer."""
+        if self._unsub_push is not None:
+            self._unsub_push()
+            self._unsub_push = None
+
+    @callback
+    def async_client_changed(self) -> None:
+        """Follow a newly connected client, and update the entities."""
+        self.async_start_push()
+        self.async_push()
+
+    @callback
+    def async_push(self) -> None:
+        """Push the current client data to the entities."""
+        start = time.monotonic()
+        self.async_set_updated_data(self._build_data())
+        self.config_entry.runtime_data.metrics.record(
+            "callbacks", time.monotonic() - start
+        )
+
+    def _frame_received(self, topic: str, frame: str | bytes) -> None:
+        """Handle a frame received on the client's websocket thread."""
+        if topic not in PUSH_TOPICS or self._push_pending:
+            return
+
+        self._push_pending = True
+        self._push_received = time.monotonic()
+        self.hass.loop.call_soon_threadsafe(self._async_handle_push)
+
+    @callback
+    def _async_handle_push(self) -> None:
+        """Push new data to the entities.
+
+        Frames arriving in a burst (status and attributes usually arrive
+        together) result in a single update.
+        """
+        self._push_pending = False
+        start = time.monotonic()
+        self.async_set_updated_data(self._build_data())
+        end = time.monotonic()
+        # from receiving the frame until the entities wrote their state
+        metrics = self.config_entry.runtime_data.metrics
+        metrics.record("push", end - self._push_received)
+        metrics.record("callbacks", end - start)
+
+    def _read_fields(self, runtime: bool = False) -> dict[str, Any]:
+        """Read the tracked fields from the client, or the runtime data."""
+        _runtime_data = self.config_entry.runtime_data
+        _source = _runtime_data if runtime else _runtime_data.client
+        snapshot = {}
+        for field, (is_runtime, names) in self._tracked_fields.items():
+            if is_runtime != runtime:
+                continue
+            value = _source
+            for name in names:
+                value = getattr(value, name, _MISSING)
+                if value is _MISSING:
+                    break
+            if isinstance(value, list):
+                # sdcpapi may update lists in place
+                value = tuple(value)
+            snapshot[field] = value
+
+        return snapshot
+
+    @staticmethod
+    def _changed(previous: dict[str, Any], snapshot: dict[str, Any]) -> frozenset:
+        """Return the fields of a snapshot which changed since the previous."""
+        return frozenset(
+            field
+            for field, value in snapshot.items()
+            if field not in previous or previous[field] != value
+        )
+
+    def _build_data(self, scheduled: bool = False) -> dict:
+        """Build the coordinator data.
+
+        Only scheduled refreshes back off the update interval of an offline
+        printer, pushed updates do not.
+        """
+        previous = self._snapshot
+        snapshot = self._read_fields()
+        if self._processors:
+            changed = self._changed(previous, snapshot)
+            for processor in tuple(self._processors):
+                processor(snapshot, changed)
+        snapshot.update(self._read_fields(runtime=True))
+        changed = self._changed(previous, snapshot)
+        self._snapshot = snapshot
+
+        if snapshot[_FIRMWARE_VERSION] != self._firmware_version:
+            self._async_update_firmware_version(snapshot[_FIRMWARE_VERSION])
+        self._async_adapt_update_interval(snapshot, scheduled)
 
-    async def _async_update_data(self):
-        """Initiate sensor updates."""
         return {
             "last_read_time": dt_util.utcnow(),
+            "snapshot": snapshot,
+            "changed": changed,
         }
+
+    @callback
+    def _async_adapt_update_interval(
+        self, snapshot: dict[str, Any], scheduled: bool = False
+    ) -> None:
+        """Set the update interval for the state of the printer."""
+        options = self.config_entry.options
+        idle_interval = options.get(CONF_IDLE_INTERVAL, DEFAULT_IDLE_INTERVAL)
+        machine_status = snapshot[_MACHINE_STATUS]
+        if (
+            snapshot[_IS_CONNECTED] is not True
+            or machine_status is _MISSING
+            or not machine_status
+        ):
+            # offline, see STATE_OFFLINE
+            if scheduled:
+                self._offline_updates += 1
+            interval = min(
+                options.get(CONF_OFFLINE_INTERVAL, DEFAULT_OFFLINE_INTERVAL),
+                idle_interval * 2 ** min(self._offline_updates, 16),
+            )
+        else:
+            self._offline_updates = 0
+            interval = (
+                options.get(CONF_PRINTING_INTERVAL, DEFAULT_PRINTING_INTERVAL)
+                if snapshot[_IS_PRINTING] is True
+                else idle_interval
+            )
+
+        if self._unsub_push is not None:
+            # polling is only a liveness fallback
+            interval = max(interval, PUSH_UPDATE_INTERVAL.total_seconds())
+
+        if self.update_interval != (update_interval := timedelta(seconds=interval)):
+            self.update_interval = update_interval
+
+    @callback
+    def _async_update_firmware_version(self, firmware_version: Any) -> None:
+        """Update the firmware version in the device registry."""
+        if firmware_version is _MISSING or firmware_version is None:
+            return
+
+        device_registry = dr.async_get(self.hass)
+        device = device_registry.async_get_device(
+            identifiers=self.device_info["identifiers"]
+        )
+        if device is None:
+            # not registered yet, retry on the next update
+            return
+
+        if device.hw_version != firmware_version:
+            device_registry.async_update_device(
+                device.id, hw_version=firmware_version
+            )
+        self._firmware_version = firmware_version
+
+    async def _async_update_data(self):
+        """Initiate sensor updates."""
+        return self._build_data(scheduled=True)
@@ -0,0 +1,80 @@
+"""Diagnostics support for the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_ID
+from homeassistant.core import HomeAssistant
+
+from .capture import REDACTED
+from .const import CONF_MAINBOARD_ID, DATA_CONNECTION_MANAGER, DOMAIN
+
+TO_REDACT = {CONF_HOST, CONF_ID, CONF_MAINBOARD_ID, "unique_id"}
+
+
+def _redact_value(value: Any, secrets: tuple[str, ...]) -> Any:
+    """Return a value which can be serialized, with the secrets redacted."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return [_redact_value(item, secrets) for item in value]
+
+    text = str(value)
+    for secret in secrets:
+        text = text.replace(secret, REDACTED)
+    return text
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = entry.runtime_data
+    _client = runtime_data.client
+    secrets = tuple(
+        secret
+        for secret in (
+            entry.data.get(CONF_HOST),
+            entry.data.get(CONF_MAINBOARD_ID),
+            entry.unique_id,
+            getattr(getattr(_client, "attributes", None), "mainboard_ip", None),
+        )
+        if secret
+    )
+
+    connection = hass.data[DOMAIN][DATA_CONNECTION_MANAGER].connections.get(
+        entry.entry_id
+    )
+    coordinator = runtime_data.coordinator
+    data = coordinator.data or {}
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "connection": None
+        if connection is None
+        else {
+            "state": connection.state,
+            "attempts": connection.attempts,
+            "reconnects": connection.reconnects,
+            "last_error": _redact_value(connection.last_error, secrets),
+            "connected": _client is not None and _client.is_connected,
+            "supports_push": _client is not None and _client.supports_push,
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "last_read_time": _redact_value(data.get("last_read_time"), secrets),
+            "snapshot": {
+                field: _redact_value(value, secrets)
+                for field, value in data.get("snapshot", {}).items()
+                if not field.startswith("runtime.")
+            },
+        },
+        "metrics": runtime_data.metrics.as_dict(),
+        "capture": runtime_data.capture.as_dict(secrets),
+        "timeseries": runtime_data.timeseries.samples(),
+    }
@@ -0,0 +1,116 @@
+"""UDP discovery of SDCP printers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+
+from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY
+from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import discovery_flow
+
+from .const import (
+    CONF_BRAND,
+    CONF_MAINBOARD_ID,
+    CONF_MODEL,
+    DISCOVERY_BROADCAST_ADDRESS,
+    DISCOVERY_MESSAGE,
+    DISCOVERY_PORT,
+    DISCOVERY_TIMEOUT,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SDCPDiscoveredPrinter:
+    """A printer which answered the discovery broadcast."""
+
+    mainboard_id: str
+    host: str
+    name: str | None = None
+    model: str | None = None
+    brand: str | None = None
+    firmware_version: str | None = None
+
+
+class SDCPDiscoveryProtocol(asyncio.DatagramProtocol):
+    """Collect the replies to the discovery broadcast.
+
+    Replies are de-duplicated on the mainboard id.
+    """
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.printers: dict[str, SDCPDiscoveredPrinter] = {}
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Handle a reply."""
+        try:
+            payload = json.loads(data)["Data"]
+            mainboard_id = payload["MainboardID"]
+        except (ValueError, KeyError, TypeError):
+            _LOGGER.debug("Ignoring invalid discovery reply from %s", addr[0])
+            return
+
+        self.printers[mainboard_id] = SDCPDiscoveredPrinter(
+            mainboard_id=mainboard_id,
+            host=payload.get("MainboardIP") or addr[0],
+            name=payload.get("Name"),
+            model=payload.get("MachineName"),
+            brand=payload.get("BrandName"),
+            firmware_version=payload.get("FirmwareVersion"),
+        )
+
+    def error_received(self, exc: Exception) -> None:
+        """Handle a socket error."""
+        _LOGGER.debug("Discovery socket error: %s", exc)
+
+
+async def async_discover_printers(
+    address: str = DISCOVERY_BROADCAST_ADDRESS,
+    port: int = DISCOVERY_PORT,
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> list[SDCPDiscoveredPrinter]:
+    """Broadcast the discovery message and return the printers which replied."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        SDCPDiscoveryProtocol,
+        local_addr=("0.0.0.0", 0),
+        allow_broadcast=True,
+    )
+    try:
+        transport.sendto(DISCOVERY_MESSAGE, (address, port))
+        await asyncio.sleep(timeout)
+    finally:
+        transport.close()
+
+    return list(protocol.printers.values())
+
+
+@callback
+def async_start_discovery_flows(
+    hass: HomeAssistant, printers: list[SDCPDiscoveredPrinter]
+) -> None:
+    """Start a discovery flow for every discovered printer.
+
+    The config flow ignores printers which are already configured, and
+    updates their host when it changed.
+    """
+    for printer in printers:
+        discovery_flow.async_create_flow(
+            hass,
+            DOMAIN,
+            context={"source": SOURCE_INTEGRATION_DISCOVERY},
+            data={
+                CONF_HOST: printer.host,
+                CONF_NAME: printer.name,
+                CONF_MAINBOARD_ID: printer.mainboard_id,
+                CONF_MODEL: printer.model,
+                CONF_BRAND: printer.brand,
+            },
+        )
@@ -1,33 +1,54 @@
 from __future__ import annotations
 
-import io
+import contextlib
 import logging
-from collections.abc import Mapping
 from datetime import date, datetime
 from decimal import Decimal
+from types import MappingProxyType
 from typing import Any
 
+from aiohttp import web
 from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.components.image import ImageEntity
+from homeassistant.components.camera import Camera
+from homeassistant.components.image import Image, ImageEntity
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, STATE_OFF, STATE_ON, STATE_UNKNOWN
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.const import (
+    CONF_FILENAME,
+    CONF_NAME,
+    CONF_PATH,
+    STATE_OFF,
+    STATE_ON,
+    STATE_UNKNOWN,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.template import Template
 from homeassistant.helpers.typing import StateType, UndefinedType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
-from PIL import Image
 
 from . import (
     SDCPDeviceBinarySensorEntityDescription,
+    SDCPDeviceCameraEntityDescription,
     SDCPDeviceImageEntityDescription,
     SDCPDeviceSensorEntityDescription,
     SDCPDeviceSwitchEntityDescription,
+    SDCPFarmSensorEntityDescription,
+)
+from .const import (
+    CONF_START_LAYER,
+    CONF_START_PRINT,
+    DATA_THUMBNAIL_CACHE,
+    DOMAIN,
+    SDCPCommand,
 )
-from .const import CONF_BRAND, CONF_MAINBOARD_ID, CONF_MODEL, DOMAIN
+from .camera_proxy import SDCPCameraProxy
+from .command import SDCPCommandError
 from .coordinator import SDCPDeviceCoordinator
+from .farm import SDCPFarm
+from .thumbnail import SDCPThumbnailCache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -44,34 +65,51 @@ class SDCPDeviceEntity(CoordinatorEntity[SDCPDeviceCoordinator]):
         self._attr_name = (
             f"{self.config_entry.data[CONF_NAME]} {self.entity_description.name}"
         )
-        self._attr_extra_state_attributes = {}
-
-    @property
-    def device_info(self) -> dict[str, Any]:
-        """Return device information about this entity."""
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, self.config_entry.unique_id)},
-            name=self.config_entry.data[CONF_NAME],
-            manufacturer=self.config_entry.data[CONF_BRAND],
-            model=self.config_entry.data[CONF_MODEL],
-            serial_number=self.config_entry.data[CONF_MAINBOARD_ID],
+        self._attr_extra_state_attributes = MappingProxyType({})
+        self._extract_attributes = self.entity_description.extract_attributes
+        self._attr_device_info = coordinator.device_info
+        self._fields: frozenset[str] = (
+            frozenset(("is_connected", *self.entity_description.fields))
+            if self.entity_description.fields
+            else frozenset()
         )
 
-        _client = self.config_entry.runtime_data.client
-        if getattr(_client.attributes, "firmware_version", None) is not None:
-            device_info["hw_version"] = _client.attributes.firmware_version
+    async def async_added_to_hass(self) -> None:
+        """When entity is added to hass."""
+        self.coordinator.async_track_fields(self._fields)
+        self._async_update_extra_state_attributes()
+        await super().async_added_to_hass()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the fields the entity depends on changed."""
+        if (
+            self._fields
+            and self.coordinator.data is not None
+            and self._fields.isdisjoint(self.coordinator.data["changed"])
+        ):
+            return
+
+        self._async_update_extra_state_attributes()
+        super()._handle_coordinator_update()
 
-        _LOGGER.warning("device_info %s" % device_info)
-        return device_info
+    @property
+    def _source(self) -> Any:
+        """Return the object the entity description reads from."""
+        return self.config_entry.runtime_data.client
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
+        if self.config_entry.runtime_data.client is None:
+            # not connected since setup
+            return False
+
         if (
             hasattr(self, "entity_description")
             and self.entity_description.available is not None
         ):
-            _client = self.config_entry.runtime_data.client
+            _client = self._source
             return self.entity_description.available(_client)
 
         return False
@@ -100,18 +138,12 @@ class SDCPDeviceEntity(CoordinatorEntity[SDCPDeviceCoordinator]):
 
         return super().supported_features
 
-    @property
-    def extra_state_attributes(self) -> Mapping[str, Any] | None:
-        if (
-            hasattr(self, "entity_description")
-            and self.entity_description.extra_state_attributes is not None
-        ):
-            self._attr_extra_state_attributes = {}
-            _client = self.config_entry.runtime_data.client
-            for attr, value in self.entity_description.extra_state_attributes.items():
-                self._attr_extra_state_attributes[attr] = value(_client)
-
-        return super().extra_state_attributes
+    @callback
+    def _async_update_extra_state_attributes(self) -> None:
+        """Extract the extra state attributes from the client."""
+        if self._extract_attributes is not None and self.available:
+            _client = self._source
+            self._attr_extra_state_attributes = self._extract_attributes(_client)
 
 
 class SDCPDeviceBinarySensor(SDCPDeviceEntity, BinarySensorEntity):
@@ -149,6 +181,125 @@ class SDCPDeviceBinarySensor(SDCPDeviceEntity, BinarySensorEntity):
         return STATE_UNKNOWN
 
 
+class SDCPDeviceCamera(SDCPDeviceEntity, Camera):
+    """SDCPDevice Camera
+
+    All viewers and snapshots share a single stream from the printer, see
+    SDCPCameraProxy.
+    """
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        entity_description: SDCPDeviceCameraEntityDescription,
+        hass: HomeAssistant,
+    ) -> None:
+        """Initialize"""
+        self.config_entry: ConfigEntry = config_entry
+        self.entity_description: SDCPDeviceCameraEntityDescription = (
+            entity_description
+        )
+        self.coordinator: SDCPDeviceCoordinator = config_entry.runtime_data.coordinator
+        self.client = config_entry.runtime_data.client
+        self.hass = hass
+        super().__init__(self.coordinator)
+        Camera.__init__(self)
+
+        self.proxy = SDCPCameraProxy(
+            hass,
+            config_entry,
+            self._async_get_video_url,
+            self._async_stop_video_stream,
+        )
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if the camera is connected to the printer."""
+        if (
+            hasattr(self, "entity_description")
+            and self.entity_description.is_on is not None
+            and self.available
+        ):
+            _client = self.config_entry.runtime_data.client
+            return self.entity_description.is_on(_client) is True
+
+        return False
+
+    @property
+    def is_streaming(self) -> bool:
+        """Return True if the stream of the printer is open."""
+        return self.proxy.is_streaming
+
+    @property
+    def frame_interval(self) -> float:
+        """Return the interval between the frames of the camera."""
+        return 1 / self.proxy.frame_rate
+
+    async def _async_get_video_url(self) -> str | None:
+        """Ask the printer to open its video stream, return its url."""
+        _commands = self.config_entry.runtime_data.commands
+        try:
+            response = await _commands.async_send(
+                SDCPCommand.VIDEO_STREAM, {"Enable": 1}
+            )
+        except SDCPCommandError as err:
+            _LOGGER.debug("Could not open the video stream: %s", err)
+            return None
+
+        _client = self.config_entry.runtime_data.client
+        url = response.get("VideoUrl") or getattr(
+            getattr(_client, "attributes", None), "video_url", None
+        )
+        if not url:
+            return None
+
+        return url if "://" in url else f"http://{url}"
+
+    async def _async_stop_video_stream(self) -> None:
+        """Ask the printer to close its video stream."""
+        _commands = self.config_entry.runtime_data.commands
+        try:
+            await _commands.async_send(SDCPCommand.VIDEO_STREAM, {"Enable": 0})
+        except SDCPCommandError as err:
+            _LOGGER.debug("Could not close the video stream: %s", err)
+
+    async def async_camera_image(
+        self, width: int | None = None, height: int | None = None
+    ) -> bytes | None:
+        """Return a recent frame of the camera."""
+        if not self.is_on:
+            return None
+
+        return await self.proxy.async_snapshot()
+
+    async def handle_async_mjpeg_stream(
+        self, request: web.Request
+    ) -> web.StreamResponse | None:
+        """Serve the shared stream of the camera as mjpeg."""
+        if not self.is_on:
+            return None
+
+        response = web.StreamResponse()
+        response.content_type = "multipart/x-mixed-replace;boundary=frame"
+        await response.prepare(request)
+        async with contextlib.aclosing(self.proxy.async_frames()) as frames:
+            try:
+                async for frame in frames:
+                    await response.write(
+                        b"--frame\r\nContent-Type: image/jpeg\r\n"
+                        b"Content-Length: %d\r\n\r\n%s\r\n" % (len(frame), frame)
+                    )
+            except ConnectionResetError:
+                pass
+
+        return response
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Close the stream of the printer."""
+        self.proxy.async_close()
+        await super().async_will_remove_from_hass()
+
+
 class SDCPDeviceImage(SDCPDeviceEntity, ImageEntity):
     """SDCPDevice Image"""
 
@@ -220,36 +371,39 @@ class SDCPDeviceImage(SDCPDeviceEntity, ImageEntity):
 
         return None
 
-    async def _fetch_url(self, url: str):
-        """Fetch a URL.
-
-        Chitubox provides 'text/plain' as content type
-        so this is a hack to provide a correct image content type
-        to Home Assistant.
-        """
-
-        response = await super()._fetch_url(url)
-        response.headers["content-type"] = "image/bmp"
+    async def _async_fetch_image_content(self, url: str) -> bytes | None:
+        """Fetch the raw image from the printer."""
+        response = await self._fetch_url(url)
+        if response is None:
+            return None
 
-        return response
+        return response.content
 
-    async def _async_load_image_from_url(self, url: str):
+    async def _async_load_image_from_url(self, url: str) -> Image | None:
         """Load an image by url
 
         Chitubox thumbnail is bitmap, which is no longer/not supported
-        by many browsers. This converts the bitmap into png, which is
-        widely supported."
+        by many browsers. The thumbnail cache converts the bitmap into png,
+        which is widely supported, outside of the event loop.
         """
 
-        image = await super()._async_load_image_from_url(url)
-        if image is not None:
-            new_image = Image.open(io.BytesIO(image.content))
-            buffer = io.BytesIO()
-            new_image.save(buffer, "PNG")
-            image.content = buffer.getvalue()
-            image.content_type = "image/png"
+        _client = self.config_entry.runtime_data.client
+        if _client is None:
+            return None
 
-        return image
+        thumbnail_cache: SDCPThumbnailCache = self.hass.data[DOMAIN][
+            DATA_THUMBNAIL_CACHE
+        ]
+        content = await thumbnail_cache.async_get(
+            getattr(_client.status, "print_task_id", None),
+            url,
+            self._async_fetch_image_content,
+            self.config_entry.runtime_data.metrics,
+        )
+        if content is None:
+            return None
+
+        return Image(content_type="image/png", content=content)
 
 
 class SDCPDeviceSwitch(SDCPDeviceEntity, SwitchEntity):
@@ -284,23 +438,25 @@ class SDCPDeviceSwitch(SDCPDeviceEntity, SwitchEntity):
 
         return STATE_UNKNOWN
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
         if (
             hasattr(self, "entity_description")
             and self.entity_description.turn_on is not None
+            and self.available
         ):
-            _client = self.config_entry.runtime_data.client
-            self.entity_description.turn_on(_client)
+            _commands = self.config_entry.runtime_data.commands
+            await self.entity_description.turn_on(_commands)
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
         if (
             hasattr(self, "entity_description")
             and self.entity_description.turn_off is not None
+            and self.available
         ):
-            _client = self.config_entry.runtime_data.client
-            self.entity_description.turn_off(_client)
+            _commands = self.config_entry.runtime_data.commands
+            await self.entity_description.turn_off(_commands)
 
 
 class SDCPDeviceSensor(SDCPDeviceEntity, SensorEntity):
@@ -328,7 +484,7 @@ class SDCPDeviceSensor(SDCPDeviceEntity, SensorEntity):
             hasattr(self, "entity_description")
             and self.entity_description.native_value is not None
         ):
-            _client = self.config_entry.runtime_data.client
+            _client = self._source
             new_value = self.entity_description.native_value(_client)
             if (
                 self.device_class == SensorDeviceClass.TIMESTAMP
@@ -341,3 +497,134 @@ class SDCPDeviceSensor(SDCPDeviceEntity, SensorEntity):
                 self._attr_native_value = new_value
 
         return super().native_value
+
+    async def _async_send_command(
+        self, command: SDCPCommand, data: dict[str, Any] | None = None
+    ) -> None:
+        """Send a command to the printer."""
+        _commands = self.config_entry.runtime_data.commands
+        await _commands.async_send(command, data)
+
+    async def svc_pause_print_job(self) -> None:
+        """Pause the current print job."""
+        await self._async_send_command(SDCPCommand.PAUSE_PRINT)
+
+    async def svc_resume_print_job(self) -> None:
+        """Resume the paused print job."""
+        await self._async_send_command(SDCPCommand.RESUME_PRINT)
+
+    async def svc_start_print_job(self, **kwargs: Any) -> None:
+        """Start a new print job."""
+        filename: Template = kwargs[CONF_FILENAME]
+        await self._async_send_command(
+            SDCPCommand.START_PRINT,
+            {
+                "Filename": filename.async_render(parse_result=False),
+                "StartLayer": kwargs[CONF_START_LAYER],
+            },
+        )
+
+    async def svc_upload_file(self, **kwargs: Any) -> None:
+        """Upload a file to the printer in the background."""
+        path = kwargs[CONF_PATH]
+        if not self.hass.config.is_allowed_path(path):
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="path_not_allowed",
+                translation_placeholders={CONF_PATH: path},
+            )
+
+        _uploader = self.config_entry.runtime_data.uploader
+        self.config_entry.async_create_background_task(
+            self.hass,
+            _uploader.async_upload(
+                path,
+                filename=kwargs.get(CONF_FILENAME),
+                start_print=kwargs[CONF_START_PRINT],
+                start_layer=kwargs[CONF_START_LAYER],
+            ),
+            f"{DOMAIN} upload {path}",
+        )
+
+    async def svc_stop_print_job(self) -> None:
+        """Stop the current print job."""
+        await self._async_send_command(SDCPCommand.STOP_PRINT)
+
+    async def svc_turn_timelapse_off(self) -> None:
+        """Turn timelapse off."""
+        await self._async_send_command(SDCPCommand.TIMELAPSE, {"Enable": 0})
+
+    async def svc_turn_timelapse_on(self) -> None:
+        """Turn timelapse on."""
+        await self._async_send_command(SDCPCommand.TIMELAPSE, {"Enable": 1})
+
+    async def svc_turn_camera_off(self) -> None:
+        """Turn the camera stream off."""
+        await self._async_send_command(SDCPCommand.VIDEO_STREAM, {"Enable": 0})
+
+    async def svc_turn_camera_on(self) -> None:
+        """Turn the camera stream on."""
+        await self._async_send_command(SDCPCommand.VIDEO_STREAM, {"Enable": 1})
+
+
+class SDCPDeviceRuntimeSensor(SDCPDeviceSensor):
+    """SDCPDevice Sensor reading from the integration's runtime data
+
+    Used for values the integration computes itself, rather than values
+    reported by the printer.
+    """
+
+    @property
+    def _source(self) -> Any:
+        """Return the object the entity description reads from."""
+        return self.config_entry.runtime_data
+
+
+class SDCPFarmSensor(SensorEntity):
+    """Sensor aggregating all printers
+
+    Updated by SDCPFarm when an aggregate changed, the state is only written
+    when the sensor's own value or attributes changed.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        farm: SDCPFarm,
+        entity_description: SDCPFarmSensorEntityDescription,
+    ) -> None:
+        """Initialize"""
+        self.farm = farm
+        self.entity_description: SDCPFarmSensorEntityDescription = entity_description
+        self._attr_unique_id = f"{DOMAIN}-farm-{entity_description.key}"
+        self._attr_name = entity_description.name
+        self._attr_extra_state_attributes = MappingProxyType({})
+        self._async_update_value()
+
+    async def async_added_to_hass(self) -> None:
+        """When entity is added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.farm.async_add_listener(self._handle_farm_update))
+
+    @callback
+    def _async_update_value(self) -> bool:
+        """Read the value from the farm, return True if it changed."""
+        value = self.entity_description.native_value(self.farm)
+        accessors = self.entity_description.extra_state_attributes or {}
+        attributes = {attr: accessor(self.farm) for attr, accessor in accessors.items()}
+        if (
+            value == self._attr_native_value
+            and attributes == self._attr_extra_state_attributes
+        ):
+            return False
+
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = MappingProxyType(attributes)
+        return True
+
+    @callback
+    def _handle_farm_update(self) -> None:
+        """Write the state if the value of the sensor changed."""
+        if self._async_update_value():
+            self.async_write_ha_state()
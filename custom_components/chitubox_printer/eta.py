@@ -0,0 +1,229 @@
+"""Estimate the finish time of print jobs from observed layer durations."""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_MODEL,
+    DOMAIN,
+    ETA_HISTORY_SIZE,
+    ETA_HISTORY_WEIGHT,
+    ETA_MIN_SAMPLES,
+    ETA_OUTLIER_FACTOR,
+    ETA_SAVE_DELAY,
+    ETA_SMOOTHING,
+    ETA_STORAGE_VERSION,
+)
+
+_TASK_ID = "status.print_task_id"
+_CURRENT_LAYER = "status.print_current_layer"
+_TOTAL_LAYERS = "status.print_total_layers"
+_IS_PRINTING = "status.is_printing"
+_FILENAME = "status.print_filename"
+
+
+class SDCPLayerDurations:
+    """Mean layer duration of the files printed before, per printer model.
+
+    Shared by all printers, and kept in `.storage`. Only the most recently
+    printed files are remembered.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize"""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, ETA_STORAGE_VERSION, f"{DOMAIN}.layer_durations"
+        )
+        self._durations: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the layer durations from storage."""
+        if (data := await self._store.async_load()) is not None:
+            self._durations = data.get("files", {})
+
+    @staticmethod
+    def _key(model: str, filename: str) -> str:
+        """Return the key of a file printed on a printer model."""
+        return f"{model}|{filename}"
+
+    def get(self, model: str, filename: str) -> float | None:
+        """Return the mean layer duration of a file, in seconds."""
+        if (entry := self._durations.get(self._key(model, filename))) is None:
+            return None
+
+        return entry["layer_duration"]
+
+    @callback
+    def async_record(self, model: str, filename: str, layer_duration: float) -> None:
+        """Blend the mean layer duration of a print into the file's history."""
+        key = self._key(model, filename)
+        entry = self._durations.pop(key, None)
+        if entry is None:
+            entry = {"layer_duration": layer_duration, "prints": 1}
+        else:
+            # recent prints weigh more, eg after a change of resin or settings
+            weight = min(entry["prints"], ETA_HISTORY_WEIGHT)
+            entry = {
+                "layer_duration": (entry["layer_duration"] * weight + layer_duration)
+                / (weight + 1),
+                "prints": entry["prints"] + 1,
+            }
+        self._durations[key] = entry
+        while len(self._durations) > ETA_HISTORY_SIZE:
+            del self._durations[next(iter(self._durations))]
+
+        self._store.async_delay_save(lambda: {"files": self._durations}, ETA_SAVE_DELAY)
+
+
+class SDCPPrintEstimator:
+    """Estimate the finish time of a printer's current job.
+
+    The duration of a layer is learned from the status updates as an
+    exponentially weighted moving average, so every update costs O(1).
+    Updates spanning several layers count as that many samples, and
+    durations far above the average (eg while paused) are ignored.
+
+    A job starts from the mean layer duration of previous prints of the same
+    file on the same printer model, when known. Until then, and until enough
+    layers were observed, the printer's own estimate is used.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        durations: SDCPLayerDurations,
+    ) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.config_entry = config_entry
+        self._durations = durations
+        self._model: str = config_entry.data[CONF_MODEL]
+        self.task_id: str | None = None
+        self.filename: str | None = None
+        self.layer_duration: float | None = None
+        self.finish_at: datetime | None = None
+        self.remaining_ms: int | None = None
+        self.source: str | None = None
+        self._total_layers = 0
+        self._last_layer = 0
+        self._last_time = 0.0
+        self._samples = 0
+        self._sum_durations = 0.0
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Follow the print jobs reported by the printer."""
+        coordinator = self.config_entry.runtime_data.coordinator
+        coordinator.async_track_fields(
+            (_TASK_ID, _CURRENT_LAYER, _TOTAL_LAYERS, _IS_PRINTING, _FILENAME)
+        )
+
+        # a processor, so the estimate is in the snapshot of the same update
+        @callback
+        def _async_process(snapshot: dict[str, Any], changed: frozenset) -> None:
+            if changed.isdisjoint((_TASK_ID, _CURRENT_LAYER, _IS_PRINTING)):
+                return
+            self._async_update(snapshot)
+
+        return coordinator.async_add_processor(_async_process)
+
+    @callback
+    def _async_update(self, snapshot: dict[str, Any]) -> None:
+        """Process a status update."""
+        task_id = snapshot.get(_TASK_ID)
+        if snapshot.get(_IS_PRINTING) is not True or not task_id:
+            self._async_end_job()
+            return
+
+        if task_id != self.task_id:
+            self._async_end_job()
+            self._async_start_job(snapshot)
+            return
+
+        layer = snapshot.get(_CURRENT_LAYER)
+        if not isinstance(layer, int) or layer <= self._last_layer:
+            return
+
+        now = time.monotonic()
+        layers = layer - self._last_layer
+        duration = (now - self._last_time) / layers
+        self._last_layer = layer
+        self._last_time = now
+
+        if (
+            self.layer_duration is not None
+            and duration > self.layer_duration * ETA_OUTLIER_FACTOR
+        ):
+            return
+
+        self._samples += layers
+        self._sum_durations += duration * layers
+        if self.layer_duration is None:
+            self.layer_duration = duration
+        else:
+            # the same as applying the smoothing once per layer
+            decay = (1 - ETA_SMOOTHING) ** layers
+            self.layer_duration = self.layer_duration * decay + duration * (1 - decay)
+
+        if self.source != "observed" and self._samples >= ETA_MIN_SAMPLES:
+            self.source = "observed"
+        self._async_update_finish()
+
+    @callback
+    def _async_start_job(self, snapshot: dict[str, Any]) -> None:
+        """Start estimating a new job."""
+        self.task_id = snapshot[_TASK_ID]
+        self.filename = snapshot.get(_FILENAME) or None
+        total_layers = snapshot.get(_TOTAL_LAYERS)
+        self._total_layers = total_layers if isinstance(total_layers, int) else 0
+        layer = snapshot.get(_CURRENT_LAYER)
+        self._last_layer = layer if isinstance(layer, int) else 0
+        self._last_time = time.monotonic()
+        self._samples = 0
+        self._sum_durations = 0.0
+        self.layer_duration = (
+            None
+            if self.filename is None
+            else self._durations.get(self._model, self.filename)
+        )
+        self.source = "history" if self.layer_duration is not None else None
+        self._async_update_finish()
+
+    @callback
+    def _async_end_job(self) -> None:
+        """Stop estimating the current job, remember its layer duration."""
+        if self.task_id is None:
+            return
+
+        if self.filename is not None and self._samples >= ETA_MIN_SAMPLES:
+            self._durations.async_record(
+                self._model, self.filename, self._sum_durations / self._samples
+            )
+
+        self.task_id = None
+        self.filename = None
+        self.layer_duration = None
+        self.source = None
+        self.finish_at = None
+        self.remaining_ms = None
+
+    @callback
+    def _async_update_finish(self) -> None:
+        """Compute the remaining time and finish time of the current job."""
+        if self.source is None or self.layer_duration is None:
+            self.finish_at = None
+            self.remaining_ms = None
+            return
+
+        remaining = max(0, self._total_layers - self._last_layer) * self.layer_duration
+        self.remaining_ms = round(remaining * 1000)
+        self.finish_at = dt_util.utcnow() + timedelta(seconds=remaining)
@@ -0,0 +1,194 @@
+"""Aggregates of all printers, maintained incrementally."""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+FARM_OFFLINE = "offline"
+FARM_IDLE = "idle"
+FARM_PRINTING = "printing"
+
+_IS_CONNECTED = "is_connected"
+_MACHINE_STATUS = "status.machine_status"
+_IS_PRINTING = "status.is_printing"
+_CURRENT_LAYER = "status.print_current_layer"
+_TOTAL_LAYERS = "status.print_total_layers"
+_FINISHED_AT = "status.print_finished_at_datetime"
+_ETA_FINISH_AT = "runtime.eta.finish_at"
+_FIELDS = (
+    _IS_CONNECTED,
+    _MACHINE_STATUS,
+    _IS_PRINTING,
+    _CURRENT_LAYER,
+    _TOTAL_LAYERS,
+    _FINISHED_AT,
+    _ETA_FINISH_AT,
+)
+
+
+class SDCPFarm:
+    """Number of printing, idle and offline printers, and their next finish.
+
+    Every printer contributes its state, remaining layers and finish time.
+    When the coordinator of a printer reports a change of one of these
+    fields, only that printer's contribution is replaced in the totals, so an
+    update costs O(1), and O(log n) for the finish time, which is kept in a
+    heap whose outdated entries are dropped lazily. Listeners are only called
+    when one of the aggregates changed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.counts: dict[str, int] = {
+            FARM_PRINTING: 0,
+            FARM_IDLE: 0,
+            FARM_OFFLINE: 0,
+        }
+        self.remaining_layers = 0
+        self._states: dict[str, str] = {}
+        self._remaining_layers: dict[str, int] = {}
+        self._finish_at: dict[str, datetime] = {}
+        self._finish_heap: list[tuple[datetime, str]] = []
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def next_finish_at(self) -> datetime | None:
+        """Return the earliest finish time of the current print jobs."""
+        heap = self._finish_heap
+        while heap and self._finish_at.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+        return heap[0][0] if heap else None
+
+    @property
+    def next_finish_printer(self) -> str | None:
+        """Return the name of the printer finishing first."""
+        if self.next_finish_at is None:
+            return None
+
+        entry = self.hass.config_entries.async_get_entry(self._finish_heap[0][1])
+        return None if entry is None else entry.title
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for changes of the aggregates."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_track(self, config_entry: ConfigEntry) -> CALLBACK_TYPE:
+        """Follow a printer, return the callback to stop following it."""
+        entry_id = config_entry.entry_id
+        coordinator = config_entry.runtime_data.coordinator
+        coordinator.async_track_fields(_FIELDS)
+
+        @callback
+        def _async_coordinator_updated() -> None:
+            if coordinator.data is None:
+                return
+            if coordinator.data["changed"].isdisjoint(_FIELDS):
+                return
+            self._async_update(entry_id, coordinator.data["snapshot"])
+
+        remove_listener = coordinator.async_add_listener(_async_coordinator_updated)
+
+        @callback
+        def _async_untrack() -> None:
+            remove_listener()
+            self._async_set(entry_id, None, 0, None)
+
+        return _async_untrack
+
+    @callback
+    def _async_update(self, entry_id: str, snapshot: dict[str, Any]) -> None:
+        """Replace the contribution of a printer by its latest snapshot."""
+        machine_status = snapshot.get(_MACHINE_STATUS)
+        if (
+            snapshot.get(_IS_CONNECTED) is not True
+            or not isinstance(machine_status, tuple)
+            or not machine_status
+        ):
+            # see SDCPDeviceCoordinator._async_adapt_update_interval
+            self._async_set(entry_id, FARM_OFFLINE, 0, None)
+            return
+
+        if snapshot.get(_IS_PRINTING) is not True:
+            self._async_set(entry_id, FARM_IDLE, 0, None)
+            return
+
+        current_layer = snapshot.get(_CURRENT_LAYER)
+        total_layers = snapshot.get(_TOTAL_LAYERS)
+        remaining_layers = (
+            max(0, total_layers - current_layer)
+            if isinstance(current_layer, int) and isinstance(total_layers, int)
+            else 0
+        )
+        finish_at = snapshot.get(_ETA_FINISH_AT) or snapshot.get(_FINISHED_AT)
+        self._async_set(
+            entry_id,
+            FARM_PRINTING,
+            remaining_layers,
+            finish_at if isinstance(finish_at, datetime) else None,
+        )
+
+    @callback
+    def _async_set(
+        self,
+        entry_id: str,
+        state: str | None,
+        remaining_layers: int,
+        finish_at: datetime | None,
+    ) -> None:
+        """Set the contribution of a printer, None as state removes it."""
+        changed = False
+
+        previous_state = self._states.get(entry_id)
+        if state != previous_state:
+            if previous_state is not None:
+                self.counts[previous_state] -= 1
+            if state is None:
+                del self._states[entry_id]
+            else:
+                self.counts[state] += 1
+                self._states[entry_id] = state
+            changed = True
+
+        previous_layers = self._remaining_layers.get(entry_id, 0)
+        if remaining_layers != previous_layers:
+            self.remaining_layers += remaining_layers - previous_layers
+            if remaining_layers:
+                self._remaining_layers[entry_id] = remaining_layers
+            else:
+                del self._remaining_layers[entry_id]
+            changed = True
+
+        if finish_at != self._finish_at.get(entry_id):
+            if finish_at is None:
+                del self._finish_at[entry_id]
+            else:
+                self._finish_at[entry_id] = finish_at
+                heapq.heappush(self._finish_heap, (finish_at, entry_id))
+                if len(self._finish_heap) > 2 * len(self._finish_at) + 16:
+                    # drop the outdated entries, amortized O(1)
+                    self._finish_heap = [
+                        (_finish_at, _entry_id)
+                        for _entry_id, _finish_at in self._finish_at.items()
+                    ]
+                    heapq.heapify(self._finish_heap)
+            changed = True
+
+        if changed:
+            for update_callback in tuple(self._listeners):
+                update_callback()
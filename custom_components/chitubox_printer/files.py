@@ -0,0 +1,234 @@
+"""Cached index of the files stored on a printer."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import posixpath
+from functools import partial
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .command import SDCPCommandError
+from .const import DOMAIN, FILES_PAGE_SIZE, FILE_STORAGES, SDCPCommand
+
+_LOGGER = logging.getLogger(__name__)
+
+FILE_TYPES = {
+    0: "folder",
+    1: "file",
+}
+
+
+class SDCPFileIndex:
+    """Cached, paged index of the files on a printer's storages.
+
+    Directories are listed lazily: the printer is only asked for a directory
+    which is not in the index yet, and pages are served from the index. Only
+    the root of every storage is listed in the background, when the printer
+    connects. A storage is dropped from the index when the USB disk is
+    (dis)connected, or a file was uploaded to it.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.version = 0
+        self._invalidations: dict[str, int] = {}
+        self._directories: dict[str, tuple[dict[str, Any], ...]] = {}
+        self._listings: dict[str, asyncio.Task[tuple[dict[str, Any], ...]]] = {}
+        self._refresh_tasks: dict[str, asyncio.Task] = {}
+        self._pending_refreshes: set[str] = set()
+
+    @staticmethod
+    def _url(storage: str, path: str | None = None) -> str:
+        """Return the url of a directory on a storage."""
+        return posixpath.normpath(
+            posixpath.join("/", storage, (path or "").lstrip("/"))
+        )
+
+    @staticmethod
+    def _storage(url: str) -> str:
+        """Return the storage of a directory url."""
+        return url.lstrip("/").partition("/")[0]
+
+    def count(self, storage: str) -> int | None:
+        """Return the number of entries in the root of a storage, if indexed."""
+        if (entries := self._directories.get(self._url(storage))) is None:
+            return None
+
+        return len(entries)
+
+    @callback
+    def async_invalidate(self, storage: str | None = None) -> None:
+        """Drop a storage, or all storages, from the index."""
+        storages = FILE_STORAGES if storage is None else (storage,)
+        self._directories = {
+            url: entries
+            for url, entries in self._directories.items()
+            if self._storage(url) not in storages
+        }
+        # listings still running were sent before the invalidation
+        self._listings = {
+            url: task
+            for url, task in self._listings.items()
+            if self._storage(url) not in storages
+        }
+        for storage in storages:
+            self._invalidations[storage] = self._invalidations.get(storage, 0) + 1
+        self.version += 1
+        self.async_schedule_refresh(storages)
+
+    @callback
+    def async_schedule_refresh(
+        self, storages: tuple[str, ...] = FILE_STORAGES
+    ) -> None:
+        """List the root of storages in the background.
+
+        A storage which is being refreshed is refreshed again once done, as
+        the running listing may predate the request.
+        """
+        for storage in storages:
+            if (task := self._refresh_tasks.get(storage)) is not None:
+                if not task.done():
+                    self._pending_refreshes.add(storage)
+                    continue
+
+            task = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_refresh(storage),
+                f"{DOMAIN} file index refresh {storage}",
+            )
+            self._refresh_tasks[storage] = task
+            task.add_done_callback(partial(self._async_refresh_done, storage))
+
+    @callback
+    def _async_refresh_done(self, storage: str, task: asyncio.Task) -> None:
+        """Run the refresh of a storage requested while it was running."""
+        if self._refresh_tasks.get(storage) is task:
+            del self._refresh_tasks[storage]
+        if storage in self._pending_refreshes:
+            self._pending_refreshes.discard(storage)
+            self.async_schedule_refresh((storage,))
+
+    async def _async_refresh(self, storage: str) -> None:
+        """List the root of a storage, unless it is indexed."""
+        _client = self.config_entry.runtime_data.client
+        if _client is None or not _client.is_connected:
+            return
+
+        if storage == "usb" and not getattr(
+            _client.attributes, "usbdisk_connected", False
+        ):
+            return
+        try:
+            await self._async_get_directory(self._url(storage))
+        except SDCPCommandError as err:
+            _LOGGER.debug("Could not list the files on %s: %s", storage, err)
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Keep the index in sync with the printer's storages."""
+        coordinator = self.config_entry.runtime_data.coordinator
+        coordinator.async_track_fields(
+            ("is_connected", "attributes.usbdisk_connected")
+        )
+
+        @callback
+        def _async_coordinator_updated() -> None:
+            if coordinator.data is None:
+                return
+            changed = coordinator.data["changed"]
+            if "attributes.usbdisk_connected" in changed:
+                self.async_invalidate("usb")
+            elif "is_connected" in changed:
+                self.async_schedule_refresh()
+
+        return coordinator.async_add_listener(_async_coordinator_updated)
+
+    async def async_list(
+        self,
+        storage: str,
+        path: str | None = None,
+        offset: int = 0,
+        limit: int = FILES_PAGE_SIZE,
+        refresh: bool = False,
+    ) -> dict[str, Any]:
+        """Return a page of the entries of a directory, folders first."""
+        url = self._url(storage, path)
+        if refresh:
+            self._directories.pop(url, None)
+
+        entries = await self._async_get_directory(url)
+        return {
+            "storage": storage,
+            "path": url,
+            "total": len(entries),
+            "offset": offset,
+            "files": list(entries[offset : offset + limit]),
+        }
+
+    async def async_get_file(self, storage: str, path: str) -> dict[str, Any] | None:
+        """Return the entry of a file, None if the storage does not hold it."""
+        url = self._url(storage, path)
+        entries = await self._async_get_directory(posixpath.dirname(url))
+        name = posixpath.basename(url)
+        return next((entry for entry in entries if entry["name"] == name), None)
+
+    async def _async_get_directory(self, url: str) -> tuple[dict[str, Any], ...]:
+        """Return the entries of a directory, list it when not indexed.
+
+        Concurrent requests for the same directory share a single listing.
+        """
+        if (entries := self._directories.get(url)) is not None:
+            return entries
+
+        if (task := self._listings.get(url)) is None:
+            task = self.hass.async_create_task(
+                self._async_list_directory(url), eager_start=True
+            )
+            self._listings[url] = task
+            task.add_done_callback(partial(self._async_listing_done, url))
+
+        return await asyncio.shield(task)
+
+    @callback
+    def _async_listing_done(self, url: str, task: asyncio.Task) -> None:
+        """Forget a listing, unless it was replaced after an invalidation."""
+        if self._listings.get(url) is task:
+            del self._listings[url]
+
+    async def _async_list_directory(self, url: str) -> tuple[dict[str, Any], ...]:
+        """Ask the printer for the entries of a directory, and index them."""
+        storage = self._storage(url)
+        invalidations = self._invalidations.get(storage, 0)
+        response = await self.config_entry.runtime_data.commands.async_send(
+            SDCPCommand.FILE_LIST, {"Url": url}
+        )
+        entries = tuple(
+            sorted(
+                map(self._entry_from_file, response.get("FileList") or []),
+                key=lambda entry: (entry["type"] != "folder", entry["name"].lower()),
+            )
+        )
+        # do not index a listing which was invalidated while it ran
+        if invalidations == self._invalidations.get(storage, 0):
+            self._directories[url] = entries
+            self.version += 1
+            self.config_entry.runtime_data.coordinator.async_push()
+
+        return entries
+
+    @staticmethod
+    def _entry_from_file(file: dict[str, Any]) -> dict[str, Any]:
+        """Return an index entry from a file sent by the printer."""
+        path = file.get("name") or ""
+        return {
+            "name": posixpath.basename(path.rstrip("/")),
+            "path": path,
+            "type": FILE_TYPES.get(file.get("type"), "file"),
+            "size": file.get("usedSize"),
+        }
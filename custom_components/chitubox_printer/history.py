@@ -0,0 +1,239 @@
+"""Print job history of a printer."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+from datetime import datetime
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .command import SDCPCommandError
+from .const import (
+    DATA_TIMELAPSE_ARCHIVER,
+    DOMAIN,
+    HISTORY_DETAILS_BATCH_SIZE,
+    HISTORY_SAVE_DELAY,
+    HISTORY_STORAGE_VERSION,
+    SDCPCommand,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+JOB_OUTCOMES = {
+    0: "other",
+    1: "completed",
+    2: "failed",
+    3: "stopped",
+}
+
+
+class SDCPJobHistory:
+    """Persistent, indexed print job history of a printer.
+
+    Jobs are kept in `.storage`, and synced incrementally from the printer:
+    only the details of task ids which are not known yet are requested.
+    Queries are answered from the indexes, without contacting the printer.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.config_entry = config_entry
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            HISTORY_STORAGE_VERSION,
+            f"{DOMAIN}.history.{config_entry.entry_id}",
+        )
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self.synced = False
+        self._by_begin: list[tuple[int, str]] = []
+        self._by_filename: dict[str, set[str]] = {}
+        self._by_outcome: dict[str, set[str]] = {}
+        self._sync_task: asyncio.Task | None = None
+
+    async def async_load(self) -> None:
+        """Load the history from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+
+        self.synced = data.get("synced", True)
+        for job in data.get("jobs", []):
+            self._add(job)
+
+    async def async_remove(self) -> None:
+        """Remove the history from storage."""
+        await self._store.async_remove()
+
+    def _add(self, job: dict[str, Any]) -> None:
+        """Add a job to the history and its indexes."""
+        task_id = job["task_id"]
+        if task_id in self.jobs:
+            return
+
+        self.jobs[task_id] = job
+        bisect.insort(self._by_begin, (job["begin"], task_id))
+        self._by_filename.setdefault(job["filename"], set()).add(task_id)
+        self._by_outcome.setdefault(job["outcome"], set()).add(task_id)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {
+            "synced": self.synced,
+            "jobs": [self.jobs[task_id] for _, task_id in self._by_begin],
+        }
+
+    @callback
+    def async_schedule_sync(self) -> None:
+        """Sync the history in the background, unless a sync is running."""
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+
+        self._sync_task = self.config_entry.async_create_background_task(
+            self.hass, self.async_sync(), f"{DOMAIN} history sync"
+        )
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Sync when the printer (re)connects or a print job starts or ends."""
+        coordinator = self.config_entry.runtime_data.coordinator
+        coordinator.async_track_fields(
+            ("is_connected", "status.is_printing", "status.print_task_id")
+        )
+
+        @callback
+        def _async_coordinator_updated() -> None:
+            if coordinator.data is None:
+                return
+            changed = coordinator.data["changed"]
+            if not changed.isdisjoint(
+                ("is_connected", "status.is_printing", "status.print_task_id")
+            ):
+                self.async_schedule_sync()
+
+        return coordinator.async_add_listener(_async_coordinator_updated)
+
+    async def async_sync(self) -> int:
+        """Fetch the jobs the history does not hold yet, return their number.
+
+        The timelapses of the new jobs are archived, except on the first sync,
+        which imports the jobs printed before the printer was added.
+        """
+        _client = self.config_entry.runtime_data.client
+        if _client is None or not _client.is_connected:
+            return 0
+
+        _commands = self.config_entry.runtime_data.commands
+        try:
+            response = await _commands.async_send(SDCPCommand.HISTORY_TASKS)
+            task_ids: list[str] = response.get("HistoryData") or []
+
+            new_task_ids = [
+                task_id for task_id in task_ids if task_id not in self.jobs
+            ]
+            new_jobs = []
+
+            for index in range(0, len(new_task_ids), HISTORY_DETAILS_BATCH_SIZE):
+                response = await _commands.async_send(
+                    SDCPCommand.HISTORY_TASK_DETAILS,
+                    {"Id": new_task_ids[index : index + HISTORY_DETAILS_BATCH_SIZE]},
+                )
+                for details in response.get("HisTaskDetailInfo") or []:
+                    job = self._job_from_details(details)
+                    self._add(job)
+                    new_jobs.append(job)
+        except SDCPCommandError as err:
+            _LOGGER.debug("Could not sync the print job history: %s", err)
+            return 0
+
+        if new_task_ids and self.synced:
+            self.hass.data[DOMAIN][DATA_TIMELAPSE_ARCHIVER].async_schedule(
+                self.config_entry, new_jobs
+            )
+        if new_task_ids or not self.synced:
+            self.synced = True
+            self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+        return len(new_task_ids)
+
+    @staticmethod
+    def _job_from_details(details: dict[str, Any]) -> dict[str, Any]:
+        """Return a job from the details sent by the printer."""
+        begin = int(details.get("BeginTime") or 0)
+        end = int(details.get("EndTime") or 0)
+        return {
+            "task_id": details["TaskId"],
+            "filename": details.get("TaskName") or "",
+            "begin": begin,
+            "end": end,
+            "duration": max(0, end - begin),
+            "outcome": JOB_OUTCOMES.get(details.get("TaskStatus"), "other"),
+            "thumbnail": details.get("Thumbnail"),
+            "timelapse_url": details.get("TimeLapseVideoUrl"),
+        }
+
+    @callback
+    def async_query(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        filename: str | None = None,
+        outcome: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return the jobs matching all criteria, most recent first.
+
+        `filename` matches part of the file name, case insensitive.
+        """
+        start = 0
+        stop = len(self._by_begin)
+        if since is not None:
+            start = bisect.bisect_left(
+                self._by_begin, (int(dt_util.as_timestamp(since)), "")
+            )
+        if until is not None:
+            stop = bisect.bisect_right(
+                self._by_begin, (int(dt_util.as_timestamp(until)), "\uffff")
+            )
+
+        candidates: set[str] | None = None
+        if outcome is not None:
+            candidates = self._by_outcome.get(outcome, set())
+        if filename is not None:
+            needle = filename.lower()
+            matches = {
+                task_id
+                for name, task_ids in self._by_filename.items()
+                if needle in name.lower()
+                for task_id in task_ids
+            }
+            candidates = matches if candidates is None else candidates & matches
+
+        jobs = []
+        for _, task_id in reversed(self._by_begin[start:stop]):
+            if candidates is not None and task_id not in candidates:
+                continue
+            jobs.append(self.jobs[task_id])
+            if limit is not None and len(jobs) >= limit:
+                break
+
+        return jobs
+
+    @staticmethod
+    def summarize(jobs: list[dict[str, Any]]) -> dict[str, Any]:
+        """Return statistics about jobs."""
+        outcomes: dict[str, int] = {}
+        for job in jobs:
+            outcomes[job["outcome"]] = outcomes.get(job["outcome"], 0) + 1
+
+        return {
+            "count": len(jobs),
+            "total_duration": sum(job["duration"] for job in jobs),
+            "outcomes": outcomes,
+        }
@@ -14,6 +14,10 @@ IMAGES: tuple[SDCPDeviceImageEntityDescription, ...] = (
     SDCPDeviceImageEntityDescription(
         key="Thumbnail",
         name="Thumbnail",
+        fields=(
+            "status.is_printing",
+            "current_task.thumbnail",
+        ),
         icon="mdi:image",
         image_url=lambda _client: getattr(
             _client.current_task, "thumbnail", STATE_UNKNOWN
@@ -39,8 +43,7 @@ async def async_setup_entry(
 
     assert entry.unique_id is not None
 
-    for image in IMAGES:
-        async_add_entities(
-            [SDCPDeviceImage(config_entry=entry, entity_description=image, hass=hass)],
-            update_before_add=True,
-        )
+    async_add_entities(
+        SDCPDeviceImage(config_entry=entry, entity_description=image, hass=hass)
+        for image in IMAGES
+    )
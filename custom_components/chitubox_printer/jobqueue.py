@@ -0,0 +1,386 @@
+"""Queue of print jobs, dispatched to idle printers."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .command import SDCPCommandError
+from .const import (
+    CONF_MODEL,
+    DOMAIN,
+    JOB_QUEUE_ATTEMPTS,
+    JOB_QUEUE_RETRY_DELAY,
+    JOB_QUEUE_SAVE_DELAY,
+    JOB_QUEUE_START_TIMEOUT,
+    JOB_QUEUE_STORAGE_VERSION,
+    SDCPCommand,
+)
+from .upload import SDCPUploadStatus
+
+_LOGGER = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_DISPATCHING = "dispatching"
+JOB_FAILED = "failed"
+
+_IS_CONNECTED = "is_connected"
+_MACHINE_STATUS = "status.machine_status"
+_IS_PRINTING = "status.is_printing"
+_FIELDS = (_IS_CONNECTED, _MACHINE_STATUS, _IS_PRINTING)
+
+# the queue of the jobs which print on any model
+_ANY_MODEL = ""
+
+
+def _model_key(model: str | None) -> str:
+    """Return the index key of a printer model."""
+    return (model or _ANY_MODEL).casefold()
+
+
+class SDCPJobQueue:
+    """Persistent queue of print jobs, shared by all printers.
+
+    Jobs are kept in `.storage`, and wait in a priority queue per printer
+    model, jobs without a model in a queue of their own. Idle printers are
+    indexed by model, as they are reported by the coordinators. So when a
+    printer turns idle, only the heads of its model's queue and of the any
+    model queue are compared, and when a job is queued, only the idle
+    printers of its model are looked up.
+
+    A job is dispatched by uploading its file, unless the printer already
+    holds a file of that name and size, and starting it. The printer is
+    reserved until it started printing. Failed jobs are queued again, up to
+    JOB_QUEUE_ATTEMPTS times, and offered to the other idle printers first:
+    the printer which failed waits longer with every attempt.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize"""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, JOB_QUEUE_STORAGE_VERSION, f"{DOMAIN}.job_queue"
+        )
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self._queues: dict[str, list[tuple[int, int, str]]] = {}
+        self._sequence = itertools.count()
+        self._entries: dict[str, ConfigEntry] = {}
+        self._idle: dict[str, set[str]] = {}
+        # reserved printers, with the timer releasing them, None while a job
+        # is being started
+        self._busy: dict[str, CALLBACK_TYPE | None] = {}
+
+    async def async_load(self) -> None:
+        """Load the queue from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+
+        for job in data.get("jobs", []):
+            if job["status"] == JOB_DISPATCHING:
+                # it is unknown whether the printer started the job
+                job["status"] = JOB_FAILED
+                job["error"] = "Interrupted by a restart"
+            self.jobs[job["id"]] = job
+            if job["status"] == JOB_QUEUED:
+                self._push(job)
+
+    @callback
+    def _async_save(self) -> None:
+        """Save the queue."""
+        self._store.async_delay_save(
+            lambda: {"jobs": list(self.jobs.values())}, JOB_QUEUE_SAVE_DELAY
+        )
+
+    def _push(self, job: dict[str, Any]) -> None:
+        """Add a job to the queue of its model."""
+        heapq.heappush(
+            self._queues.setdefault(_model_key(job["model"]), []),
+            (-job["priority"], next(self._sequence), job["id"]),
+        )
+
+    def _peek(self, model_key: str) -> tuple[int, int, str] | None:
+        """Return the head of a model's queue, dropping removed jobs."""
+        queue = self._queues.get(model_key)
+        while queue:
+            job = self.jobs.get(queue[0][2])
+            if job is not None and job["status"] == JOB_QUEUED:
+                return queue[0]
+            heapq.heappop(queue)
+
+        return None
+
+    @callback
+    def async_queue(
+        self,
+        path: str | None = None,
+        filename: str | None = None,
+        model: str | None = None,
+        priority: int = 0,
+    ) -> dict[str, Any]:
+        """Queue a print job, return it.
+
+        `path` is a file on the Home Assistant host, uploaded when needed,
+        `filename` a file on the printer's internal storage.
+        """
+        job = {
+            "id": uuid.uuid4().hex,
+            "path": path,
+            "filename": filename or os.path.basename(path or ""),
+            "model": model or None,
+            "priority": priority,
+            "queued_at": time.time(),
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "error": None,
+            "printer": None,
+        }
+        self.jobs[job["id"]] = job
+        self._push(job)
+        self._async_save()
+        self._async_offer(job)
+        return job
+
+    @callback
+    def _async_offer(self, job: dict[str, Any]) -> None:
+        """Dispatch to an idle printer which can print a queued job."""
+        keys = (_model_key(job["model"]),) if job["model"] else tuple(self._idle)
+        for key in keys:
+            if idle := self._idle.get(key):
+                self._async_dispatch(next(iter(idle)))
+                break
+
+    @callback
+    def async_remove(self, job_id: str) -> bool:
+        """Remove a queued or failed job, return False if there is none."""
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] == JOB_DISPATCHING:
+            return False
+
+        # its queue entry is dropped lazily
+        del self.jobs[job_id]
+        self._async_save()
+        return True
+
+    @callback
+    def async_list(self) -> list[dict[str, Any]]:
+        """Return all jobs, queued jobs in dispatch order first."""
+        queued = sorted(
+            (job for job in self.jobs.values() if job["status"] == JOB_QUEUED),
+            key=lambda job: (-job["priority"], job["queued_at"]),
+        )
+        return [
+            *queued,
+            *(job for job in self.jobs.values() if job["status"] != JOB_QUEUED),
+        ]
+
+    @callback
+    def async_track(self, config_entry: ConfigEntry) -> CALLBACK_TYPE:
+        """Dispatch jobs to a printer, return the callback to stop it."""
+        entry_id = config_entry.entry_id
+        model_key = _model_key(config_entry.data[CONF_MODEL])
+        coordinator = config_entry.runtime_data.coordinator
+        coordinator.async_track_fields(_FIELDS)
+        self._entries[entry_id] = config_entry
+
+        @callback
+        def _async_coordinator_updated() -> None:
+            if coordinator.data is None:
+                return
+            if coordinator.data["changed"].isdisjoint(_FIELDS):
+                return
+            self._async_update(entry_id)
+
+        remove_listener = coordinator.async_add_listener(_async_coordinator_updated)
+
+        @callback
+        def _async_untrack() -> None:
+            remove_listener()
+            self._async_set_idle(entry_id, model_key, False)
+            self._async_release(entry_id)
+            del self._entries[entry_id]
+
+        return _async_untrack
+
+    @callback
+    def _async_update(self, entry_id: str) -> None:
+        """Follow the state of a printer, dispatch a job when it is idle."""
+        config_entry = self._entries.get(entry_id)
+        if config_entry is None or config_entry.runtime_data.coordinator.data is None:
+            return
+
+        model_key = _model_key(config_entry.data[CONF_MODEL])
+        snapshot = config_entry.runtime_data.coordinator.data["snapshot"]
+        machine_status = snapshot.get(_MACHINE_STATUS)
+        idle = (
+            snapshot.get(_IS_CONNECTED) is True
+            and snapshot.get(_IS_PRINTING) is not True
+            and isinstance(machine_status, tuple)
+            and [str(status).lower() for status in machine_status] == ["idle"]
+        )
+        if not idle:
+            self._async_set_idle(entry_id, model_key, False)
+            if self._busy.get(entry_id) is not None:
+                # it started the dispatched job, or was taken over
+                self._async_release(entry_id)
+        elif entry_id not in self._busy:
+            self._async_set_idle(entry_id, model_key, True)
+            self._async_dispatch(entry_id)
+
+    @callback
+    def _async_set_idle(self, entry_id: str, model_key: str, idle: bool) -> None:
+        """Add a printer to, or remove it from the idle printers of its model."""
+        if idle:
+            self._idle.setdefault(model_key, set()).add(entry_id)
+        elif (printers := self._idle.get(model_key)) is not None:
+            printers.discard(entry_id)
+            if not printers:
+                del self._idle[model_key]
+
+    @callback
+    def _async_release(self, entry_id: str) -> None:
+        """Stop reserving a printer for a dispatched job."""
+        if (cancel := self._busy.pop(entry_id, None)) is not None:
+            cancel()
+
+    @callback
+    def _async_dispatch(self, entry_id: str) -> None:
+        """Dispatch the next compatible job to an idle printer."""
+        config_entry = self._entries[entry_id]
+        model_key = _model_key(config_entry.data[CONF_MODEL])
+        heads = [
+            (head, key)
+            for key in (model_key, _ANY_MODEL)
+            if (head := self._peek(key)) is not None
+        ]
+        if not heads:
+            return
+
+        head, key = min(heads)
+        heapq.heappop(self._queues[key])
+        job = self.jobs[head[2]]
+        job["status"] = JOB_DISPATCHING
+        job["printer"] = entry_id
+        job["attempts"] += 1
+        self._async_save()
+
+        # reserve the printer until the job is started
+        self._async_set_idle(entry_id, model_key, False)
+        self._busy[entry_id] = None
+        config_entry.async_create_background_task(
+            self.hass,
+            self._async_start(config_entry, job),
+            f"{DOMAIN} dispatch {job['id']}",
+        )
+
+    @callback
+    def _async_reserve(self, entry_id: str, delay: float) -> None:
+        """Keep a printer reserved for delay seconds."""
+        if entry_id not in self._busy:
+            # released, or no longer tracked, while the job was started
+            return
+
+        self._busy[entry_id] = async_call_later(
+            self.hass, delay, partial(self._async_timeout, entry_id)
+        )
+
+    @callback
+    def _async_timeout(self, entry_id: str, _now: datetime) -> None:
+        """Release a reserved printer."""
+        self._busy.pop(entry_id, None)
+        self._async_update(entry_id)
+
+    async def _async_start(
+        self, config_entry: ConfigEntry, job: dict[str, Any]
+    ) -> None:
+        """Start a dispatched job, queue it again when it failed."""
+        entry_id = config_entry.entry_id
+        try:
+            await self._async_print(config_entry, job)
+        except (OSError, SDCPCommandError) as err:
+            _LOGGER.warning(
+                "Could not print %s on %s: %s",
+                job["filename"],
+                config_entry.title,
+                err,
+            )
+            self._async_retry(entry_id, job, str(err))
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.exception(
+                "Unexpected error printing %s on %s",
+                job["filename"],
+                config_entry.title,
+            )
+            self._async_retry(entry_id, job, str(err))
+        else:
+            _LOGGER.info("Printing %s on %s", job["filename"], config_entry.title)
+            del self.jobs[job["id"]]
+            self._async_save()
+            # until the printer reports that it started printing
+            self._async_reserve(entry_id, JOB_QUEUE_START_TIMEOUT)
+        finally:
+            if job["status"] == JOB_DISPATCHING and job["id"] in self.jobs:
+                # cancelled, it is unknown whether the printer started the job
+                job["status"] = JOB_FAILED
+                job["error"] = "Interrupted"
+                job["printer"] = None
+                self._async_save()
+
+    @callback
+    def _async_retry(self, entry_id: str, job: dict[str, Any], error: str) -> None:
+        """Queue a job which a printer could not start again, or fail it."""
+        job["error"] = error
+        job["printer"] = None
+        if job["attempts"] >= JOB_QUEUE_ATTEMPTS:
+            job["status"] = JOB_FAILED
+        else:
+            job["status"] = JOB_QUEUED
+            self._push(job)
+        self._async_save()
+
+        # the other idle printers get the job first
+        self._async_reserve(entry_id, JOB_QUEUE_RETRY_DELAY * job["attempts"])
+        if job["status"] == JOB_QUEUED:
+            self._async_offer(job)
+
+    async def _async_print(
+        self, config_entry: ConfigEntry, job: dict[str, Any]
+    ) -> None:
+        """Upload the file of a job if needed, and start printing it."""
+        _runtime_data = config_entry.runtime_data
+        if job["path"] is not None and not await self._async_is_uploaded(
+            config_entry, job
+        ):
+            _uploader = _runtime_data.uploader
+            await _uploader.async_upload(job["path"], filename=job["filename"])
+            if _uploader.status != SDCPUploadStatus.COMPLETED:
+                raise SDCPCommandError(f"Upload failed: {_uploader.error}")
+
+        await _runtime_data.commands.async_send(
+            SDCPCommand.START_PRINT,
+            {"Filename": f"/local/{job['filename']}", "StartLayer": 0},
+        )
+
+    async def _async_is_uploaded(
+        self, config_entry: ConfigEntry, job: dict[str, Any]
+    ) -> bool:
+        """Return True if the printer holds the file of a job."""
+        entry = await config_entry.runtime_data.files.async_get_file(
+            "local", job["filename"]
+        )
+        if entry is None:
+            return False
+
+        size = await self.hass.async_add_executor_job(os.path.getsize, job["path"])
+        return entry["size"] is None or entry["size"] == size
@@ -0,0 +1,159 @@
+"""Performance metrics of a printer's hot paths."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .client import SDCPDeviceClient
+from .const import DATA_CONNECTION_MANAGER, DOMAIN, METRICS_INTERVAL
+
+
+class SDCPDuration:
+    """Statistics of a measured duration."""
+
+    __slots__ = ("count", "last", "max", "total")
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.count = 0
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add a measurement."""
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics, in milliseconds."""
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 3),
+            "mean_ms": round(self.mean * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class SDCPMetrics:
+    """Metrics of a printer's hot paths.
+
+    Measuring is cheap: frames are counted on the websocket thread, and
+    durations are added to running statistics. The frame rate and the
+    reconnect count are sampled every METRICS_INTERVAL, after which the
+    entities are updated, so the metrics do not cause state writes of their
+    own between samples.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.frames = 0
+        self.frame_rate = 0.0
+        self.reconnects = 0
+        self.durations: dict[str, SDCPDuration] = {}
+        self.version = 0
+        self._sampled_frames = 0
+        self._sampled_at = time.monotonic()
+        self._unsub_client: Callable[[], None] | None = None
+
+    @callback
+    def async_attach(self, client: SDCPDeviceClient | None) -> None:
+        """Count the frames received by a (new) client."""
+        if self._unsub_client is not None:
+            self._unsub_client()
+            self._unsub_client = None
+
+        if client is not None:
+            self._unsub_client = client.add_frame_listener(self._frame_received)
+
+    def _frame_received(self, topic: str, frame: str | bytes) -> None:
+        """Count a frame, on the client's websocket thread."""
+        self.frames += 1
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a measured duration."""
+        if (duration := self.durations.get(name)) is None:
+            duration = self.durations[name] = SDCPDuration()
+        duration.record(seconds)
+
+    def mean_ms(self, name: str) -> float | None:
+        """Return the mean of a duration in milliseconds, if measured."""
+        if (duration := self.durations.get(name)) is None:
+            return None
+
+        return round(duration.mean * 1000, 3)
+
+    def mean_ms_of(self, prefix: str) -> float | None:
+        """Return the mean of all durations starting with prefix, if measured."""
+        count = 0
+        total = 0.0
+        for name, duration in self.durations.items():
+            if name.startswith(prefix):
+                count += duration.count
+                total += duration.total
+        if count == 0:
+            return None
+
+        return round(total / count * 1000, 3)
+
+    def durations_of(self, prefix: str) -> dict[str, float]:
+        """Return the mean of the durations starting with prefix, by name."""
+        return {
+            name.removeprefix(prefix): round(duration.mean * 1000, 3)
+            for name, duration in self.durations.items()
+            if name.startswith(prefix)
+        }
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Sample the rates every METRICS_INTERVAL."""
+        return async_track_time_interval(
+            self.hass, self._async_sample, METRICS_INTERVAL, cancel_on_shutdown=True
+        )
+
+    @callback
+    def _async_sample(self, *_: Any) -> None:
+        """Sample the frame rate and reconnect count, update the entities."""
+        now = time.monotonic()
+        frames = self.frames
+        self.frame_rate = round(
+            (frames - self._sampled_frames) / (now - self._sampled_at) * 60, 2
+        )
+        self._sampled_frames = frames
+        self._sampled_at = now
+
+        manager = self.hass.data[DOMAIN][DATA_CONNECTION_MANAGER]
+        connection = manager.connections.get(self.config_entry.entry_id)
+        if connection is not None:
+            self.reconnects = connection.reconnects
+
+        self.version += 1
+        self.config_entry.runtime_data.coordinator.async_push()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics."""
+        return {
+            "frames": self.frames,
+            "frames_per_minute": self.frame_rate,
+            "reconnects": self.reconnects,
+            "durations": {
+                name: duration.as_dict()
+                for name, duration in sorted(self.durations.items())
+            },
+        }
@@ -11,13 +11,20 @@ from homeassistant.const import (
     STATE_UNKNOWN,
     EntityCategory,
     UnitOfTemperature,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_platform
-from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.entity_platform import (
+    AddConfigEntryEntitiesCallback,
+    AddEntitiesCallback,
+)
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
-from . import SDCPDeviceSensorEntityDescription
+from . import SDCPDeviceSensorEntityDescription, SDCPFarmSensorEntityDescription
 from .const import (
+    DATA_FARM,
+    DOMAIN,
     METHOD_PAUSE_PRINT_JOB,
     METHOD_RESUME_PRINT_JOB,
     METHOD_START_PRINT_JOB,
@@ -26,6 +33,7 @@ from .const import (
     METHOD_TURN_CAMERA_ON,
     METHOD_TURN_TIMELAPSE_OFF,
     METHOD_TURN_TIMELAPSE_ON,
+    METHOD_UPLOAD_FILE,
     SCHEMA_PAUSE_PRINT_JOB,
     SCHEMA_RESUME_PRINT_JOB,
     SCHEMA_START_PRINT_JOB,
@@ -34,6 +42,7 @@ from .const import (
     SCHEMA_TURN_CAMERA_ON,
     SCHEMA_TURN_TIMELAPSE_OFF,
     SCHEMA_TURN_TIMELAPSE_ON,
+    SCHEMA_UPLOAD_FILE,
     SERVICE_PAUSE_PRINT_JOB,
     SERVICE_RESUME_PRINT_JOB,
     SERVICE_START_PRINT_JOB,
@@ -42,15 +51,22 @@ from .const import (
     SERVICE_TURN_CAMERA_ON,
     SERVICE_TURN_TIMELAPSE_OFF,
     SERVICE_TURN_TIMELAPSE_ON,
+    SERVICE_UPLOAD_FILE,
     STATE_OFFLINE,
     SDCPPrinterEntityFeature,
 )
-from .entity import SDCPDeviceSensor
+from .entity import SDCPDeviceRuntimeSensor, SDCPDeviceSensor, SDCPFarmSensor
+from .farm import FARM_IDLE, FARM_OFFLINE, FARM_PRINTING
 
 SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
     SDCPDeviceSensorEntityDescription(
         key="Printer",
         name="Printer",
+        fields=(
+            "status.machine_status",
+            "status.print_status",
+            "status.machine_previous_status",
+        ),
         icon="mdi:printer-3d",
         available=lambda _client: True,
         device_class="3d-printer",
@@ -66,6 +82,12 @@ SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
             SDCPPrinterEntityFeature.PAUSE
             | SDCPPrinterEntityFeature.RESUME
             | SDCPPrinterEntityFeature.STOP
+            | SDCPPrinterEntityFeature.START
+            | SDCPPrinterEntityFeature.TIMELAPSE_OFF
+            | SDCPPrinterEntityFeature.TIMELAPSE_ON
+            | SDCPPrinterEntityFeature.CAMERA_ON
+            | SDCPPrinterEntityFeature.CAMERA_OFF
+            | SDCPPrinterEntityFeature.UPLOAD
         ),
         extra_state_attributes={
             "action": lambda _client: getattr(
@@ -81,47 +103,12 @@ SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
     ),
 )
 DIAGNOSTIC_SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
-    SDCPDeviceSensorEntityDescription(
-        key="Job progress",
-        name="Job Progress",
-        icon="mdi:file-percent",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        native_value=lambda _client: (
-            0
-            if getattr(_client.status, "print_progress", None) is None
-            else round(_client.status.print_progress, 2)
-        ),
-        native_unit_of_measurement=PERCENTAGE,
-        extra_state_attributes={
-            "current_layer": lambda _client: getattr(
-                _client.status, "print_current_layer", STATE_UNKNOWN
-            ),
-            "current_task_id": lambda _client: getattr(
-                _client.status, "print_task_id", STATE_UNKNOWN
-            ),
-            "filename": lambda _client: getattr(
-                _client.status, "print_filename", STATE_UNKNOWN
-            ),
-            "time_remaining_ms": lambda _client: getattr(
-                _client.status, "print_current_layer", STATE_UNKNOWN
-            ),
-            "timelapse_url": lambda _client: getattr(
-                _client.current_task, "timelapse_url", STATE_UNKNOWN
-            ),
-            "total_layers": lambda _client: getattr(
-                _client.status, "print_total_layers", STATE_UNKNOWN
-            ),
-            "total_time_ms": lambda _client: getattr(
-                _client.status, "print_total_time", STATE_UNKNOWN
-            ),
-        },
-        available=lambda _client: (
-            _client.is_connected and hasattr(_client.status, "print_progress")
-        ),
-    ),
     SDCPDeviceSensorEntityDescription(
         key="UV LED Temperature",
         name="UV LED Temperature",
+        fields=(
+            "status.uvled_temperature",
+        ),
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
@@ -138,6 +125,10 @@ DIAGNOSTIC_SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
     SDCPDeviceSensorEntityDescription(
         key="Enclosure Temperature",
         name="Enclosure Temperature",
+        fields=(
+            "status.enclosure_temperature",
+            "status.enclosure_target_temperature",
+        ),
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
@@ -161,6 +152,11 @@ DIAGNOSTIC_SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
     SDCPDeviceSensorEntityDescription(
         key="Release Film Status",
         name="Release Film Status",
+        fields=(
+            "attributes.release_film_status",
+            "attributes.release_film_max_uses",
+            "status.release_film_use_count",
+        ),
         icon="mdi:filmstrip-box",
         entity_category=EntityCategory.DIAGNOSTIC,
         native_value=lambda _client: (
@@ -185,38 +181,279 @@ DIAGNOSTIC_SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
         ),
     ),
     SDCPDeviceSensorEntityDescription(
-        key="Print job estimated finish time",
-        name="Print job estimated finish time",
-        icon="mdi:clock-end",
+        key="Print job start time",
+        name="Print job start time",
+        fields=(
+            "status.is_printing",
+            "status.print_started_at_datetime",
+        ),
+        icon="mdi:clock-start",
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TIMESTAMP,
         native_value=lambda _client: getattr(
-            _client.status, "print_finished_at_datetime", STATE_UNKNOWN
+            _client.status, "print_started_at_datetime", STATE_UNKNOWN
         ),
         available=lambda _client: (
             _client.is_connected
             and getattr(_client.status, "is_printing", False)
-            and hasattr(_client.status, "print_finished_at_datetime")
+            and hasattr(_client.status, "print_started_at_datetime")
+        ),
+    ),
+)
+
+RUNTIME_SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
+    SDCPDeviceSensorEntityDescription(
+        key="Job progress",
+        name="Job Progress",
+        fields=(
+            "status.print_progress",
+            "status.print_current_layer",
+            "status.print_task_id",
+            "status.print_filename",
+            "status.print_total_layers",
+            "status.print_total_time",
+            "current_task.timelapse_url",
+            "runtime.eta.remaining_ms",
+        ),
+        icon="mdi:file-percent",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_value=lambda _data: (
+            0
+            if getattr(_data.client.status, "print_progress", None) is None
+            else round(_data.client.status.print_progress, 2)
+        ),
+        native_unit_of_measurement=PERCENTAGE,
+        extra_state_attributes={
+            "current_layer": lambda _data: getattr(
+                _data.client.status, "print_current_layer", STATE_UNKNOWN
+            ),
+            "current_task_id": lambda _data: getattr(
+                _data.client.status, "print_task_id", STATE_UNKNOWN
+            ),
+            "filename": lambda _data: getattr(
+                _data.client.status, "print_filename", STATE_UNKNOWN
+            ),
+            "time_remaining_ms": lambda _data: _data.eta.remaining_ms,
+            "timelapse_url": lambda _data: getattr(
+                _data.client.current_task, "timelapse_url", STATE_UNKNOWN
+            ),
+            "total_layers": lambda _data: getattr(
+                _data.client.status, "print_total_layers", STATE_UNKNOWN
+            ),
+            "total_time_ms": lambda _data: getattr(
+                _data.client.status, "print_total_time", STATE_UNKNOWN
+            ),
+        },
+        available=lambda _data: (
+            _data.client.is_connected and hasattr(_data.client.status, "print_progress")
         ),
     ),
     SDCPDeviceSensorEntityDescription(
-        key="Print job start time",
-        name="Print job start time",
-        icon="mdi:clock-start",
+        key="Print job estimated finish time",
+        name="Print job estimated finish time",
+        fields=(
+            "status.is_printing",
+            "status.print_current_layer",
+            "status.print_finished_at_datetime",
+            "runtime.eta.finish_at",
+        ),
+        icon="mdi:clock-end",
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TIMESTAMP,
-        native_value=lambda _client: getattr(
-            _client.status, "print_started_at_datetime", STATE_UNKNOWN
+        native_value=lambda _data: (
+            _data.eta.finish_at
+            or getattr(_data.client.status, "print_finished_at_datetime", None)
         ),
-        available=lambda _client: (
-            _client.is_connected
-            and getattr(_client.status, "is_printing", False)
-            and hasattr(_client.status, "print_started_at_datetime")
+        extra_state_attributes={
+            "estimated_by": lambda _data: _data.eta.source or "printer",
+            "layer_duration_s": lambda _data: (
+                None
+                if _data.eta.layer_duration is None
+                else round(_data.eta.layer_duration, 2)
+            ),
+        },
+        available=lambda _data: (
+            _data.client.is_connected
+            and getattr(_data.client.status, "is_printing", False)
+            and (
+                _data.eta.finish_at is not None
+                or hasattr(_data.client.status, "print_finished_at_datetime")
+            )
         ),
     ),
+    SDCPDeviceSensorEntityDescription(
+        key="File upload",
+        name="File upload",
+        fields=(
+            "runtime.uploader.status",
+            "runtime.uploader.offset",
+            "runtime.uploader.filename",
+        ),
+        icon="mdi:file-upload",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_value=lambda _data: _data.uploader.progress,
+        native_unit_of_measurement=PERCENTAGE,
+        extra_state_attributes={
+            "status": lambda _data: _data.uploader.status,
+            "filename": lambda _data: _data.uploader.filename,
+            "bytes_sent": lambda _data: _data.uploader.offset,
+            "total_size": lambda _data: _data.uploader.total_size,
+            "error": lambda _data: _data.uploader.error,
+        },
+        available=lambda _data: True,
+    ),
+    SDCPDeviceSensorEntityDescription(
+        key="Files",
+        name="Files",
+        fields=("runtime.files.version",),
+        icon="mdi:folder-file",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_value=lambda _data: _data.files.count("local"),
+        extra_state_attributes={
+            "usb_files": lambda _data: _data.files.count("usb"),
+        },
+        available=lambda _data: True,
+    ),
+)
+
+
+METRIC_SENSORS: tuple[SDCPDeviceSensorEntityDescription, ...] = (
+    SDCPDeviceSensorEntityDescription(
+        key="Frame rate",
+        name="Frame rate",
+        fields=("runtime.metrics.version",),
+        icon="mdi:swap-vertical",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _data: _data.metrics.frame_rate,
+        native_unit_of_measurement="frames/min",
+        extra_state_attributes={
+            "frames": lambda _data: _data.metrics.frames,
+        },
+        available=lambda _data: True,
+    ),
+    SDCPDeviceSensorEntityDescription(
+        key="Push latency",
+        name="Push latency",
+        fields=("runtime.metrics.version",),
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _data: _data.metrics.mean_ms("push"),
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        extra_state_attributes={
+            "callbacks_ms": lambda _data: _data.metrics.mean_ms("callbacks"),
+        },
+        available=lambda _data: True,
+    ),
+    SDCPDeviceSensorEntityDescription(
+        key="Command latency",
+        name="Command latency",
+        fields=("runtime.metrics.version",),
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _data: _data.metrics.mean_ms_of("command."),
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        extra_state_attributes={
+            "commands_ms": lambda _data: _data.metrics.durations_of("command."),
+        },
+        available=lambda _data: True,
+    ),
+    SDCPDeviceSensorEntityDescription(
+        key="Thumbnail load time",
+        name="Thumbnail load time",
+        fields=("runtime.metrics.version",),
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _data: _data.metrics.mean_ms("thumbnail_load"),
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        extra_state_attributes={
+            "fetch_ms": lambda _data: _data.metrics.mean_ms("thumbnail_fetch"),
+            "convert_ms": lambda _data: _data.metrics.mean_ms("thumbnail_convert"),
+        },
+        available=lambda _data: True,
+    ),
+    SDCPDeviceSensorEntityDescription(
+        key="Reconnects",
+        name="Reconnects",
+        fields=("runtime.metrics.version",),
+        icon="mdi:connection",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_value=lambda _data: _data.metrics.reconnects,
+        available=lambda _data: True,
+    ),
+)
+
+
+# aggregates of all printers, the states of the `Printer` sensors, and the
+# remaining layers and finish times of the `Job progress` sensors.
+FARM_SENSORS: tuple[SDCPFarmSensorEntityDescription, ...] = (
+    SDCPFarmSensorEntityDescription(
+        key="printing",
+        name="Printers printing",
+        icon="mdi:printer-3d-nozzle",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _farm: _farm.counts[FARM_PRINTING],
+    ),
+    SDCPFarmSensorEntityDescription(
+        key="idle",
+        name="Printers idle",
+        icon="mdi:printer-3d",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _farm: _farm.counts[FARM_IDLE],
+    ),
+    SDCPFarmSensorEntityDescription(
+        key="offline",
+        name="Printers offline",
+        icon="mdi:printer-3d-off",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _farm: _farm.counts[FARM_OFFLINE],
+    ),
+    SDCPFarmSensorEntityDescription(
+        key="next_finish",
+        name="Printers next finish time",
+        icon="mdi:clock-end",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        native_value=lambda _farm: _farm.next_finish_at,
+        extra_state_attributes={
+            "printer": lambda _farm: _farm.next_finish_printer,
+        },
+    ),
+    SDCPFarmSensorEntityDescription(
+        key="remaining_layers",
+        name="Printers remaining layers",
+        icon="mdi:layers-triple",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_value=lambda _farm: _farm.remaining_layers,
+    ),
 )
 
 
+async def async_setup_platform(
+    hass: HomeAssistant,
+    config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up the sensors aggregating all printers."""
+    if discovery_info is None:
+        return
+
+    farm = hass.data[DOMAIN][DATA_FARM]
+    async_add_entities(SDCPFarmSensor(farm, sensor) for sensor in FARM_SENSORS)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -226,27 +463,18 @@ async def async_setup_entry(
 
     assert entry.unique_id is not None
 
-    for sensor in SENSORS:
-        async_add_entities(
-            [
-                SDCPDeviceSensor(
-                    config_entry=entry,
-                    entity_description=sensor,
-                )
-            ],
-            update_before_add=True,
-        )
-
-    for sensor in DIAGNOSTIC_SENSORS:
-        async_add_entities(
-            [
-                SDCPDeviceSensor(
-                    config_entry=entry,
-                    entity_description=sensor,
-                )
-            ],
-            update_before_add=True,
-        )
+    async_add_entities(
+        [
+            *(
+                SDCPDeviceSensor(config_entry=entry, entity_description=sensor)
+                for sensor in (*SENSORS, *DIAGNOSTIC_SENSORS)
+            ),
+            *(
+                SDCPDeviceRuntimeSensor(config_entry=entry, entity_description=sensor)
+                for sensor in (*RUNTIME_SENSORS, *METRIC_SENSORS)
+            ),
+        ]
+    )
 
     """Set up Chitubox services"""
     platform = entity_platform.async_get_current_platform()
@@ -306,3 +534,10 @@ async def async_setup_entry(
         METHOD_TURN_CAMERA_ON,
         [SDCPPrinterEntityFeature.CAMERA_ON],
     )
+
+    platform.async_register_entity_service(
+        SERVICE_UPLOAD_FILE,
+        SCHEMA_UPLOAD_FILE,
+        METHOD_UPLOAD_FILE,
+        [SDCPPrinterEntityFeature.UPLOAD],
+    )
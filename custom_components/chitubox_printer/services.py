@@ -0,0 +1,234 @@
+"""Integration wide services of the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import CONF_FILENAME, CONF_PATH
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+
+from .command import SDCPCommandError
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    BULK_COMMANDS,
+    DATA_JOB_QUEUE,
+    DOMAIN,
+    SCHEMA_BULK_COMMAND,
+    SCHEMA_LIST_FILES,
+    SCHEMA_LIST_QUEUED_JOBS,
+    SCHEMA_QUERY_JOB_HISTORY,
+    SCHEMA_QUEUE_PRINT_JOB,
+    SCHEMA_REMOVE_QUEUED_JOB,
+    SERVICE_BULK_COMMAND,
+    SERVICE_LIST_FILES,
+    SERVICE_LIST_QUEUED_JOBS,
+    SERVICE_QUERY_JOB_HISTORY,
+    SERVICE_QUEUE_PRINT_JOB,
+    SERVICE_REMOVE_QUEUED_JOB,
+)
+
+
+@callback
+def async_get_entries(
+    hass: HomeAssistant, entry_ids: list[str] | None = None
+) -> list[ConfigEntry]:
+    """Return the loaded config entries, optionally limited to entry_ids."""
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+    if entry_ids is None:
+        return entries
+
+    entries = [entry for entry in entries if entry.entry_id in entry_ids]
+    if len(entries) != len(set(entry_ids)):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN, translation_key="printer_not_loaded"
+        )
+    return entries
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Set up the integration wide services."""
+
+    @callback
+    def _async_query_job_history(call: ServiceCall) -> ServiceResponse:
+        """Query the print job history of the printers."""
+        entry_ids = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        printers: dict[str, Any] = {}
+        for entry in async_get_entries(hass, entry_ids):
+            history = entry.runtime_data.history
+            jobs = history.async_query(
+                since=call.data.get("since"),
+                until=call.data.get("until"),
+                filename=call.data.get("filename"),
+                outcome=call.data.get("outcome"),
+                limit=call.data.get("limit"),
+            )
+            printers[entry.entry_id] = {
+                "name": entry.title,
+                "summary": history.summarize(jobs),
+                "jobs": jobs,
+            }
+
+        return {"printers": printers}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_JOB_HISTORY,
+        _async_query_job_history,
+        schema=vol.Schema(SCHEMA_QUERY_JOB_HISTORY),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _async_list_files(call: ServiceCall) -> ServiceResponse:
+        """List a directory on the storage of a printer."""
+        (entry,) = async_get_entries(hass, [call.data[ATTR_CONFIG_ENTRY_ID]])
+        return await entry.runtime_data.files.async_list(
+            call.data["storage"],
+            path=call.data.get(CONF_PATH),
+            offset=call.data["offset"],
+            limit=call.data["limit"],
+            refresh=call.data["refresh"],
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_LIST_FILES,
+        _async_list_files,
+        schema=vol.Schema(SCHEMA_LIST_FILES),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _async_send_command(
+        entry: ConfigEntry, call: ServiceCall
+    ) -> dict[str, Any]:
+        """Send the command of a bulk command call to a printer."""
+        command, data = BULK_COMMANDS[call.data["command"]]
+        start = time.monotonic()
+        try:
+            await entry.runtime_data.commands.async_send(
+                command, data, timeout=call.data["timeout"]
+            )
+        except SDCPCommandError as err:
+            error: str | None = str(err)
+        else:
+            error = None
+
+        return {
+            "name": entry.title,
+            "success": error is None,
+            "error": error,
+            "duration_ms": round((time.monotonic() - start) * 1000),
+        }
+
+    async def _async_bulk_command(call: ServiceCall) -> ServiceResponse:
+        """Send a command to the printers concurrently."""
+        entries = async_get_entries(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        results = await asyncio.gather(
+            *(_async_send_command(entry, call) for entry in entries)
+        )
+        printers = {
+            entry.entry_id: result
+            for entry, result in zip(entries, results, strict=True)
+        }
+        failed = [result["name"] for result in results if not result["success"]]
+
+        if failed and not call.return_response:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="bulk_command_failed",
+                translation_placeholders={
+                    "command": call.data["command"],
+                    "printers": ", ".join(failed),
+                },
+            )
+
+        return {
+            "command": call.data["command"],
+            "succeeded": len(results) - len(failed),
+            "failed": len(failed),
+            "printers": printers,
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_COMMAND,
+        _async_bulk_command,
+        schema=vol.Schema(SCHEMA_BULK_COMMAND),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    @callback
+    def _async_queue_print_job(call: ServiceCall) -> ServiceResponse:
+        """Queue a print job, for the first compatible printer turning idle."""
+        path = call.data.get(CONF_PATH)
+        if path is None and CONF_FILENAME not in call.data:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN, translation_key="file_required"
+            )
+        if path is not None and not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="path_not_allowed",
+                translation_placeholders={CONF_PATH: path},
+            )
+
+        job = hass.data[DOMAIN][DATA_JOB_QUEUE].async_queue(
+            path=path,
+            filename=call.data.get(CONF_FILENAME),
+            model=call.data.get("model"),
+            priority=call.data["priority"],
+        )
+        return {"job_id": job["id"]}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUEUE_PRINT_JOB,
+        _async_queue_print_job,
+        schema=vol.Schema(SCHEMA_QUEUE_PRINT_JOB),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    @callback
+    def _async_remove_queued_job(call: ServiceCall) -> None:
+        """Remove a job from the queue."""
+        if not hass.data[DOMAIN][DATA_JOB_QUEUE].async_remove(call.data["job_id"]):
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="job_not_removable",
+                translation_placeholders={"job_id": call.data["job_id"]},
+            )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_QUEUED_JOB,
+        _async_remove_queued_job,
+        schema=vol.Schema(SCHEMA_REMOVE_QUEUED_JOB),
+    )
+
+    @callback
+    def _async_list_queued_jobs(call: ServiceCall) -> ServiceResponse:
+        """List the queued and failed jobs."""
+        return {"jobs": hass.data[DOMAIN][DATA_JOB_QUEUE].async_list()}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_LIST_QUEUED_JOBS,
+        _async_list_queued_jobs,
+        schema=vol.Schema(SCHEMA_LIST_QUEUED_JOBS),
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -7,16 +7,24 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
 from . import SDCPDeviceSwitchEntityDescription
+from .const import SDCPCommand
 from .entity import SDCPDeviceSwitch
 
 SWITCHES: tuple[SDCPDeviceSwitchEntityDescription, ...] = (
     SDCPDeviceSwitchEntityDescription(
         key="Timelapse",
         name="Timelapse",
+        fields=(
+            "status.timelapse_enabled",
+        ),
         icon="mdi:camera-burst",
         is_on=lambda _client: _client.status.timelapse_enabled,
-        turn_on=lambda _client: _client.turn_timelapse_on(),
-        turn_off=lambda _client: _client.turn_timelapse_off(),
+        turn_on=lambda _commands: _commands.async_send(
+            SDCPCommand.TIMELAPSE, {"Enable": 1}
+        ),
+        turn_off=lambda _commands: _commands.async_send(
+            SDCPCommand.TIMELAPSE, {"Enable": 0}
+        ),
         available=lambda _client: (
             _client.is_connected and hasattr(_client.status, "timelapse_enabled")
         ),
@@ -33,8 +41,7 @@ async def async_setup_entry(
 
     assert entry.unique_id is not None
 
-    for switch in SWITCHES:
-        async_add_entities(
-            [SDCPDeviceSwitch(config_entry=entry, entity_description=switch)],
-            update_before_add=True,
-        )
+    async_add_entities(
+        SDCPDeviceSwitch(config_entry=entry, entity_description=switch)
+        for switch in SWITCHES
+    )
@@ -0,0 +1,172 @@
+"""Thumbnail cache for the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant
+from PIL import Image
+
+from .metrics import SDCPMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _convert_to_png(content: bytes) -> bytes:
+    """Convert an image to png.
+
+    Chitubox thumbnail is bitmap, which is no longer/not supported
+    by many browsers.
+    """
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(content)) as image:
+        image.save(buffer, "PNG")
+
+    return buffer.getvalue()
+
+
+class SDCPThumbnailCache:
+    """Bounded, content addressed cache of thumbnails converted to png.
+
+    Thumbnails are keyed by print task id and thumbnail url. The most
+    recently used thumbnails are kept in memory, and when a path is given
+    they are also written to disk, so they survive a restart.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, max_size: int, path: str | None = None
+    ) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.max_size = max_size
+        self.path = path
+        self._images: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: dict[str, asyncio.Future[bytes | None]] = {}
+
+    @staticmethod
+    def key(task_id: str | None, url: str) -> str:
+        """Return the cache key of a thumbnail."""
+        return hashlib.sha256(f"{task_id}|{url}".encode()).hexdigest()
+
+    async def async_get(
+        self,
+        task_id: str | None,
+        url: str,
+        fetch: Callable[[str], Awaitable[bytes | None]],
+        metrics: SDCPMetrics | None = None,
+    ) -> bytes | None:
+        """Return the png thumbnail, fetch and convert it when not cached.
+
+        Concurrent requests for the same thumbnail share a single fetch.
+        """
+        key = self.key(task_id, url)
+        if (content := self._images.get(key)) is not None:
+            self._images.move_to_end(key)
+            return content
+
+        if (pending := self._pending.get(key)) is not None:
+            return await pending
+
+        future = self.hass.loop.create_future()
+        self._pending[key] = future
+        try:
+            content = await self._async_load(key, url, fetch, metrics)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # waiters re-raise it, do not warn about a never retrieved exception
+            future.exception()
+            raise
+        else:
+            future.set_result(content)
+        finally:
+            del self._pending[key]
+
+        return content
+
+    async def _async_load(
+        self,
+        key: str,
+        url: str,
+        fetch: Callable[[str], Awaitable[bytes | None]],
+        metrics: SDCPMetrics | None = None,
+    ) -> bytes | None:
+        """Load a thumbnail from disk, or fetch and convert it."""
+        if self.path is not None:
+            content = await self.hass.async_add_executor_job(self._read, key)
+            if content is not None:
+                self._store(key, content)
+                return content
+
+        start = time.monotonic()
+        raw = await fetch(url)
+        fetched = time.monotonic()
+        if metrics is not None:
+            metrics.record("thumbnail_fetch", fetched - start)
+        if raw is None:
+            return None
+
+        try:
+            content = await self.hass.async_add_executor_job(_convert_to_png, raw)
+        except OSError as err:
+            _LOGGER.warning("Could not convert thumbnail %s: %s", url, err)
+            return None
+        if metrics is not None:
+            converted = time.monotonic()
+            metrics.record("thumbnail_convert", converted - fetched)
+            metrics.record("thumbnail_load", converted - start)
+
+        self._store(key, content)
+        if self.path is not None:
+            self.hass.async_create_background_task(
+                self._async_write(key, content), f"chitubox_printer thumbnail {key}"
+            )
+
+        return content
+
+    def _store(self, key: str, content: bytes) -> None:
+        """Store a thumbnail in memory, evict the least recently used."""
+        self._images[key] = content
+        self._images.move_to_end(key)
+        while len(self._images) > self.max_size:
+            self._images.popitem(last=False)
+
+    def _read(self, key: str) -> bytes | None:
+        """Read a thumbnail from disk."""
+        try:
+            with open(os.path.join(self.path, f"{key}.png"), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    async def _async_write(self, key: str, content: bytes) -> None:
+        """Write a thumbnail to disk, log a failure."""
+        try:
+            await self.hass.async_add_executor_job(self._write, key, content)
+        except OSError as err:
+            _LOGGER.warning("Could not write thumbnail %s to disk: %s", key, err)
+
+    def _write(self, key: str, content: bytes) -> None:
+        """Write a thumbnail to disk, remove the oldest beyond max_size."""
+        os.makedirs(self.path, exist_ok=True)
+        filename = os.path.join(self.path, f"{key}.png")
+        with open(f"{filename}.tmp", "wb") as file:
+            file.write(content)
+        os.replace(f"{filename}.tmp", filename)
+
+        with os.scandir(self.path) as entries:
+            files = sorted(
+                (entry for entry in entries if entry.name.endswith(".png")),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+        for entry in files[: max(0, len(files) - self.max_size)]:
+            os.remove(entry.path)
@@ -0,0 +1,210 @@
+"""Archive the timelapses of finished print jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+from collections.abc import Iterable
+from typing import IO, Any
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import (
+    CONF_TIMELAPSE_DIRECTORY,
+    DOMAIN,
+    TIMELAPSE_CHUNK_SIZE,
+    TIMELAPSE_CONCURRENCY,
+    TIMELAPSE_RETRIES,
+    TIMELAPSE_RETRY_DELAY,
+    TIMELAPSE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-\d+|\*)/(\d+)")
+
+
+class SDCPTimelapseError(Exception):
+    """A timelapse could not be downloaded completely."""
+
+
+def _open_part(path: str, offset: int) -> IO[bytes]:
+    """Open a partial download, to append at offset."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file = open(path, "ab" if offset else "wb")
+    file.truncate(offset)
+    return file
+
+
+def _remove(path: str) -> None:
+    """Remove a file, if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _size(path: str) -> int:
+    """Return the size of a file, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+class SDCPTimelapseArchiver:
+    """Download the timelapses of finished print jobs, for all printers.
+
+    Timelapses are streamed to disk in fixed size chunks, so memory use does
+    not depend on their size, and written in the executor. A download is kept
+    as a `.part` file until its size matches the size announced by the
+    printer, and resumed with a range request after a failure. Downloads of
+    all printers share TIMELAPSE_CONCURRENCY slots, so a batch of finished
+    prints does not saturate the printers' Wi-Fi.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize"""
+        self.hass = hass
+        self._semaphore = asyncio.Semaphore(TIMELAPSE_CONCURRENCY)
+        self._downloads: set[str] = set()
+
+    def path(self, config_entry: ConfigEntry, job: dict[str, Any]) -> str | None:
+        """Return the path a job's timelapse is archived to, if archiving."""
+        directory = config_entry.options.get(CONF_TIMELAPSE_DIRECTORY)
+        if not directory:
+            return None
+
+        begin = dt_util.as_local(dt_util.utc_from_timestamp(job["begin"]))
+        name = os.path.splitext(os.path.basename(job["filename"]))[0]
+        extension = os.path.splitext(job["timelapse_url"])[1] or ".mp4"
+        return os.path.join(
+            self.hass.config.path(directory),
+            slugify(config_entry.title),
+            f"{begin:%Y%m%d-%H%M%S}_{slugify(name) or job['task_id']}{extension}",
+        )
+
+    @callback
+    def async_schedule(
+        self, config_entry: ConfigEntry, jobs: Iterable[dict[str, Any]]
+    ) -> None:
+        """Archive the timelapses of finished jobs in the background."""
+        for job in jobs:
+            if not job.get("timelapse_url") or job["task_id"] in self._downloads:
+                continue
+            if (path := self.path(config_entry, job)) is None:
+                return
+
+            self._downloads.add(job["task_id"])
+            config_entry.async_create_background_task(
+                self.hass,
+                self._async_archive(job, path),
+                f"{DOMAIN} timelapse {job['task_id']}",
+            )
+
+    async def _async_archive(self, job: dict[str, Any], path: str) -> None:
+        """Download a timelapse, resume after a failure."""
+        url = job["timelapse_url"]
+        if "://" not in url:
+            url = f"http://{url}"
+
+        try:
+            async with self._semaphore:
+                if await self.hass.async_add_executor_job(os.path.exists, path):
+                    return
+
+                retries = 0
+                while True:
+                    try:
+                        await self._async_download(url, f"{path}.part")
+                        break
+                    except (
+                        aiohttp.ClientError,
+                        TimeoutError,
+                        SDCPTimelapseError,
+                    ) as err:
+                        retries += 1
+                        if retries > TIMELAPSE_RETRIES:
+                            _LOGGER.error(
+                                "Could not archive the timelapse of %s: %s",
+                                job["filename"],
+                                err,
+                            )
+                            return
+                        _LOGGER.debug(
+                            "Resuming the timelapse of %s after: %s",
+                            job["filename"],
+                            err,
+                        )
+                        await asyncio.sleep(TIMELAPSE_RETRY_DELAY * retries)
+
+                await self.hass.async_add_executor_job(
+                    os.replace, f"{path}.part", path
+                )
+                _LOGGER.debug("Archived the timelapse of %s", job["filename"])
+        except OSError as err:
+            _LOGGER.error(
+                "Could not archive the timelapse of %s: %s", job["filename"], err
+            )
+        finally:
+            self._downloads.discard(job["task_id"])
+
+    async def _async_download(self, url: str, path: str) -> None:
+        """Download (the rest of) a file to path, verify its size."""
+        offset = await self.hass.async_add_executor_job(_size, path)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        session = async_get_clientsession(self.hass)
+        async with session.get(
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=TIMELAPSE_TIMEOUT),
+        ) as response:
+            match = _CONTENT_RANGE.fullmatch(
+                response.headers.get(aiohttp.hdrs.CONTENT_RANGE, "")
+            )
+            if response.status == 416:
+                if match is None:
+                    # the size of the file is unknown, so is what was received
+                    await self.hass.async_add_executor_job(_remove, path)
+                    raise SDCPTimelapseError(
+                        f"Could not resume at {offset} bytes, starting over"
+                    )
+                # nothing left to download, the size is verified below
+                total = int(match.group(2))
+            else:
+                response.raise_for_status()
+                if response.status != 206:
+                    # the printer ignored the range, start over
+                    offset = 0
+                if match and match.group(1) is not None:
+                    offset = int(match.group(1))
+                    total = int(match.group(2))
+                elif response.content_length is not None:
+                    total = offset + response.content_length
+                else:
+                    total = None
+
+                file = await self.hass.async_add_executor_job(_open_part, path, offset)
+                try:
+                    async for chunk in response.content.iter_chunked(
+                        TIMELAPSE_CHUNK_SIZE
+                    ):
+                        await self.hass.async_add_executor_job(file.write, chunk)
+                finally:
+                    await self.hass.async_add_executor_job(file.close)
+
+        size = await self.hass.async_add_executor_job(_size, path)
+        if total is not None and size != total:
+            if size > total:
+                # not the same file, start over
+                await self.hass.async_add_executor_job(_remove, path)
+            raise SDCPTimelapseError(f"Received {size} of {total} bytes")
+        if size == 0:
+            raise SDCPTimelapseError("Received an empty file")
@@ -0,0 +1,134 @@
+"""Time series of a printer's status frames."""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import callback
+
+from .client import SDCPDeviceClient
+from .const import TIMESERIES_SIZE
+
+NO_LAYER = -1
+
+
+class SDCPTimeSeries:
+    """Bounded, in-memory time series of a printer's status frames.
+
+    Every status frame is recorded as a sample holding its timestamp, the
+    current layer and the temperatures. Samples are stored column wise in
+    preallocated arrays used as a ring buffer, so memory use is fixed at
+    about 20 bytes per sample, and the oldest samples are overwritten once
+    the buffer is full.
+
+    Samples are recorded on the client's websocket thread, so the buffer is
+    guarded by a lock.
+    """
+
+    def __init__(self, size: int = TIMESERIES_SIZE) -> None:
+        """Initialize"""
+        self.size = size
+        self._timestamps = array("d", bytes(8 * size))
+        self._layers = array("i", bytes(4 * size))
+        self._uvled_temperatures = array("f", bytes(4 * size))
+        self._enclosure_temperatures = array("f", bytes(4 * size))
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._client: SDCPDeviceClient | None = None
+        self._unsub_client: Callable[[], None] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of samples."""
+        return self._count
+
+    @callback
+    def async_attach(self, client: SDCPDeviceClient | None) -> None:
+        """Record the status frames received by a (new) client."""
+        if self._unsub_client is not None:
+            self._unsub_client()
+            self._unsub_client = None
+
+        self._client = client
+        if client is not None:
+            self._unsub_client = client.add_frame_listener(self._frame_received)
+
+    def _frame_received(self, topic: str, frame: str | bytes) -> None:
+        """Record a status frame, on the client's websocket thread."""
+        if topic != "status" or self._client is None:
+            return
+
+        status = self._client.status
+        layer = getattr(status, "print_current_layer", None)
+        self.append(
+            time.time(),
+            NO_LAYER if layer is None else layer,
+            getattr(status, "uvled_temperature", None),
+            getattr(status, "enclosure_temperature", None),
+        )
+
+    def append(
+        self,
+        timestamp: float,
+        layer: int,
+        uvled_temperature: float | None,
+        enclosure_temperature: float | None,
+    ) -> None:
+        """Add a sample, overwrite the oldest one when the buffer is full."""
+        with self._lock:
+            index = self._next
+            self._timestamps[index] = timestamp
+            self._layers[index] = layer
+            self._uvled_temperatures[index] = (
+                math.nan if uvled_temperature is None else uvled_temperature
+            )
+            self._enclosure_temperatures[index] = (
+                math.nan if enclosure_temperature is None else enclosure_temperature
+            )
+            self._next = (index + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+
+    @staticmethod
+    def _ordered(values: array, start: int, count: int) -> list:
+        """Return the values of a column, oldest first."""
+        if count < len(values):
+            return values[:count].tolist()
+
+        return values[start:].tolist() + values[:start].tolist()
+
+    def samples(self, since: float | None = None) -> dict[str, Any]:
+        """Return the samples recorded at or after since, column wise.
+
+        Missing temperatures and layers are returned as None.
+        """
+        with self._lock:
+            start, count = self._next, self._count
+            timestamps = self._ordered(self._timestamps, start, count)
+            layers = self._ordered(self._layers, start, count)
+            uvled_temperatures = self._ordered(self._uvled_temperatures, start, count)
+            enclosure_temperatures = self._ordered(
+                self._enclosure_temperatures, start, count
+            )
+
+        first = 0 if since is None else bisect.bisect_left(timestamps, since)
+        return {
+            "size": self.size,
+            "timestamp": timestamps[first:],
+            "layer": [
+                None if layer == NO_LAYER else layer for layer in layers[first:]
+            ],
+            "uvled_temperature": [
+                None if math.isnan(value) else round(value, 2)
+                for value in uvled_temperatures[first:]
+            ],
+            "enclosure_temperature": [
+                None if math.isnan(value) else round(value, 2)
+                for value in enclosure_temperatures[first:]
+            ],
+        }
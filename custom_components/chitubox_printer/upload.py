@@ -0,0 +1,220 @@
+"""Chunked, resumable file upload to a printer."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from enum import StrEnum
+from typing import IO
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .command import SDCPCommandError
+from .const import (
+    SDCP_HTTP_PORT,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_RETRIES,
+    UPLOAD_RETRY_DELAY,
+    UPLOAD_TIMEOUT,
+    SDCPCommand,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SDCPUploadError(Exception):
+    """The printer refused an upload."""
+
+
+class SDCPUploadStatus(StrEnum):
+    """Status of an upload."""
+
+    IDLE = "idle"
+    HASHING = "hashing"
+    UPLOADING = "uploading"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+def _md5(path: str) -> str:
+    """Return the md5 digest of a file, read in chunks."""
+    digest = hashlib.md5()
+    with open(path, "rb") as file:
+        while chunk := file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _read_chunk(file: IO[bytes], offset: int) -> bytes:
+    """Read the chunk of a file starting at offset."""
+    file.seek(offset)
+    return file.read(UPLOAD_CHUNK_SIZE)
+
+
+class SDCPFileUploader:
+    """Upload files to a printer.
+
+    Files are streamed from disk in fixed size chunks, so memory use does not
+    depend on the size of the file. Every chunk carries the md5 digest of the
+    file, which the printer verifies once it received the last chunk. After a
+    failure, the upload resumes from the last offset the printer
+    acknowledged.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        url: str | None = None,
+    ) -> None:
+        """Initialize"""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.url = url or (
+            f"http://{config_entry.data[CONF_HOST]}:{SDCP_HTTP_PORT}"
+            "/uploadFile/upload"
+        )
+        self.status = SDCPUploadStatus.IDLE
+        self.filename: str | None = None
+        self.offset = 0
+        self.total_size = 0
+        self.error: str | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def progress(self) -> float:
+        """Return the progress of the upload in percent."""
+        if self.total_size == 0:
+            return 0
+
+        return round(self.offset / self.total_size * 100, 2)
+
+    @callback
+    def _async_update(self) -> None:
+        """Notify the entities of the upload's progress."""
+        self.config_entry.runtime_data.coordinator.async_push()
+
+    async def async_upload(
+        self,
+        path: str,
+        filename: str | None = None,
+        start_print: bool = False,
+        start_layer: int = 0,
+    ) -> None:
+        """Upload a file to the printer, and optionally print it."""
+        async with self._lock:
+            self.filename = filename or os.path.basename(path)
+            self.offset = 0
+            self.error = None
+            self.status = SDCPUploadStatus.HASHING
+            self._async_update()
+            try:
+                self.total_size = await self.hass.async_add_executor_job(
+                    os.path.getsize, path
+                )
+                md5 = await self.hass.async_add_executor_job(_md5, path)
+                self.status = SDCPUploadStatus.UPLOADING
+                self._async_update()
+                await self._async_upload(path, md5)
+            except (OSError, SDCPUploadError) as err:
+                self.status = SDCPUploadStatus.FAILED
+                self.error = str(err)
+                self._async_update()
+                _LOGGER.error("Could not upload %s: %s", path, err)
+                return
+
+            self.status = SDCPUploadStatus.COMPLETED
+            self.config_entry.runtime_data.files.async_invalidate("local")
+            self._async_update()
+
+        if start_print:
+            try:
+                await self.config_entry.runtime_data.commands.async_send(
+                    SDCPCommand.START_PRINT,
+                    {
+                        "Filename": f"/local/{self.filename}",
+                        "StartLayer": start_layer,
+                    },
+                )
+            except SDCPCommandError as err:
+                _LOGGER.error("Could not print %s: %s", self.filename, err)
+
+    async def _async_upload(self, path: str, md5: str) -> None:
+        """Send the chunks of a file, resume after a failure."""
+        session = async_get_clientsession(self.hass)
+        upload_id = uuid.uuid4().hex
+        file = await self.hass.async_add_executor_job(open, path, "rb")
+        try:
+            retries = 0
+            while self.offset < self.total_size or self.total_size == 0:
+                chunk = await self.hass.async_add_executor_job(
+                    _read_chunk, file, self.offset
+                )
+                try:
+                    await self._async_send_chunk(session, upload_id, md5, chunk)
+                except (aiohttp.ClientError, TimeoutError) as err:
+                    retries += 1
+                    if retries > UPLOAD_RETRIES:
+                        raise SDCPUploadError(str(err)) from err
+                    _LOGGER.debug(
+                        "Resuming upload of %s at %s after: %s",
+                        self.filename,
+                        self.offset,
+                        err,
+                    )
+                    await asyncio.sleep(UPLOAD_RETRY_DELAY * retries)
+                    continue
+
+                retries = 0
+                self.offset += len(chunk)
+                self._async_update()
+                if not chunk:
+                    break
+        finally:
+            await self.hass.async_add_executor_job(file.close)
+
+    async def _async_send_chunk(
+        self,
+        session: aiohttp.ClientSession,
+        upload_id: str,
+        md5: str,
+        chunk: bytes,
+    ) -> None:
+        """Send a single chunk, at the current offset."""
+        form = aiohttp.FormData()
+        form.add_field("S-File-MD5", md5)
+        form.add_field("Check", "1")
+        form.add_field("Offset", str(self.offset))
+        form.add_field("Uuid", upload_id)
+        form.add_field("TotalSize", str(self.total_size))
+        form.add_field(
+            "File",
+            chunk,
+            filename=self.filename,
+            content_type="application/octet-stream",
+        )
+        async with session.post(
+            self.url, data=form, timeout=aiohttp.ClientTimeout(total=UPLOAD_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            try:
+                result = await response.json(content_type=None)
+            except ValueError as err:
+                raise SDCPUploadError(
+                    f"Chunk at {self.offset} not acknowledged: {err}"
+                ) from err
+
+        if not isinstance(result, dict):
+            raise SDCPUploadError(f"Chunk at {self.offset} not acknowledged: {result}")
+        if not result.get("success", False):
+            raise SDCPUploadError(
+                f"Chunk at {self.offset} refused: {result.get('messages')}"
+            )
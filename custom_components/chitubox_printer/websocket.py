@@ -0,0 +1,135 @@
+"""Websocket API of the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.const import CONF_PATH
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .command import SDCPCommandError
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    DOMAIN,
+    SCHEMA_LIST_FILES,
+    SCHEMA_QUERY_JOB_HISTORY,
+)
+from .services import async_get_entries
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Set up the websocket API."""
+    websocket_api.async_register_command(hass, websocket_list_history)
+    websocket_api.async_register_command(hass, websocket_list_files)
+    websocket_api.async_register_command(hass, websocket_get_timeseries)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/history/list",
+        vol.Required("entry_id"): str,
+        **{
+            key: value
+            for key, value in SCHEMA_QUERY_JOB_HISTORY.items()
+            if key != ATTR_CONFIG_ENTRY_ID
+        },
+    }
+)
+@callback
+def websocket_list_history(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """List the print job history of a printer."""
+    try:
+        (entry,) = async_get_entries(hass, [msg["entry_id"]])
+    except ServiceValidationError:
+        connection.send_error(msg["id"], "not_found", "Printer not loaded")
+        return
+
+    history = entry.runtime_data.history
+    jobs = history.async_query(
+        since=msg.get("since"),
+        until=msg.get("until"),
+        filename=msg.get("filename"),
+        outcome=msg.get("outcome"),
+        limit=msg.get("limit"),
+    )
+    connection.send_result(
+        msg["id"], {"summary": history.summarize(jobs), "jobs": jobs}
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/files/list",
+        vol.Required("entry_id"): str,
+        **{
+            key: value
+            for key, value in SCHEMA_LIST_FILES.items()
+            if key != ATTR_CONFIG_ENTRY_ID
+        },
+    }
+)
+@websocket_api.async_response
+async def websocket_list_files(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """List a directory on the storage of a printer."""
+    try:
+        (entry,) = async_get_entries(hass, [msg["entry_id"]])
+    except ServiceValidationError:
+        connection.send_error(msg["id"], "not_found", "Printer not loaded")
+        return
+
+    try:
+        result = await entry.runtime_data.files.async_list(
+            msg["storage"],
+            path=msg.get(CONF_PATH),
+            offset=msg["offset"],
+            limit=msg["limit"],
+            refresh=msg["refresh"],
+        )
+    except SDCPCommandError as err:
+        connection.send_error(msg["id"], "command_failed", str(err))
+        return
+
+    connection.send_result(msg["id"], result)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/timeseries/get",
+        vol.Required("entry_id"): str,
+        vol.Optional("since"): cv.datetime,
+    }
+)
+@callback
+def websocket_get_timeseries(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the time series of a printer's status frames."""
+    try:
+        (entry,) = async_get_entries(hass, [msg["entry_id"]])
+    except ServiceValidationError:
+        connection.send_error(msg["id"], "not_found", "Printer not loaded")
+        return
+
+    since = msg.get("since")
+    connection.send_result(
+        msg["id"],
+        entry.runtime_data.timeseries.samples(
+            None if since is None else dt_util.as_timestamp(since)
+        ),
+    )
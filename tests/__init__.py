@@ -0,0 +1 @@
+"""Tests for the ChituBox Printer integration."""
@@ -0,0 +1,189 @@
+"""Tests for the shared camera stream of a printer."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Callable
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer import camera_proxy
+from custom_components.chitubox_printer.camera_proxy import SDCPCameraProxy
+from custom_components.chitubox_printer.const import DOMAIN
+
+LINGER = 0.05
+
+
+def _jpeg(payload: bytes) -> bytes:
+    """Return a jpeg frame, as written by ffmpeg."""
+    return b"\xff\xd8" + payload + b"\xff\xd9"
+
+
+class Reader:
+    """Stream reader double, returning one chunk per read."""
+
+    def __init__(self, *chunks: bytes) -> None:
+        """Initialize"""
+        self.chunks = list(chunks)
+
+    async def read(self, size: int) -> bytes:
+        """Return the next chunk, or nothing at the end of the stream."""
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class Printer:
+    """Printer double, opening and closing its video stream."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.opened = 0
+        self.closed = 0
+        self.decoded: list[str] = []
+
+    async def async_get_url(self) -> str:
+        """Open the video stream."""
+        self.opened += 1
+        return "rtsp://printer/video"
+
+    async def async_stop(self) -> None:
+        """Close the video stream."""
+        self.closed += 1
+
+
+async def _async_wait_for(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds."""
+    async with asyncio.timeout(1):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def printer() -> Printer:
+    """Return the printer."""
+    return Printer()
+
+
+@pytest.fixture
+async def proxy(
+    hass: HomeAssistant, printer: Printer
+) -> AsyncIterator[SDCPCameraProxy]:
+    """Return the camera proxy, decoding frames until it is closed."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    proxy = SDCPCameraProxy(hass, entry, printer.async_get_url, printer.async_stop)
+
+    async def _async_decode(url: str) -> None:
+        printer.decoded.append(url)
+        frame = 0
+        while True:
+            frame += 1
+            proxy._async_publish(_jpeg(b"%d" % frame))
+            await asyncio.sleep(0.01)
+
+    with (
+        patch.object(proxy, "_async_decode", _async_decode),
+        patch.object(camera_proxy, "CAMERA_LINGER", LINGER),
+    ):
+        yield proxy
+        proxy.async_close()
+        await asyncio.sleep(0)
+
+
+async def test_frames_split_across_reads(
+    hass: HomeAssistant, printer: Printer
+) -> None:
+    """Frames are split from the stream, wherever the reads end."""
+    proxy = SDCPCameraProxy(
+        hass, MockConfigEntry(domain=DOMAIN), printer.async_get_url
+    )
+    published = []
+    proxy._async_publish = published.append
+    first, second, third = _jpeg(b"first"), _jpeg(b"second"), _jpeg(b"third")
+
+    await proxy._async_read_frames(
+        Reader(
+            b"garbage" + first[:3],
+            first[3:-1],
+            # the end marker split across reads
+            first[-1:] + b"\xff\xd9" + second + b"noise",
+            third,
+        )
+    )
+
+    assert published == [first, second, third]
+
+
+async def test_oversized_frame_is_dropped(
+    hass: HomeAssistant, printer: Printer
+) -> None:
+    """A frame which never ends does not grow the buffer without bounds."""
+    proxy = SDCPCameraProxy(
+        hass, MockConfigEntry(domain=DOMAIN), printer.async_get_url
+    )
+    published = []
+    proxy._async_publish = published.append
+    frame = _jpeg(b"frame")
+
+    with patch.object(camera_proxy, "CAMERA_MAX_FRAME_SIZE", 64):
+        await proxy._async_read_frames(
+            Reader(
+                b"\xff\xd8" + b"x" * 40, b"x" * 40, b"x" * 10 + b"\xff\xd9", frame
+            )
+        )
+
+    assert published == [frame]
+
+
+async def test_viewers_share_one_upstream(
+    proxy: SDCPCameraProxy, printer: Printer
+) -> None:
+    """All viewers and snapshots are served from a single upstream."""
+    viewers = [proxy.async_frames() for _ in range(3)]
+    frames = await asyncio.gather(
+        *(anext(viewer) for viewer in viewers),
+        *(proxy.async_snapshot() for _ in range(2)),
+    )
+
+    assert all(frame.startswith(b"\xff\xd8") for frame in frames)
+    assert printer.opened == 1
+    assert len(printer.decoded) == 1
+    assert proxy.viewers == 3
+
+    # the following frames are handed over to every viewer
+    frames = await asyncio.gather(*(anext(viewer) for viewer in viewers))
+    assert frames == [frames[0]] * 3
+    assert printer.opened == 1
+
+    for viewer in viewers:
+        await viewer.aclose()
+    assert proxy.viewers == 0
+
+
+async def test_upstream_lingers_after_the_last_viewer(
+    proxy: SDCPCameraProxy, printer: Printer
+) -> None:
+    """The upstream closes CAMERA_LINGER after the last viewer left."""
+    async with contextlib.aclosing(proxy.async_frames()) as viewer:
+        await anext(viewer)
+    assert proxy.is_streaming
+
+    # a viewer coming back in time keeps the upstream open
+    await asyncio.sleep(LINGER / 2)
+    async with contextlib.aclosing(proxy.async_frames()) as viewer:
+        await anext(viewer)
+    await asyncio.sleep(LINGER / 2 + 0.01)
+    assert proxy.is_streaming
+    assert printer.closed == 0
+
+    await _async_wait_for(lambda: not proxy.is_streaming)
+    await _async_wait_for(lambda: printer.closed == 1)
+    assert printer.opened == 1
+
+    # the next viewer opens the stream of the printer again
+    async with contextlib.aclosing(proxy.async_frames()) as viewer:
+        await anext(viewer)
+    assert printer.opened == 2
@@ -0,0 +1,193 @@
+"""Tests for the SDCP command pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.chitubox_printer.command import (
+    SDCPCommandError,
+    SDCPCommandPipeline,
+)
+from custom_components.chitubox_printer.const import SDCPCommand
+
+MAINBOARD_ID = "MB1"
+
+
+class FrameClient:
+    """Client double, keeping the frames sent and answering them on demand."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.sent: list[dict[str, Any]] = []
+        self.listeners: list[Callable[[str, str], None]] = []
+        self.error: Exception | None = None
+
+    def add_frame_listener(
+        self, listener: Callable[[str, str], None]
+    ) -> Callable[[], None]:
+        """Register a frame listener."""
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener)
+
+    def send_frame(self, frame: str) -> None:
+        """Send a frame, on an executor thread."""
+        if self.error is not None:
+            raise self.error
+        self.sent.append(json.loads(frame))
+
+    def respond(self, request: dict[str, Any], **data: Any) -> None:
+        """Answer a request, as the websocket thread does."""
+        response = json.dumps(
+            {
+                "Topic": f"sdcp/response/{MAINBOARD_ID}",
+                "Data": {
+                    "Cmd": request["Data"]["Cmd"],
+                    "RequestID": request["Data"]["RequestID"],
+                    "MainboardID": MAINBOARD_ID,
+                    "Data": data,
+                },
+            }
+        )
+        for listener in tuple(self.listeners):
+            listener("response", response)
+
+
+class Metrics:
+    """Metrics double, keeping the durations recorded."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.durations: dict[str, float] = {}
+
+    def record(self, name: str, duration: float) -> None:
+        """Record a duration."""
+        self.durations[name] = duration
+
+
+async def _async_wait_for(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds."""
+    async with asyncio.timeout(1):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def client() -> FrameClient:
+    """Return the client of the printer."""
+    return FrameClient()
+
+
+@pytest.fixture
+def metrics() -> Metrics:
+    """Return the metrics of the printer."""
+    return Metrics()
+
+
+@pytest.fixture
+def pipeline(
+    hass: HomeAssistant, client: FrameClient, metrics: Metrics
+) -> SDCPCommandPipeline:
+    """Return the command pipeline of a connected printer."""
+    pipeline = SDCPCommandPipeline(hass, MAINBOARD_ID, metrics)
+    pipeline.async_attach(client)
+    return pipeline
+
+
+async def test_responses_are_correlated_by_request_id(
+    pipeline: SDCPCommandPipeline, client: FrameClient, metrics: Metrics
+) -> None:
+    """Responses arriving out of order are handed to their own request."""
+    status = asyncio.ensure_future(pipeline.async_send(SDCPCommand.STATUS_REFRESH))
+    files = asyncio.ensure_future(
+        pipeline.async_send(SDCPCommand.FILE_LIST, {"Url": "/local"})
+    )
+    await _async_wait_for(lambda: len(client.sent) == 2)
+    status_request, files_request = sorted(
+        client.sent, key=lambda frame: frame["Data"]["Cmd"]
+    )
+    assert files_request["Data"]["Data"] == {"Url": "/local"}
+    assert files_request["Data"]["MainboardID"] == MAINBOARD_ID
+    assert files_request["Topic"] == f"sdcp/request/{MAINBOARD_ID}"
+
+    client.respond(files_request, Ack=0, FileList=[])
+    client.respond(status_request, Ack=0)
+
+    assert await status == {"Ack": 0}
+    assert await files == {"Ack": 0, "FileList": []}
+    assert pipeline._pending == {}
+    assert "command.file_list" in metrics.durations
+
+
+async def test_refused_command(
+    pipeline: SDCPCommandPipeline, client: FrameClient
+) -> None:
+    """A command the printer did not acknowledge raises an error."""
+    request = asyncio.ensure_future(pipeline.async_send(SDCPCommand.STOP_PRINT))
+    await _async_wait_for(lambda: client.sent != [])
+    client.respond(client.sent[0], Ack=1)
+
+    with pytest.raises(SDCPCommandError, match="refused"):
+        await request
+    assert pipeline._pending == {}
+
+
+async def test_invalid_responses_are_ignored(
+    pipeline: SDCPCommandPipeline, client: FrameClient
+) -> None:
+    """Invalid and unknown responses do not resolve a request."""
+    request = asyncio.ensure_future(pipeline.async_send(SDCPCommand.STATUS_REFRESH))
+    await _async_wait_for(lambda: client.sent != [])
+    for listener in client.listeners:
+        listener("response", "not json")
+        listener("response", json.dumps({"Data": {}}))
+    client.respond({"Data": {"Cmd": 0, "RequestID": "unknown"}}, Ack=0)
+    await asyncio.sleep(0.01)
+    assert not request.done()
+
+    client.respond(client.sent[0], Ack=0)
+    assert await request == {"Ack": 0}
+
+
+async def test_command_timeout(
+    pipeline: SDCPCommandPipeline, client: FrameClient
+) -> None:
+    """A command without response times out, and is forgotten."""
+    with pytest.raises(SDCPCommandError, match="not acknowledged in time"):
+        await pipeline.async_send(SDCPCommand.STATUS_REFRESH, timeout=0.05)
+
+    assert len(client.sent) == 1
+    assert pipeline._pending == {}
+
+
+async def test_commands_in_flight_fail_on_disconnection(
+    pipeline: SDCPCommandPipeline, client: FrameClient
+) -> None:
+    """Commands sent through a client which went away fail."""
+    request = asyncio.ensure_future(pipeline.async_send(SDCPCommand.STATUS_REFRESH))
+    await _async_wait_for(lambda: client.sent != [])
+
+    pipeline.async_attach(None)
+
+    with pytest.raises(SDCPCommandError, match="disconnected"):
+        await request
+    assert pipeline._pending == {}
+    assert client.listeners == []
+    with pytest.raises(SDCPCommandError, match="not connected"):
+        await pipeline.async_send(SDCPCommand.STATUS_REFRESH)
+
+
+async def test_send_failure(
+    pipeline: SDCPCommandPipeline, client: FrameClient
+) -> None:
+    """A frame which could not be sent raises a command error."""
+    client.error = OSError("broken pipe")
+
+    with pytest.raises(SDCPCommandError, match="broken pipe"):
+        await pipeline.async_send(SDCPCommand.STATUS_REFRESH)
+    assert pipeline._pending == {}
@@ -0,0 +1,164 @@
+"""Tests for the config flow of the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY, SOURCE_USER
+from homeassistant.const import CONF_HOST, CONF_ID, CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer import async_migrate_entry
+from custom_components.chitubox_printer.const import (
+    CONF_BRAND,
+    CONF_MACHINE_BRAND_ID,
+    CONF_MAINBOARD_ID,
+    CONF_MODEL,
+    DOMAIN,
+)
+from custom_components.chitubox_printer.discovery import SDCPDiscoveredPrinter
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Load the integration from custom_components."""
+
+
+def _entry(host: str, unique_id: str = "MB1", minor_version: int = 1):
+    """Return the config entry of a printer."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title="Saturn",
+        unique_id=unique_id,
+        version=2,
+        minor_version=minor_version,
+        data={
+            CONF_NAME: "Saturn",
+            CONF_HOST: host,
+            CONF_ID: "192_168_1_10",
+            CONF_MACHINE_BRAND_ID: "0",
+            CONF_MAINBOARD_ID: "MB1",
+            CONF_MODEL: "Saturn 4 Ultra 16k",
+            CONF_BRAND: "ELEGOO",
+        },
+    )
+
+
+async def _async_discover(hass: HomeAssistant, host: str, mainboard_id: str = "MB1"):
+    """Start the flow of a printer discovered at host."""
+    return await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": SOURCE_INTEGRATION_DISCOVERY},
+        data={
+            CONF_HOST: host,
+            CONF_NAME: "Saturn",
+            CONF_MAINBOARD_ID: mainboard_id,
+            CONF_MODEL: "Saturn 4 Ultra 16k",
+            CONF_BRAND: "ELEGOO",
+        },
+    )
+
+
+async def test_discovery_updates_the_ip_address(hass: HomeAssistant) -> None:
+    """A printer configured by ip address follows its new address."""
+    entry = _entry("192.168.1.10")
+    entry.add_to_hass(hass)
+
+    result = await _async_discover(hass, "192.168.1.20")
+
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    assert entry.data[CONF_HOST] == "192.168.1.20"
+
+
+async def test_discovery_keeps_a_hostname(hass: HomeAssistant) -> None:
+    """A printer configured by hostname keeps its hostname."""
+    entry = _entry("saturn.local")
+    entry.add_to_hass(hass)
+
+    result = await _async_discover(hass, "192.168.1.20")
+
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    assert entry.data[CONF_HOST] == "saturn.local"
+
+
+async def test_discovery_of_a_new_printer(hass: HomeAssistant) -> None:
+    """A new printer is confirmed by the user, identified by its mainboard id."""
+    _entry("192.168.1.10").add_to_hass(hass)
+
+    result = await _async_discover(hass, "192.168.1.11", mainboard_id="MB2")
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "discovery_confirm"
+    flow = hass.config_entries.flow.async_get(result["flow_id"])
+    assert flow["context"]["unique_id"] == "MB2"
+
+
+async def test_user_picks_a_discovered_printer(hass: HomeAssistant) -> None:
+    """The user step offers the printers which are not configured yet."""
+    _entry("192.168.1.10").add_to_hass(hass)
+    printers = [
+        SDCPDiscoveredPrinter(mainboard_id="MB1", host="192.168.1.10", name="A"),
+        SDCPDiscoveredPrinter(mainboard_id="MB2", host="192.168.1.11", name="B"),
+    ]
+    with patch(
+        "custom_components.chitubox_printer.config_flow.async_discover_printers",
+        return_value=printers,
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": SOURCE_USER}
+        )
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "pick_printer"
+    schema = result["data_schema"].schema
+    assert list(schema[next(iter(schema))].container) == ["MB2"]
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_MAINBOARD_ID: "MB2"}
+    )
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "discovery_confirm"
+    assert result["description_placeholders"] == {CONF_HOST: "192.168.1.11"}
+
+
+async def test_user_enters_a_host(hass: HomeAssistant) -> None:
+    """Without a discovered printer, the user enters a host."""
+    with patch(
+        "custom_components.chitubox_printer.config_flow.async_discover_printers",
+        return_value=[],
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": SOURCE_USER}
+        )
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "user"
+
+
+async def test_migrate_to_the_mainboard_id(hass: HomeAssistant) -> None:
+    """Printers identified by their host are migrated to their mainboard id."""
+    entry = _entry("192.168.1.10", unique_id="192_168_1_10", minor_version=0)
+    entry.add_to_hass(hass)
+    entity_registry = er.async_get(hass)
+    entity = entity_registry.async_get_or_create(
+        "sensor", DOMAIN, "Status-192_168_1_10", config_entry=entry
+    )
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id, identifiers={(DOMAIN, "192_168_1_10")}
+    )
+
+    assert await async_migrate_entry(hass, entry)
+
+    assert entry.unique_id == "MB1"
+    assert entry.minor_version == 1
+    assert entity_registry.async_get(entity.entity_id).unique_id == "Status-MB1"
+    assert device_registry.async_get(device.id).identifiers == {(DOMAIN, "MB1")}
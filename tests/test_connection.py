@@ -0,0 +1,177 @@
+"""Tests for the connection manager of the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import Callable
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.chitubox_printer.connection import (
+    SDCPConnectionManager,
+    SDCPConnectionState,
+)
+from custom_components.chitubox_printer.const import (
+    RECONNECT_BACKOFF_MAX,
+    RECONNECT_BACKOFF_MIN,
+)
+
+
+class FakeClient:
+    """Client double, counting how often its connection is checked."""
+
+    def __init__(self, host: str, logger=None) -> None:
+        """Initialize"""
+        self.host = host
+        self.connected = True
+        self.checks = 0
+        self.close_listeners: list[Callable[[], None]] = []
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected."""
+        self.checks += 1
+        return self.connected
+
+    def add_close_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Register a close listener."""
+        self.close_listeners.append(listener)
+        return lambda: self.close_listeners.remove(listener)
+
+    def disconnect(self) -> None:
+        """Disconnect."""
+        self.connected = False
+
+    def close(self) -> None:
+        """Close the websocket, as seen from the websocket thread."""
+        self.connected = False
+        for listener in tuple(self.close_listeners):
+            listener()
+
+
+async def _async_wait_for(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds."""
+    async with asyncio.timeout(1):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("attempts", range(1, 12))
+def test_backoff_delay_bounds(attempts: int) -> None:
+    """The delay doubles with every attempt, is capped, and jittered down."""
+    delay = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_MIN * 2 ** (attempts - 1))
+
+    with patch.object(random, "uniform", lambda low, high: high):
+        assert SDCPConnectionManager.backoff_delay(attempts) == delay
+    with patch.object(random, "uniform", lambda low, high: low):
+        assert SDCPConnectionManager.backoff_delay(attempts) == delay / 2
+
+
+def test_backoff_delay_is_jittered() -> None:
+    """Printers reconnecting together do not retry at the same moment."""
+    delays = {SDCPConnectionManager.backoff_delay(3) for _ in range(20)}
+
+    assert len(delays) > 1
+    for delay in delays:
+        assert RECONNECT_BACKOFF_MIN * 2 <= delay <= RECONNECT_BACKOFF_MIN * 4
+
+
+def test_first_attempt_is_jittered() -> None:
+    """Printers which dropped together do not reconnect together."""
+    delays = {SDCPConnectionManager.backoff_delay(0) for _ in range(20)}
+
+    assert len(delays) > 1
+    for delay in delays:
+        assert 0 <= delay <= RECONNECT_BACKOFF_MIN
+
+
+def test_backoff_delay_is_capped() -> None:
+    """The delay never exceeds the maximum, however many attempts failed."""
+    assert SDCPConnectionManager.backoff_delay(100) <= RECONNECT_BACKOFF_MAX
+
+
+@pytest.fixture
+def no_delay() -> None:
+    """Reconnect without delay."""
+    with patch.object(random, "uniform", lambda low, high: low):
+        yield
+
+
+@pytest.mark.usefixtures("no_delay")
+async def test_connected_printer_is_not_polled(hass: HomeAssistant) -> None:
+    """A connected printer is only checked again when its client closed."""
+    manager = SDCPConnectionManager(hass)
+    client = FakeClient("192.168.1.10")
+    connection = manager.async_add("entry", client.host, lambda: None, client=client)
+    await _async_wait_for(lambda: client.close_listeners != [])
+    checks = client.checks
+
+    await asyncio.sleep(0.1)
+    assert client.checks == checks
+    assert connection.state == SDCPConnectionState.CONNECTED
+
+    with patch(
+        "custom_components.chitubox_printer.connection.SDCPDeviceClient", FakeClient
+    ):
+        client.close()
+        await _async_wait_for(
+            lambda: connection.client is not client
+            and connection.client.close_listeners != []
+        )
+
+    assert connection.state == SDCPConnectionState.CONNECTED
+    assert connection.reconnects == 1
+    assert client.close_listeners == []
+    await manager.async_remove("entry")
+
+
+@pytest.mark.usefixtures("no_delay")
+async def test_check_reconnects_a_silently_disconnected_printer(
+    hass: HomeAssistant,
+) -> None:
+    """A disconnection the client did not report is caught by async_check."""
+    manager = SDCPConnectionManager(hass)
+    client = FakeClient("192.168.1.10")
+    connection = manager.async_add("entry", client.host, lambda: None, client=client)
+    await _async_wait_for(lambda: client.close_listeners != [])
+
+    client.connected = False
+    with patch(
+        "custom_components.chitubox_printer.connection.SDCPDeviceClient", FakeClient
+    ):
+        manager.async_check("entry")
+        await _async_wait_for(lambda: connection.client is not client)
+
+    assert connection.state == SDCPConnectionState.CONNECTED
+    assert connection.reconnects == 1
+    await manager.async_remove("entry")
+
+
+async def test_first_reconnect_is_delayed(hass: HomeAssistant) -> None:
+    """A printer which disconnected waits a jittered delay before reconnecting."""
+    delays = []
+
+    def _backoff_delay(attempts: int) -> float:
+        delays.append(attempts)
+        return 0
+
+    manager = SDCPConnectionManager(hass)
+    client = FakeClient("192.168.1.10")
+    connection = manager.async_add("entry", client.host, lambda: None, client=client)
+    await _async_wait_for(lambda: client.close_listeners != [])
+
+    with (
+        patch.object(manager, "backoff_delay", _backoff_delay),
+        patch(
+            "custom_components.chitubox_printer.connection.SDCPDeviceClient",
+            FakeClient,
+        ),
+    ):
+        client.close()
+        await _async_wait_for(lambda: connection.client is not client)
+
+    assert delays == [0]
+    await manager.async_remove("entry")
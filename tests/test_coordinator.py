@@ -0,0 +1,175 @@
+"""Tests for the update coordinator of a printer."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer.const import (
+    CONF_BRAND,
+    CONF_IDLE_INTERVAL,
+    CONF_MAINBOARD_ID,
+    CONF_MODEL,
+    CONF_OFFLINE_INTERVAL,
+    DEFAULT_IDLE_INTERVAL,
+    DEFAULT_OFFLINE_INTERVAL,
+    DEFAULT_PRINTING_INTERVAL,
+    DOMAIN,
+    PUSH_UPDATE_INTERVAL,
+)
+from custom_components.chitubox_printer.coordinator import SDCPDeviceCoordinator
+
+
+class Client:
+    """Client double, holding the state of the printer."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.is_connected = True
+        self.supports_push = False
+        self.status = SimpleNamespace(machine_status=[0], is_printing=False)
+        self.attributes = SimpleNamespace(firmware_version=None)
+        self.frame_listeners: list[Callable[[str, str], None]] = []
+
+    def add_frame_listener(
+        self, listener: Callable[[str, str], None]
+    ) -> Callable[[], None]:
+        """Register a frame listener."""
+        self.frame_listeners.append(listener)
+        return lambda: self.frame_listeners.remove(listener)
+
+
+@pytest.fixture
+def client() -> Client:
+    """Return the client of the printer."""
+    return Client()
+
+
+@pytest.fixture
+def make_coordinator(
+    hass: HomeAssistant, client: Client
+) -> Callable[..., SDCPDeviceCoordinator]:
+    """Return a function creating the coordinator of the printer."""
+
+    def _make_coordinator(**options) -> SDCPDeviceCoordinator:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            unique_id="MB1",
+            data={
+                CONF_NAME: "Saturn",
+                CONF_BRAND: "ELEGOO",
+                CONF_MODEL: "Saturn 4 Ultra",
+                CONF_MAINBOARD_ID: "MB1",
+            },
+            options=options,
+        )
+        entry.add_to_hass(hass)
+        entry.runtime_data = SimpleNamespace(client=client, metrics=Mock())
+        return SDCPDeviceCoordinator(hass, entry)
+
+    return _make_coordinator
+
+
+async def _async_refresh(coordinator: SDCPDeviceCoordinator, times: int = 1) -> float:
+    """Run scheduled refreshes, return the resulting interval in seconds."""
+    for _ in range(times):
+        coordinator.data = await coordinator._async_update_data()
+    return coordinator.update_interval.total_seconds()
+
+
+async def test_printing_and_idle_intervals(
+    make_coordinator: Callable, client: Client
+) -> None:
+    """The printer is polled often while it prints, rarely while idle."""
+    coordinator = make_coordinator()
+
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL
+
+    client.status.machine_status = [1]
+    client.status.is_printing = True
+    assert await _async_refresh(coordinator) == DEFAULT_PRINTING_INTERVAL
+
+    coordinator = make_coordinator(**{CONF_IDLE_INTERVAL: 30})
+    client.status.is_printing = False
+    assert await _async_refresh(coordinator) == 30
+
+
+@pytest.mark.parametrize("offline", ["disconnected", "no_status"])
+async def test_offline_interval_backs_off(
+    make_coordinator: Callable, client: Client, offline: str
+) -> None:
+    """An offline printer is polled ever less, up to the offline interval."""
+    coordinator = make_coordinator()
+    if offline == "disconnected":
+        client.is_connected = False
+    else:
+        client.status.machine_status = []
+
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL * 2
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL * 4
+    assert await _async_refresh(coordinator, 10) == DEFAULT_OFFLINE_INTERVAL
+
+    # back online
+    client.is_connected = True
+    client.status.machine_status = [0]
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL
+    client.is_connected = False
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL * 2
+
+
+async def test_offline_interval_is_capped(
+    make_coordinator: Callable, client: Client
+) -> None:
+    """The offline interval is set in the options."""
+    coordinator = make_coordinator(**{CONF_OFFLINE_INTERVAL: 200})
+    client.is_connected = False
+
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL * 2
+    assert await _async_refresh(coordinator, 5) == 200
+
+
+async def test_pushed_updates_do_not_back_off(
+    make_coordinator: Callable, client: Client
+) -> None:
+    """Only scheduled refreshes count towards the offline back off."""
+    coordinator = make_coordinator()
+    client.is_connected = False
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL * 2
+
+    for _ in range(5):
+        coordinator.async_push()
+
+    assert coordinator.update_interval == timedelta(seconds=DEFAULT_IDLE_INTERVAL * 2)
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL * 4
+
+
+async def test_polling_is_a_fallback_while_pushing(
+    make_coordinator: Callable, client: Client
+) -> None:
+    """While the printer pushes its state, it is polled at most every minute."""
+    client.supports_push = True
+    client.status.machine_status = [1]
+    client.status.is_printing = True
+    coordinator = make_coordinator()
+    unsub_push = coordinator.async_start_push()
+    assert client.frame_listeners != []
+
+    assert await _async_refresh(coordinator) == PUSH_UPDATE_INTERVAL.total_seconds()
+
+    client.status.machine_status = [0]
+    client.status.is_printing = False
+    # the idle interval is not below the floor
+    assert await _async_refresh(coordinator) == DEFAULT_IDLE_INTERVAL
+
+    unsub_push()
+    assert client.frame_listeners == []
+    client.status.machine_status = [1]
+    client.status.is_printing = True
+    assert await _async_refresh(coordinator) == DEFAULT_PRINTING_INTERVAL
@@ -0,0 +1,147 @@
+"""Tests for the diagnostics of the ChituBox Printer integration."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+from homeassistant.const import CONF_HOST, CONF_ID, CONF_NAME
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer.capture import REDACTED, SDCPFrameCapture
+from custom_components.chitubox_printer.const import (
+    CONF_MAINBOARD_ID,
+    DATA_CONNECTION_MANAGER,
+    DOMAIN,
+)
+from custom_components.chitubox_printer.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+HOST = "192.168.1.10"
+MAINBOARD_ID = "f25273b12b094c5a"
+# the printer got another address since it was added
+MAINBOARD_IP = "192.168.1.77"
+
+
+def _frame(topic: str, key: str, payload: dict) -> str:
+    """Return a frame as sent by the printer."""
+    return json.dumps(
+        {
+            key: payload,
+            "MainboardID": MAINBOARD_ID,
+            "Topic": f"sdcp/{topic}/{MAINBOARD_ID}",
+        }
+    )
+
+
+async def test_diagnostics_are_redacted(hass: HomeAssistant) -> None:
+    """The host, mainboard id and address of the printer appear nowhere."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=MAINBOARD_ID,
+        data={
+            CONF_NAME: "Saturn",
+            CONF_HOST: HOST,
+            CONF_ID: HOST.replace(".", "_"),
+            CONF_MAINBOARD_ID: MAINBOARD_ID,
+        },
+    )
+    entry.add_to_hass(hass)
+
+    listeners = []
+    client = SimpleNamespace(
+        attributes=SimpleNamespace(mainboard_ip=MAINBOARD_IP),
+        is_connected=True,
+        supports_push=True,
+        add_frame_listener=lambda listener: listeners.append(listener) or None,
+    )
+    capture = SDCPFrameCapture()
+    capture.async_attach(client)
+    frames = [
+        (
+            "attributes",
+            _frame("attributes", "Attributes", {"MainboardIP": MAINBOARD_IP}),
+        ),
+        (
+            "status",
+            _frame("status", "Status", {"PrintInfo": {"Filename": "cube.ctb"}}),
+        ),
+        (
+            "response",
+            _frame(
+                "response",
+                "Data",
+                {"Data": {"VideoUrl": f"http://{MAINBOARD_IP}:3031/video"}},
+            ).encode(),
+        ),
+        ("status", f"not json from {HOST}"),
+    ]
+    for topic, frame in frames:
+        listeners[0](topic, frame)
+
+    hass.data[DOMAIN] = {
+        DATA_CONNECTION_MANAGER: SimpleNamespace(
+            connections={
+                entry.entry_id: SimpleNamespace(
+                    state="connected",
+                    attempts=0,
+                    reconnects=1,
+                    last_error=f"Cannot connect to host {HOST}:3030",
+                )
+            }
+        )
+    }
+    entry.runtime_data = SimpleNamespace(
+        client=client,
+        coordinator=SimpleNamespace(
+            last_update_success=True,
+            update_interval=None,
+            data={
+                "last_read_time": None,
+                "snapshot": {
+                    "attributes.mainboard_ip": MAINBOARD_IP,
+                    "attributes.mainboard_id": MAINBOARD_ID,
+                    "status.print_filename": "cube.ctb",
+                    "status.print_current_layer": 10,
+                },
+            },
+        ),
+        metrics=SimpleNamespace(as_dict=dict),
+        capture=capture,
+        timeseries=SimpleNamespace(samples=dict),
+    )
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    # the frames are kept exactly as received, and only decoded here
+    assert [captured[2] for captured in capture.frames] == [
+        frame for _, frame in frames
+    ]
+    assert all(
+        captured[2] is frame
+        for captured, (_, frame) in zip(capture.frames, frames, strict=True)
+    )
+
+    dumped = json.dumps(diagnostics)
+    for secret in (HOST, MAINBOARD_ID, MAINBOARD_IP, HOST.replace(".", "_")):
+        assert secret not in dumped
+    for section in (
+        diagnostics["entry"],
+        diagnostics["connection"]["last_error"],
+        diagnostics["coordinator"]["snapshot"],
+        diagnostics["capture"]["frames"],
+        diagnostics["capture"]["last_frames"],
+    ):
+        assert REDACTED in json.dumps(section)
+
+    assert diagnostics["coordinator"]["snapshot"]["status.print_current_layer"] == 10
+    assert diagnostics["capture"]["last_frames"]["status"]["frame"] == (
+        f"not json from {REDACTED}"
+    )
+    response = diagnostics["capture"]["frames"][2]
+    assert response["frame"]["Data"]["Data"]["VideoUrl"] == (
+        f"http://{REDACTED}:3031/video"
+    )
+    assert response["size"] == len(frames[2][1])
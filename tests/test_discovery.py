@@ -0,0 +1,142 @@
+"""Tests for the UDP discovery of SDCP printers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from custom_components.chitubox_printer.const import DISCOVERY_MESSAGE
+from custom_components.chitubox_printer.discovery import (
+    SDCPDiscoveredPrinter,
+    async_discover_printers,
+)
+
+# the responder and the discovery talk over the loopback interface
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+TIMEOUT = 0.2
+
+
+def _reply(mainboard_id: str, **data: str) -> bytes:
+    """Return the reply of a printer to the discovery broadcast."""
+    return json.dumps(
+        {
+            "Id": "979d4C788A4a78bC777A870F1A02867A",
+            "Data": {
+                "Name": "Saturn",
+                "MachineName": "Saturn 4 Ultra 16k",
+                "BrandName": "ELEGOO",
+                "MainboardIP": "192.168.1.10",
+                "MainboardID": mainboard_id,
+                "ProtocolVersion": "V3.0.0",
+                "FirmwareVersion": "V1.0.0",
+                **data,
+            },
+        }
+    ).encode()
+
+
+class DiscoveryResponder(asyncio.DatagramProtocol):
+    """Local stand-in for the printers answering the discovery broadcast."""
+
+    def __init__(self, replies: list[bytes]) -> None:
+        """Initialize"""
+        self.replies = replies
+        self.requests: list[bytes] = []
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        """Keep the transport to reply with."""
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Answer the discovery message."""
+        self.requests.append(data)
+        if data == DISCOVERY_MESSAGE:
+            for reply in self.replies:
+                self.transport.sendto(reply, addr)
+
+
+async def _async_discover(replies: list[bytes]) -> list[SDCPDiscoveredPrinter]:
+    """Discover the printers answering from a local responder."""
+    loop = asyncio.get_running_loop()
+    transport, responder = await loop.create_datagram_endpoint(
+        lambda: DiscoveryResponder(replies), local_addr=("127.0.0.1", 0)
+    )
+    try:
+        port = transport.get_extra_info("sockname")[1]
+        printers = await async_discover_printers("127.0.0.1", port, TIMEOUT)
+    finally:
+        transport.close()
+
+    assert responder.requests == [DISCOVERY_MESSAGE]
+    return printers
+
+
+async def test_discover_printers() -> None:
+    """Every printer answering the broadcast is discovered."""
+    printers = await _async_discover(
+        [
+            _reply("MB1", Name="Left"),
+            _reply("MB2", Name="Right", MainboardIP="192.168.1.11"),
+        ]
+    )
+
+    assert sorted(printers, key=lambda printer: printer.mainboard_id) == [
+        SDCPDiscoveredPrinter(
+            mainboard_id="MB1",
+            host="192.168.1.10",
+            name="Left",
+            model="Saturn 4 Ultra 16k",
+            brand="ELEGOO",
+            firmware_version="V1.0.0",
+        ),
+        SDCPDiscoveredPrinter(
+            mainboard_id="MB2",
+            host="192.168.1.11",
+            name="Right",
+            model="Saturn 4 Ultra 16k",
+            brand="ELEGOO",
+            firmware_version="V1.0.0",
+        ),
+    ]
+
+
+async def test_discover_deduplicates_on_mainboard_id() -> None:
+    """A printer answering twice is discovered once, at its latest address."""
+    printers = await _async_discover(
+        [_reply("MB1"), _reply("MB1", MainboardIP="192.168.1.20")]
+    )
+
+    assert [(printer.mainboard_id, printer.host) for printer in printers] == [
+        ("MB1", "192.168.1.20")
+    ]
+
+
+async def test_discover_falls_back_to_the_sender_address() -> None:
+    """The host of a printer not sending its ip is the reply's sender."""
+    printers = await _async_discover([_reply("MB1", MainboardIP="")])
+
+    assert [printer.host for printer in printers] == ["127.0.0.1"]
+
+
+@pytest.mark.parametrize(
+    "reply",
+    [
+        b"not json",
+        b"[]",
+        json.dumps({"Id": "1"}).encode(),
+        json.dumps({"Data": {"Name": "No mainboard id"}}).encode(),
+    ],
+)
+async def test_discover_ignores_invalid_replies(reply: bytes) -> None:
+    """Invalid replies do not hide the valid ones."""
+    printers = await _async_discover([reply, _reply("MB1")])
+
+    assert [printer.mainboard_id for printer in printers] == ["MB1"]
+
+
+async def test_discover_without_printers() -> None:
+    """Nothing is discovered when no printer answers."""
+    assert await _async_discover([]) == []
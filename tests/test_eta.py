@@ -0,0 +1,124 @@
+"""Tests for the finish time estimate of print jobs."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.chitubox_printer.const import CONF_MODEL
+from custom_components.chitubox_printer.eta import (
+    SDCPLayerDurations,
+    SDCPPrintEstimator,
+)
+
+TOTAL_LAYERS = 100
+
+
+class Clock:
+    """Monotonic clock, advanced by the tests."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    """Return the clock of the estimator."""
+    clock = Clock()
+    with patch("custom_components.chitubox_printer.eta.time", clock):
+        yield clock
+
+
+@pytest.fixture
+def durations(hass: HomeAssistant) -> SDCPLayerDurations:
+    """Return the layer durations of previous prints."""
+    return SDCPLayerDurations(hass)
+
+
+@pytest.fixture
+def estimator(
+    hass: HomeAssistant, durations: SDCPLayerDurations, clock: Clock
+) -> SDCPPrintEstimator:
+    """Return the estimator of a printer."""
+    config_entry = SimpleNamespace(data={CONF_MODEL: "Saturn 4 Ultra 16k"})
+    return SDCPPrintEstimator(hass, config_entry, durations)
+
+
+def _snapshot(
+    layer: int, task_id: str = "T1", is_printing: bool = True
+) -> dict[str, Any]:
+    """Return the snapshot of a printer printing a layer."""
+    return {
+        "status.print_task_id": task_id,
+        "status.print_current_layer": layer,
+        "status.print_total_layers": TOTAL_LAYERS,
+        "status.is_printing": is_printing,
+        "status.print_filename": "printme.ctb",
+    }
+
+
+def _print(estimator: SDCPPrintEstimator, clock: Clock, *layers: tuple) -> None:
+    """Report the layers printed, each at a time."""
+    for timestamp, layer in layers:
+        clock.now = timestamp
+        estimator._async_update(_snapshot(layer))
+
+
+def test_moving_average(estimator: SDCPPrintEstimator, clock: Clock) -> None:
+    """The layer duration is an exponentially weighted moving average."""
+    _print(estimator, clock, (0, 0), (10, 1))
+    assert estimator.layer_duration == 10
+
+    _print(estimator, clock, (30, 2))
+    assert estimator.layer_duration == pytest.approx(10 * 0.9 + 20 * 0.1)
+
+    # an update spanning 2 layers counts as 2 samples
+    _print(estimator, clock, (40, 4))
+    assert estimator.layer_duration == pytest.approx(11 * 0.81 + 5 * 0.19)
+
+
+def test_estimate_once_enough_layers_were_observed(
+    estimator: SDCPPrintEstimator, clock: Clock
+) -> None:
+    """The printer's own estimate is used until enough layers were observed."""
+    _print(estimator, clock, *((10 * layer, layer) for layer in range(5)))
+    assert estimator.source is None
+    assert estimator.finish_at is None
+
+    _print(estimator, clock, (50, 5))
+    assert estimator.source == "observed"
+    assert estimator.remaining_ms == (TOTAL_LAYERS - 5) * 10 * 1000
+    assert estimator.finish_at is not None
+
+
+def test_outliers_are_ignored(estimator: SDCPPrintEstimator, clock: Clock) -> None:
+    """A layer taking far longer than the average, eg paused, is ignored."""
+    _print(estimator, clock, (0, 0), (10, 1), (70, 2))
+    assert estimator.layer_duration == 10
+
+    # the next layer is measured from the end of the outlier
+    _print(estimator, clock, (80, 3))
+    assert estimator.layer_duration == 10
+
+
+def test_estimate_from_previous_prints(
+    estimator: SDCPPrintEstimator, clock: Clock, durations: SDCPLayerDurations
+) -> None:
+    """A file printed before starts from its previous mean layer duration."""
+    _print(estimator, clock, *((10 * layer, layer) for layer in range(6)))
+    estimator._async_update(_snapshot(6, is_printing=False))
+    assert estimator.finish_at is None
+    assert durations.get("Saturn 4 Ultra 16k", "printme.ctb") == 10
+
+    estimator._async_update(_snapshot(0, task_id="T2"))
+    assert estimator.source == "history"
+    assert estimator.remaining_ms == TOTAL_LAYERS * 10 * 1000
@@ -0,0 +1,119 @@
+"""Tests for the aggregates of all printers."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer.const import DOMAIN
+from custom_components.chitubox_printer.farm import (
+    FARM_IDLE,
+    FARM_OFFLINE,
+    FARM_PRINTING,
+    SDCPFarm,
+)
+
+NOW = dt_util.utcnow()
+
+
+def _snapshot(
+    is_connected: bool = True,
+    is_printing: bool = False,
+    current_layer: int | None = None,
+    finish_at: datetime | None = None,
+) -> dict[str, Any]:
+    """Return the snapshot of a printer."""
+    return {
+        "is_connected": is_connected,
+        "status.machine_status": (1,) if is_printing else (0,),
+        "status.is_printing": is_printing,
+        "status.print_current_layer": current_layer,
+        "status.print_total_layers": 100,
+        "status.print_finished_at_datetime": None,
+        "runtime.eta.finish_at": finish_at,
+    }
+
+
+def _printing(current_layer: int, minutes: int) -> dict[str, Any]:
+    """Return the snapshot of a printer finishing in minutes."""
+    return _snapshot(
+        is_printing=True,
+        current_layer=current_layer,
+        finish_at=NOW + timedelta(minutes=minutes),
+    )
+
+
+@pytest.fixture
+def farm(hass: HomeAssistant) -> SDCPFarm:
+    """Return the aggregates of the printers."""
+    return SDCPFarm(hass)
+
+
+def test_counts(farm: SDCPFarm) -> None:
+    """Every printer counts once, in its current state."""
+    farm._async_update("a", _snapshot())
+    farm._async_update("b", _snapshot(is_connected=False))
+    farm._async_update("c", _printing(10, 30))
+    assert farm.counts == {FARM_PRINTING: 1, FARM_IDLE: 1, FARM_OFFLINE: 1}
+
+    farm._async_update("a", _printing(50, 10))
+    farm._async_set("b", None, 0, None)
+    assert farm.counts == {FARM_PRINTING: 2, FARM_IDLE: 0, FARM_OFFLINE: 0}
+    assert farm.remaining_layers == 90 + 50
+
+
+def test_next_finish_drops_outdated_entries(farm: SDCPFarm) -> None:
+    """The earliest finish time follows the printers' latest estimates."""
+    farm._async_update("a", _printing(10, 10))
+    farm._async_update("b", _printing(10, 20))
+    assert farm.next_finish_at == NOW + timedelta(minutes=10)
+
+    farm._async_update("a", _printing(10, 30))
+    assert farm.next_finish_at == NOW + timedelta(minutes=20)
+
+    farm._async_update("b", _snapshot())
+    assert farm.next_finish_at == NOW + timedelta(minutes=30)
+
+    farm._async_set("a", None, 0, None)
+    assert farm.next_finish_at is None
+    assert farm.remaining_layers == 0
+
+
+def test_heap_is_compacted(farm: SDCPFarm) -> None:
+    """Outdated finish times do not accumulate."""
+    farm._async_update("a", _printing(10, 1000))
+    for minutes in range(500):
+        farm._async_update("b", _printing(10, minutes))
+
+    assert len(farm._finish_heap) <= 2 * 2 + 16 + 1
+    assert farm.next_finish_at == NOW + timedelta(minutes=499)
+
+
+def test_listeners_are_called_on_changes(farm: SDCPFarm) -> None:
+    """Listeners are only called when an aggregate changed."""
+    calls = []
+    remove_listener = farm.async_add_listener(lambda: calls.append(None))
+
+    farm._async_update("a", _printing(10, 10))
+    farm._async_update("a", _printing(10, 10))
+    assert len(calls) == 1
+
+    remove_listener()
+    farm._async_update("a", _snapshot())
+    assert len(calls) == 1
+
+
+async def test_next_finish_printer(hass: HomeAssistant, farm: SDCPFarm) -> None:
+    """The printer finishing first is named by the title of its entry."""
+    entry = MockConfigEntry(domain=DOMAIN, title="Saturn")
+    entry.add_to_hass(hass)
+
+    farm._async_update(entry.entry_id, _printing(10, 10))
+    farm._async_update("gone", _printing(10, 20))
+
+    assert farm.next_finish_printer == "Saturn"
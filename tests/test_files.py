@@ -0,0 +1,104 @@
+"""Tests for the file index of a printer."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer.const import DOMAIN
+from custom_components.chitubox_printer.files import SDCPFileIndex
+
+
+class Printer:
+    """Printer double, answering the file listings when told to."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.listings: dict[str, list[asyncio.Future]] = {}
+
+    async def async_send(self, command, data: dict) -> dict:
+        """Wait for the listing of a directory to be answered."""
+        future = asyncio.get_running_loop().create_future()
+        self.listings.setdefault(data["Url"], []).append(future)
+        return await future
+
+    def answer(self, url: str, *names: str) -> None:
+        """Answer the pending listings of a directory."""
+        for future in self.listings.pop(url):
+            future.set_result(
+                {"FileList": [{"name": f"{url}/{name}", "type": 1} for name in names]}
+            )
+
+
+async def _async_settle() -> None:
+    """Let the listings run until they wait for the printer."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def printer() -> Printer:
+    """Return the printer."""
+    return Printer()
+
+
+@pytest.fixture
+def index(hass: HomeAssistant, printer: Printer) -> SDCPFileIndex:
+    """Return the file index of a connected printer with a USB disk."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    entry.runtime_data = SimpleNamespace(
+        client=SimpleNamespace(
+            is_connected=True, attributes=SimpleNamespace(usbdisk_connected=True)
+        ),
+        coordinator=MagicMock(),
+        commands=printer,
+    )
+    return SDCPFileIndex(hass, entry)
+
+
+async def test_refresh_every_storage(
+    hass: HomeAssistant, index: SDCPFileIndex, printer: Printer
+) -> None:
+    """A refresh requested while another runs is not dropped."""
+    index.async_schedule_refresh(("local",))
+    await _async_settle()
+    index.async_schedule_refresh(("local", "usb"))
+    await _async_settle()
+
+    assert set(printer.listings) == {"/local", "/usb"}
+    printer.answer("/local", "a.ctb")
+    printer.answer("/usb", "b.ctb")
+    await _async_settle()
+
+    assert index.count("local") == 1
+    assert index.count("usb") == 1
+    assert printer.listings == {}
+
+
+async def test_invalidate_one_storage(
+    hass: HomeAssistant, index: SDCPFileIndex, printer: Printer
+) -> None:
+    """Invalidating a storage does not drop the listings of the others."""
+    index.async_schedule_refresh()
+    await _async_settle()
+
+    index.async_invalidate("usb")
+    await _async_settle()
+    printer.answer("/local", "a.ctb")
+    printer.answer("/usb", "old.ctb")
+    await _async_settle()
+
+    assert index.count("local") == 1
+    # the listing sent before the invalidation is not indexed, the USB disk
+    # is listed again
+    assert index.count("usb") is None
+    printer.answer("/usb", "new.ctb", "other.ctb")
+    await _async_settle()
+
+    assert index.count("usb") == 2
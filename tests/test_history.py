@@ -0,0 +1,224 @@
+"""Tests for the print job history."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.chitubox_printer.command import SDCPCommandError
+from custom_components.chitubox_printer.const import (
+    DATA_TIMELAPSE_ARCHIVER,
+    DOMAIN,
+    HISTORY_DETAILS_BATCH_SIZE,
+    HISTORY_SAVE_DELAY,
+    SDCPCommand,
+)
+from custom_components.chitubox_printer.history import SDCPJobHistory
+
+# 2024-01-01 00:00:00 UTC
+BEGIN = 1704067200
+
+
+def _details(index: int, name: str = "model.ctb", status: int = 1) -> dict[str, Any]:
+    """Return the details of a print job, as sent by the printer."""
+    return {
+        "TaskId": f"task{index:03d}",
+        "TaskName": name,
+        "TaskStatus": status,
+        "BeginTime": BEGIN + index * 3600,
+        "EndTime": BEGIN + index * 3600 + 1800,
+        "Thumbnail": f"http://printer/thumb{index}.bmp",
+        "TimeLapseVideoUrl": f"http://printer/timelapse{index}.mp4",
+    }
+
+
+class Printer:
+    """Printer double, answering the history commands."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.details: dict[str, dict[str, Any]] = {}
+        self.requests: list[tuple[SDCPCommand, Any]] = []
+        self.error: Exception | None = None
+
+    def print_jobs(self, *details: dict[str, Any]) -> None:
+        """Add print jobs to the history of the printer."""
+        for job in details:
+            self.details[job["TaskId"]] = job
+
+    async def async_send(self, command: SDCPCommand, data: Any = None) -> dict:
+        """Answer a command."""
+        self.requests.append((command, data))
+        if self.error is not None:
+            raise self.error
+        if command == SDCPCommand.HISTORY_TASKS:
+            return {"Ack": 0, "HistoryData": list(self.details)}
+        return {
+            "Ack": 0,
+            "HisTaskDetailInfo": [self.details[task_id] for task_id in data["Id"]],
+        }
+
+
+class Archiver:
+    """Timelapse archiver double, keeping the jobs scheduled."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.scheduled: list[str] = []
+
+    def async_schedule(self, entry: MockConfigEntry, jobs: list[dict]) -> None:
+        """Archive the timelapses of jobs."""
+        self.scheduled.extend(job["task_id"] for job in jobs)
+
+
+@pytest.fixture
+def printer() -> Printer:
+    """Return the printer."""
+    return Printer()
+
+
+@pytest.fixture
+def archiver(hass: HomeAssistant) -> Archiver:
+    """Return the timelapse archiver."""
+    hass.data.setdefault(DOMAIN, {})[DATA_TIMELAPSE_ARCHIVER] = Archiver()
+    return hass.data[DOMAIN][DATA_TIMELAPSE_ARCHIVER]
+
+
+@pytest.fixture
+async def history(
+    hass: HomeAssistant, printer: Printer, archiver: Archiver
+) -> AsyncIterator[SDCPJobHistory]:
+    """Return the history of the printer, saved at the end."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    entry.runtime_data = SimpleNamespace(
+        client=SimpleNamespace(is_connected=True),
+        commands=printer,
+    )
+    yield SDCPJobHistory(hass, entry)
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=HISTORY_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+
+async def test_first_sync_imports_without_archiving(
+    history: SDCPJobHistory, printer: Printer, archiver: Archiver
+) -> None:
+    """The jobs printed before the printer was added are not archived."""
+    printer.print_jobs(_details(1), _details(2))
+
+    assert await history.async_sync() == 2
+    assert history.synced
+    assert archiver.scheduled == []
+
+    printer.print_jobs(_details(3))
+    assert await history.async_sync() == 1
+    assert archiver.scheduled == ["task003"]
+
+
+async def test_only_new_jobs_are_requested_in_batches(
+    history: SDCPJobHistory, printer: Printer
+) -> None:
+    """The details of unknown task ids are requested in batches."""
+    printer.print_jobs(_details(0))
+    await history.async_sync()
+    printer.print_jobs(*(_details(index) for index in range(1, 46)))
+    printer.requests.clear()
+
+    assert await history.async_sync() == 45
+
+    batches = [
+        data["Id"]
+        for command, data in printer.requests
+        if command == SDCPCommand.HISTORY_TASK_DETAILS
+    ]
+    assert [len(batch) for batch in batches] == [
+        HISTORY_DETAILS_BATCH_SIZE,
+        HISTORY_DETAILS_BATCH_SIZE,
+        45 - 2 * HISTORY_DETAILS_BATCH_SIZE,
+    ]
+    assert "task000" not in sum(batches, [])
+
+    printer.requests.clear()
+    assert await history.async_sync() == 0
+    assert printer.requests == [(SDCPCommand.HISTORY_TASKS, None)]
+
+
+async def test_failed_sync(history: SDCPJobHistory, printer: Printer) -> None:
+    """A sync which failed leaves the history as it was."""
+    printer.print_jobs(_details(1))
+    printer.error = SDCPCommandError("Printer disconnected")
+
+    assert await history.async_sync() == 0
+    assert history.jobs == {}
+    assert not history.synced
+
+
+async def test_query_indexes(history: SDCPJobHistory, printer: Printer) -> None:
+    """Queries combine the date, file name and outcome indexes."""
+    printer.print_jobs(
+        _details(1, "Benchy.ctb", status=1),
+        _details(2, "cube.ctb", status=2),
+        _details(3, "benchy_v2.ctb", status=2),
+        _details(4, "benchy_v2.ctb", status=1),
+        _details(5, "cube.ctb", status=3),
+    )
+    await history.async_sync()
+
+    def _task_ids(**criteria: Any) -> list[str]:
+        return [job["task_id"] for job in history.async_query(**criteria)]
+
+    assert _task_ids() == ["task005", "task004", "task003", "task002", "task001"]
+    assert _task_ids(limit=2) == ["task005", "task004"]
+    assert _task_ids(filename="BENCHY") == ["task004", "task003", "task001"]
+    assert _task_ids(outcome="failed") == ["task003", "task002"]
+    assert _task_ids(filename="benchy", outcome="completed") == [
+        "task004",
+        "task001",
+    ]
+    assert _task_ids(outcome="unknown") == []
+
+    since = dt_util.utc_from_timestamp(BEGIN + 2 * 3600)
+    until = dt_util.utc_from_timestamp(BEGIN + 4 * 3600)
+    assert _task_ids(since=since, until=until) == ["task004", "task003", "task002"]
+    assert _task_ids(since=since, outcome="stopped") == ["task005"]
+
+    jobs = history.async_query(filename="cube")
+    assert history.summarize(jobs) == {
+        "count": 2,
+        "total_duration": 3600,
+        "outcomes": {"stopped": 1, "failed": 1},
+    }
+
+
+async def test_history_is_stored(
+    hass: HomeAssistant, history: SDCPJobHistory, printer: Printer
+) -> None:
+    """The history is read back from storage, without contacting the printer."""
+    printer.print_jobs(_details(1), _details(2))
+    await history.async_sync()
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=HISTORY_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    restored = SDCPJobHistory(hass, history.config_entry)
+    await restored.async_load()
+
+    assert restored.synced
+    assert restored.jobs == history.jobs
+    assert [job["task_id"] for job in restored.async_query()] == [
+        "task002",
+        "task001",
+    ]
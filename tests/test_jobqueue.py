@@ -0,0 +1,252 @@
+"""Tests for the queue of print jobs."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterator
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.chitubox_printer.command import SDCPCommandError
+from custom_components.chitubox_printer.const import (
+    CONF_MODEL,
+    DOMAIN,
+    JOB_QUEUE_ATTEMPTS,
+    JOB_QUEUE_RETRY_DELAY,
+    JOB_QUEUE_START_TIMEOUT,
+)
+from custom_components.chitubox_printer.jobqueue import (
+    JOB_DISPATCHING,
+    JOB_FAILED,
+    JOB_QUEUED,
+    SDCPJobQueue,
+)
+
+
+class Coordinator:
+    """Coordinator double, reporting the state of a printer."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.data = None
+        self._listeners: list[Callable[[], None]] = []
+
+    def async_track_fields(self, fields) -> None:
+        """Track fields, all of them are in the snapshot."""
+
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Register a listener."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def report(self, machine_status: str, is_printing: bool = False) -> None:
+        """Report the state of the printer to the listeners."""
+        self.data = {
+            "snapshot": {
+                "is_connected": True,
+                "status.machine_status": (machine_status,),
+                "status.is_printing": is_printing,
+            },
+            "changed": frozenset(("status.machine_status", "status.is_printing")),
+        }
+        for listener in tuple(self._listeners):
+            listener()
+
+
+class Printer:
+    """A printer followed by the queue."""
+
+    def __init__(self, hass: HomeAssistant, queue: SDCPJobQueue, model: str) -> None:
+        """Initialize"""
+        self.entry = MockConfigEntry(domain=DOMAIN, data={CONF_MODEL: model})
+        self.entry.add_to_hass(hass)
+        self.coordinator = Coordinator()
+        self.send = AsyncMock()
+        self.entry.runtime_data = SimpleNamespace(
+            coordinator=self.coordinator,
+            commands=SimpleNamespace(async_send=self.send),
+        )
+        self.untrack = queue.async_track(self.entry)
+
+    @property
+    def printed(self) -> list[str]:
+        """Return the files the printer was asked to print."""
+        return [call.args[1]["Filename"] for call in self.send.call_args_list]
+
+
+async def _async_settle() -> None:
+    """Let the dispatched jobs start."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def queue(hass: HomeAssistant) -> SDCPJobQueue:
+    """Return the job queue."""
+    return SDCPJobQueue(hass)
+
+
+@pytest.fixture
+def add_printer(
+    hass: HomeAssistant, queue: SDCPJobQueue
+) -> Iterator[Callable[[str], Printer]]:
+    """Return a function adding a printer, stop following them at the end."""
+    printers: list[Printer] = []
+
+    def _add_printer(model: str) -> Printer:
+        printers.append(Printer(hass, queue, model))
+        return printers[-1]
+
+    yield _add_printer
+    for printer in printers:
+        printer.untrack()
+
+
+async def test_jobs_are_dispatched_by_priority(
+    hass: HomeAssistant, queue: SDCPJobQueue, add_printer: Callable
+) -> None:
+    """Jobs of a higher priority go first, then the oldest."""
+    printer = add_printer("Saturn")
+    queue.async_queue(filename="first.ctb")
+    queue.async_queue(filename="urgent.ctb", priority=5)
+    queue.async_queue(filename="second.ctb")
+
+    assert [job["filename"] for job in queue.async_list()] == [
+        "urgent.ctb",
+        "first.ctb",
+        "second.ctb",
+    ]
+
+    printer.coordinator.report("IDLE")
+    await _async_settle()
+
+    assert printer.printed == ["/local/urgent.ctb"]
+    assert [job["filename"] for job in queue.async_list()] == [
+        "first.ctb",
+        "second.ctb",
+    ]
+
+
+async def test_jobs_are_dispatched_by_model(
+    hass: HomeAssistant, queue: SDCPJobQueue, add_printer: Callable
+) -> None:
+    """A job for a model only goes to an idle printer of that model."""
+    saturn = add_printer("Saturn")
+    mars = add_printer("Mars")
+    saturn.coordinator.report("IDLE")
+
+    queue.async_queue(filename="mars.ctb", model="mars")
+    await _async_settle()
+    assert saturn.printed == []
+
+    mars.coordinator.report("IDLE")
+    await _async_settle()
+    assert mars.printed == ["/local/mars.ctb"]
+
+    queue.async_queue(filename="any.ctb")
+    await _async_settle()
+    assert saturn.printed == ["/local/any.ctb"]
+
+
+async def test_printer_is_reserved_until_the_job_started(
+    hass: HomeAssistant, queue: SDCPJobQueue, add_printer: Callable
+) -> None:
+    """A printer starting a job gets no other job, however long it takes."""
+    printer = add_printer("Saturn")
+    acknowledged = asyncio.Event()
+
+    async def _async_send(command, data) -> None:
+        await acknowledged.wait()
+
+    printer.send.side_effect = _async_send
+    queue.async_queue(filename="first.ctb")
+    queue.async_queue(filename="second.ctb")
+    printer.coordinator.report("IDLE")
+    await _async_settle()
+
+    # the printer reports its state while the job is being started
+    printer.coordinator.report("FILE_TRANSFERRING")
+    printer.coordinator.report("IDLE")
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=JOB_QUEUE_START_TIMEOUT + 1)
+    )
+    await _async_settle()
+    assert printer.printed == ["/local/first.ctb"]
+    assert queue.async_list()[1]["status"] == JOB_DISPATCHING
+
+    acknowledged.set()
+    await _async_settle()
+    assert [job["filename"] for job in queue.async_list()] == ["second.ctb"]
+
+    # the printer is reserved until it prints, or the timeout
+    printer.coordinator.report("IDLE")
+    await _async_settle()
+    assert printer.printed == ["/local/first.ctb"]
+
+    printer.coordinator.report("PRINTING", is_printing=True)
+    printer.coordinator.report("IDLE")
+    await _async_settle()
+    assert printer.printed == ["/local/first.ctb", "/local/second.ctb"]
+
+
+@pytest.mark.parametrize("error", [SDCPCommandError("busy"), ValueError("bad")])
+async def test_failed_job_goes_to_another_printer(
+    hass: HomeAssistant,
+    queue: SDCPJobQueue,
+    add_printer: Callable,
+    error: Exception,
+) -> None:
+    """A job which could not be started is queued again, for other printers."""
+    failing = add_printer("Saturn")
+    failing.send.side_effect = error
+    failing.coordinator.report("IDLE")
+    job = queue.async_queue(filename="printme.ctb")
+    await _async_settle()
+
+    assert job["status"] == JOB_QUEUED
+    assert job["error"] == str(error)
+    assert job["attempts"] == 1
+
+    # the printer which failed is not sent the job again straight away
+    failing.coordinator.report("IDLE")
+    await _async_settle()
+    assert len(failing.printed) == 1
+
+    other = add_printer("Saturn")
+    other.coordinator.report("IDLE")
+    await _async_settle()
+    assert other.printed == ["/local/printme.ctb"]
+    assert queue.async_list() == []
+
+
+async def test_job_fails_after_attempts(
+    hass: HomeAssistant, queue: SDCPJobQueue, add_printer: Callable
+) -> None:
+    """The printer which failed retries later, until the job fails."""
+    printer = add_printer("Saturn")
+    printer.send.side_effect = SDCPCommandError("busy")
+    printer.coordinator.report("IDLE")
+    job = queue.async_queue(filename="printme.ctb")
+    await _async_settle()
+
+    for attempt in range(1, JOB_QUEUE_ATTEMPTS):
+        assert job["status"] == JOB_QUEUED
+        async_fire_time_changed(
+            hass,
+            dt_util.utcnow()
+            + timedelta(seconds=JOB_QUEUE_RETRY_DELAY * attempt * 2 + 1),
+        )
+        await _async_settle()
+
+    assert job["status"] == JOB_FAILED
+    assert job["attempts"] == JOB_QUEUE_ATTEMPTS
+    assert len(printer.printed) == JOB_QUEUE_ATTEMPTS
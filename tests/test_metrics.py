@@ -0,0 +1,127 @@
+"""Tests for the performance metrics of a printer."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer import metrics as metrics_module
+from custom_components.chitubox_printer.const import DATA_CONNECTION_MANAGER, DOMAIN
+from custom_components.chitubox_printer.metrics import SDCPDuration, SDCPMetrics
+
+
+class Clock:
+    """Monotonic clock double."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    """Return the clock of the metrics."""
+    clock = Clock()
+    with patch.object(metrics_module, "time", SimpleNamespace(monotonic=clock)):
+        yield clock
+
+
+@pytest.fixture
+def metrics(hass: HomeAssistant, clock: Clock) -> SDCPMetrics:
+    """Return the metrics of a printer."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    entry.runtime_data = SimpleNamespace(coordinator=Mock())
+    hass.data[DOMAIN] = {
+        DATA_CONNECTION_MANAGER: SimpleNamespace(
+            connections={entry.entry_id: SimpleNamespace(reconnects=0)}
+        )
+    }
+    return SDCPMetrics(hass, entry)
+
+
+def test_duration_statistics() -> None:
+    """A duration keeps its count, last, mean and maximum."""
+    duration = SDCPDuration()
+    assert duration.mean == 0.0
+
+    for seconds in (0.010, 0.030, 0.020):
+        duration.record(seconds)
+
+    assert duration.as_dict() == {
+        "count": 3,
+        "last_ms": 20.0,
+        "mean_ms": 20.0,
+        "max_ms": 30.0,
+    }
+
+
+def test_durations_by_name(metrics: SDCPMetrics) -> None:
+    """Durations are kept by name, and combined by prefix."""
+    assert metrics.mean_ms("push") is None
+    assert metrics.mean_ms_of("command.") is None
+
+    metrics.record("command.status_refresh", 0.010)
+    metrics.record("command.status_refresh", 0.030)
+    metrics.record("command.start_print", 0.100)
+    metrics.record("push", 0.002)
+
+    assert metrics.mean_ms("command.status_refresh") == 20.0
+    # weighted by the number of measurements
+    assert metrics.mean_ms_of("command.") == round(140 / 3, 3)
+    assert metrics.durations_of("command.") == {
+        "status_refresh": 20.0,
+        "start_print": 100.0,
+    }
+    assert list(metrics.as_dict()["durations"]) == [
+        "command.start_print",
+        "command.status_refresh",
+        "push",
+    ]
+
+
+async def test_frame_rate_sampling(
+    hass: HomeAssistant, metrics: SDCPMetrics, clock: Clock
+) -> None:
+    """The frame rate is sampled per minute, along with the reconnects."""
+    coordinator = metrics.config_entry.runtime_data.coordinator
+    listeners = []
+    client = SimpleNamespace(
+        add_frame_listener=lambda listener: listeners.append(listener)
+        or (lambda: listeners.remove(listener))
+    )
+    metrics.async_attach(client)
+
+    for _ in range(30):
+        listeners[0]("status", "{}")
+    clock.now += 10
+    hass.data[DOMAIN][DATA_CONNECTION_MANAGER].connections[
+        metrics.config_entry.entry_id
+    ].reconnects = 2
+    metrics._async_sample()
+
+    assert metrics.frame_rate == 180.0
+    assert metrics.reconnects == 2
+    assert metrics.version == 1
+    coordinator.async_push.assert_called_once()
+
+    # the next sample only counts the frames since the previous one
+    for _ in range(5):
+        listeners[0]("status", "{}")
+    clock.now += 60
+    metrics._async_sample()
+    assert metrics.frame_rate == 5.0
+    assert metrics.frames == 35
+
+    metrics.async_attach(None)
+    assert listeners == []
+    assert metrics.as_dict()["frames_per_minute"] == 5.0
@@ -0,0 +1,124 @@
+"""Tests for the integration wide services."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer.command import SDCPCommandError
+from custom_components.chitubox_printer.const import (
+    ATTR_CONFIG_ENTRY_ID,
+    COMMAND_TIMEOUT,
+    DOMAIN,
+    SERVICE_BULK_COMMAND,
+    SDCPCommand,
+)
+from custom_components.chitubox_printer.services import async_setup_services
+
+
+@pytest.fixture
+def add_printer(hass: HomeAssistant) -> Callable[..., MockConfigEntry]:
+    """Return a function adding a loaded printer, answering commands."""
+    async_setup_services(hass)
+
+    def _add_printer(title: str, error: Exception | None = None) -> MockConfigEntry:
+        entry = MockConfigEntry(
+            domain=DOMAIN, title=title, state=ConfigEntryState.LOADED
+        )
+        entry.add_to_hass(hass)
+        entry.runtime_data = SimpleNamespace(
+            commands=SimpleNamespace(async_send=AsyncMock(side_effect=error))
+        )
+        return entry
+
+    return _add_printer
+
+
+async def test_bulk_command_summary(
+    hass: HomeAssistant, add_printer: Callable
+) -> None:
+    """Every printer is sent the command, and reported on."""
+    saturn = add_printer("Saturn")
+    mars = add_printer("Mars", SDCPCommandError("Command STOP_PRINT was refused"))
+    jupiter = add_printer(
+        "Jupiter", SDCPCommandError("Command STOP_PRINT was not acknowledged in time")
+    )
+    add_printer("Unloaded").mock_state(hass, ConfigEntryState.NOT_LOADED)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_COMMAND,
+        {"command": "stop", "timeout": 5},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert response["command"] == "stop"
+    assert response["succeeded"] == 1
+    assert response["failed"] == 2
+    printers = response["printers"]
+    assert list(printers) == [saturn.entry_id, mars.entry_id, jupiter.entry_id]
+    assert printers[saturn.entry_id]["success"] is True
+    assert printers[saturn.entry_id]["error"] is None
+    assert printers[mars.entry_id] == {
+        "name": "Mars",
+        "success": False,
+        "error": "Command STOP_PRINT was refused",
+        "duration_ms": printers[mars.entry_id]["duration_ms"],
+    }
+    assert printers[jupiter.entry_id]["error"].endswith("not acknowledged in time")
+    for entry in (saturn, mars, jupiter):
+        entry.runtime_data.commands.async_send.assert_awaited_once_with(
+            SDCPCommand.STOP_PRINT, None, timeout=5
+        )
+
+
+async def test_bulk_command_to_some_printers(
+    hass: HomeAssistant, add_printer: Callable
+) -> None:
+    """Only the printers asked for are sent the command."""
+    saturn = add_printer("Saturn")
+    mars = add_printer("Mars")
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_COMMAND,
+        {"command": "timelapse_on", ATTR_CONFIG_ENTRY_ID: [mars.entry_id]},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert list(response["printers"]) == [mars.entry_id]
+    saturn.runtime_data.commands.async_send.assert_not_awaited()
+    mars.runtime_data.commands.async_send.assert_awaited_once_with(
+        SDCPCommand.TIMELAPSE, {"Enable": 1}, timeout=COMMAND_TIMEOUT
+    )
+
+
+async def test_bulk_command_fails_without_response(
+    hass: HomeAssistant, add_printer: Callable
+) -> None:
+    """Without a response, failures are raised, naming the printers."""
+    add_printer("Saturn")
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_BULK_COMMAND, {"command": "pause"}, blocking=True
+    )
+
+    add_printer("Mars", SDCPCommandError("Printer disconnected"))
+    with pytest.raises(HomeAssistantError) as err:
+        await hass.services.async_call(
+            DOMAIN, SERVICE_BULK_COMMAND, {"command": "pause"}, blocking=True
+        )
+    assert err.value.translation_key == "bulk_command_failed"
+    assert err.value.translation_placeholders == {
+        "command": "pause",
+        "printers": "Mars",
+    }
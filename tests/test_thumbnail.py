@@ -0,0 +1,185 @@
+"""Tests for the thumbnail cache."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import threading
+from collections.abc import Callable
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from PIL import Image
+
+from custom_components.chitubox_printer import thumbnail
+from custom_components.chitubox_printer.thumbnail import SDCPThumbnailCache
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _bitmap(color: str = "red") -> bytes:
+    """Return a bitmap thumbnail, as sent by the printer."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, "BMP")
+    return buffer.getvalue()
+
+
+class Fetcher:
+    """Thumbnail fetch double, counting the fetches per url."""
+
+    def __init__(self, content: bytes | None = None) -> None:
+        """Initialize"""
+        self.content = _bitmap() if content is None else content
+        self.fetches: list[str] = []
+        self.release: asyncio.Event | None = None
+        self.error: Exception | None = None
+
+    async def __call__(self, url: str) -> bytes | None:
+        """Fetch a thumbnail."""
+        self.fetches.append(url)
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.content
+
+
+async def _async_wait_for(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds."""
+    async with asyncio.timeout(1):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def _png_files(path) -> list[str]:
+    """Return the thumbnails written to disk."""
+    return sorted(name for name in os.listdir(path) if name.endswith(".png"))
+
+
+async def test_thumbnail_is_converted_to_png(hass: HomeAssistant) -> None:
+    """Bitmaps are converted to png outside of the event loop."""
+    threads = []
+
+    def _convert(content: bytes) -> bytes:
+        threads.append(threading.current_thread())
+        return convert(content)
+
+    convert = thumbnail._convert_to_png
+    cache = SDCPThumbnailCache(hass, 2)
+    fetch = Fetcher()
+    with patch.object(thumbnail, "_convert_to_png", _convert):
+        content = await cache.async_get("T1", "/thumb.bmp", fetch)
+
+    assert content.startswith(PNG_SIGNATURE)
+    assert threads and threading.main_thread() not in threads
+
+
+async def test_load_time_is_measured(hass: HomeAssistant) -> None:
+    """The load time covers the fetch and the conversion of a thumbnail."""
+    durations = {}
+    metrics = SimpleNamespace(record=durations.__setitem__)
+    cache = SDCPThumbnailCache(hass, 2)
+
+    await cache.async_get("T1", "/thumb.bmp", Fetcher(), metrics)
+
+    assert set(durations) == {"thumbnail_fetch", "thumbnail_convert", "thumbnail_load"}
+    assert durations["thumbnail_load"] >= (
+        durations["thumbnail_fetch"] + durations["thumbnail_convert"]
+    )
+
+
+async def test_invalid_thumbnail(hass: HomeAssistant) -> None:
+    """A thumbnail which is not an image is not cached."""
+    cache = SDCPThumbnailCache(hass, 2)
+    fetch = Fetcher(b"not an image")
+
+    assert await cache.async_get("T1", "/thumb.bmp", fetch) is None
+    assert await cache.async_get("T1", "/thumb.bmp", fetch) is None
+    assert len(fetch.fetches) == 2
+
+
+async def test_least_recently_used_thumbnail_is_evicted(
+    hass: HomeAssistant,
+) -> None:
+    """The cache holds at most max_size thumbnails, the most recently used."""
+    cache = SDCPThumbnailCache(hass, 2)
+    fetch = Fetcher()
+
+    await cache.async_get("T1", "/a.bmp", fetch)
+    await cache.async_get("T1", "/b.bmp", fetch)
+    await cache.async_get("T1", "/a.bmp", fetch)
+    await cache.async_get("T1", "/c.bmp", fetch)
+    assert fetch.fetches == ["/a.bmp", "/b.bmp", "/c.bmp"]
+
+    await cache.async_get("T1", "/a.bmp", fetch)
+    await cache.async_get("T1", "/b.bmp", fetch)
+    assert fetch.fetches == ["/a.bmp", "/b.bmp", "/c.bmp", "/b.bmp"]
+
+
+async def test_thumbnails_are_keyed_by_task(hass: HomeAssistant) -> None:
+    """The same url of another print task is fetched again."""
+    cache = SDCPThumbnailCache(hass, 2)
+    fetch = Fetcher()
+
+    await cache.async_get("T1", "/thumb.bmp", fetch)
+    await cache.async_get("T2", "/thumb.bmp", fetch)
+
+    assert len(fetch.fetches) == 2
+
+
+@pytest.mark.parametrize("fail", [False, True])
+async def test_concurrent_requests_share_a_fetch(
+    hass: HomeAssistant, fail: bool
+) -> None:
+    """Concurrent requests for a thumbnail share its fetch, and its failure."""
+    cache = SDCPThumbnailCache(hass, 2)
+    fetch = Fetcher()
+    fetch.release = asyncio.Event()
+    if fail:
+        fetch.error = ConnectionError("printer went away")
+
+    results = asyncio.gather(
+        *(cache.async_get("T1", "/thumb.bmp", fetch) for _ in range(3)),
+        return_exceptions=True,
+    )
+    await _async_wait_for(lambda: fetch.fetches != [])
+    fetch.release.set()
+    results = await results
+
+    assert len(fetch.fetches) == 1
+    if fail:
+        assert all(isinstance(result, ConnectionError) for result in results)
+    else:
+        assert results[0].startswith(PNG_SIGNATURE)
+        assert results == [results[0]] * 3
+
+
+async def test_disk_cache_round_trip(hass: HomeAssistant, tmp_path) -> None:
+    """Thumbnails written to disk are read back, eg after a restart."""
+    fetch = Fetcher()
+    cache = SDCPThumbnailCache(hass, 2, str(tmp_path))
+    content = await cache.async_get("T1", "/thumb.bmp", fetch)
+    await _async_wait_for(lambda: _png_files(tmp_path) != [])
+
+    restarted = SDCPThumbnailCache(hass, 2, str(tmp_path))
+    assert await restarted.async_get("T1", "/thumb.bmp", fetch) == content
+    assert len(fetch.fetches) == 1
+    assert _png_files(tmp_path) == [f"{cache.key('T1', '/thumb.bmp')}.png"]
+
+
+async def test_disk_cache_is_bounded(hass: HomeAssistant, tmp_path) -> None:
+    """Only the max_size most recent thumbnails are kept on disk."""
+    cache = SDCPThumbnailCache(hass, 2, str(tmp_path))
+    fetch = Fetcher()
+    for url in ("/a.bmp", "/b.bmp", "/c.bmp"):
+        await cache.async_get("T1", url, fetch)
+        written = f"{cache.key('T1', url)}.png"
+        await _async_wait_for(lambda: written in _png_files(tmp_path))
+        # distinct modification times
+        await asyncio.sleep(0.02)
+
+    expected = sorted(f"{cache.key('T1', url)}.png" for url in ("/b.bmp", "/c.bmp"))
+    await _async_wait_for(lambda: _png_files(tmp_path) == expected)
@@ -0,0 +1,294 @@
+"""Tests for the archiving of timelapses."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.chitubox_printer.const import (
+    CONF_TIMELAPSE_DIRECTORY,
+    DOMAIN,
+    TIMELAPSE_CONCURRENCY,
+)
+from custom_components.chitubox_printer.timelapse import SDCPTimelapseArchiver
+
+# the archiver downloads from a local stand-in for the printer
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+TIMELAPSE = "custom_components.chitubox_printer.timelapse"
+RETRIES = 2
+CONTENT = bytes(range(256)) * 64
+
+Reply = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+class TimelapseServer:
+    """Local stand-in for the timelapse endpoint of a printer."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.requests: list[str | None] = []
+        # one-off replies, before the printer behaves
+        self.replies: list[Reply] = []
+        self.release: asyncio.Event | None = None
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """Serve the timelapse."""
+        self.requests.append(request.headers.get("Range"))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.release is not None:
+                await self.release.wait()
+            if self.replies:
+                return await self.replies.pop(0)(request)
+            return await self.reply(request)
+        finally:
+            self.active -= 1
+
+    @staticmethod
+    async def reply(request: web.Request) -> web.Response:
+        """Serve the timelapse, or the requested range of it."""
+        start = request.http_range.start or 0
+        if start >= len(CONTENT):
+            return web.Response(
+                status=416, headers={"Content-Range": f"bytes */{len(CONTENT)}"}
+            )
+        if not start:
+            return web.Response(body=CONTENT)
+
+        return web.Response(
+            status=206,
+            body=CONTENT[start:],
+            headers={
+                "Content-Range": f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"
+            },
+        )
+
+
+async def _drop_connection(request: web.Request) -> web.StreamResponse:
+    """Send half of the timelapse, then drop the connection."""
+    response = web.StreamResponse()
+    response.content_length = len(CONTENT)
+    await response.prepare(request)
+    await response.write(CONTENT[: len(CONTENT) // 2])
+    # let the archiver write what it received
+    await asyncio.sleep(0.1)
+    request.transport.close()
+    return response
+
+
+async def _ignore_range(request: web.Request) -> web.Response:
+    """Send the whole timelapse, whatever the range."""
+    return web.Response(body=CONTENT)
+
+
+async def _refuse_range(request: web.Request) -> web.Response:
+    """Refuse the range, without the size of the timelapse."""
+    return web.Response(status=416)
+
+
+async def _announce_more(request: web.Request) -> web.Response:
+    """Send the timelapse, announcing more than is sent."""
+    return web.Response(
+        body=CONTENT,
+        headers={"Content-Range": f"bytes 0-{len(CONTENT) - 1}/{len(CONTENT) * 2}"},
+    )
+
+
+async def _async_wait_for(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds."""
+    async with asyncio.timeout(2):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries() -> Iterator[None]:
+    """Download in small chunks, retry without delay."""
+    with (
+        patch(f"{TIMELAPSE}.TIMELAPSE_CHUNK_SIZE", 1024),
+        patch(f"{TIMELAPSE}.TIMELAPSE_RETRIES", RETRIES),
+        patch(f"{TIMELAPSE}.TIMELAPSE_RETRY_DELAY", 0),
+    ):
+        yield
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[TimelapseServer]:
+    """Run the timelapse endpoint on the loopback interface."""
+    timelapse_server = TimelapseServer()
+    app = web.Application()
+    app.router.add_get("/timelapse.mp4", timelapse_server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    timelapse_server.url = f"127.0.0.1:{runner.addresses[0][1]}/timelapse.mp4"
+    yield timelapse_server
+    await runner.cleanup()
+
+
+@pytest.fixture
+def archiver(hass: HomeAssistant) -> SDCPTimelapseArchiver:
+    """Return the timelapse archiver."""
+    return SDCPTimelapseArchiver(hass)
+
+
+@pytest.fixture
+def add_entry(hass: HomeAssistant, tmp_path) -> Callable[[str], MockConfigEntry]:
+    """Return a function adding a printer archiving its timelapses."""
+
+    def _add_entry(title: str = "Saturn") -> MockConfigEntry:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title=title,
+            options={CONF_TIMELAPSE_DIRECTORY: str(tmp_path)},
+        )
+        entry.add_to_hass(hass)
+        return entry
+
+    return _add_entry
+
+
+def _job(server: TimelapseServer, index: int = 1) -> dict:
+    """Return a finished print job."""
+    return {
+        "task_id": f"task{index}",
+        "filename": f"model{index}.ctb",
+        "begin": 1704067200 + index,
+        "timelapse_url": server.url,
+    }
+
+
+async def _async_archive(
+    archiver: SDCPTimelapseArchiver, entry: MockConfigEntry, *jobs: dict
+) -> list[str]:
+    """Archive the timelapses of jobs, return their paths."""
+    archiver.async_schedule(entry, jobs)
+    await _async_wait_for(lambda: not archiver._downloads)
+    return [archiver.path(entry, job) for job in jobs]
+
+
+def _read(path: str) -> bytes | None:
+    """Return the content of a file, if it exists."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _write(path: str, content: bytes) -> None:
+    """Write a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+
+
+async def test_download_resumes_after_a_dropped_connection(
+    archiver: SDCPTimelapseArchiver, server: TimelapseServer, add_entry: Callable
+) -> None:
+    """A download is resumed at the size received before the failure."""
+    server.replies.append(_drop_connection)
+
+    (path,) = await _async_archive(archiver, add_entry(), _job(server))
+
+    assert _read(path) == CONTENT
+    assert not os.path.exists(f"{path}.part")
+    assert server.requests[0] is None
+    assert len(server.requests) == 2
+    offset = int(server.requests[1].removeprefix("bytes=").removesuffix("-"))
+    assert 0 < offset <= len(CONTENT) // 2
+
+
+async def test_download_restarts_when_the_range_is_ignored(
+    archiver: SDCPTimelapseArchiver, server: TimelapseServer, add_entry: Callable
+) -> None:
+    """A printer sending the whole file again overwrites the partial download."""
+    entry = add_entry()
+    job = _job(server)
+    _write(f"{archiver.path(entry, job)}.part", b"x" * 100)
+    server.replies.append(_ignore_range)
+
+    (path,) = await _async_archive(archiver, entry, job)
+
+    assert _read(path) == CONTENT
+    assert server.requests == ["bytes=100-"]
+
+
+async def test_complete_download_is_not_downloaded_again(
+    archiver: SDCPTimelapseArchiver, server: TimelapseServer, add_entry: Callable
+) -> None:
+    """A download refused with the size of the file is verified and kept."""
+    entry = add_entry()
+    job = _job(server)
+    _write(f"{archiver.path(entry, job)}.part", CONTENT)
+
+    (path,) = await _async_archive(archiver, entry, job)
+
+    assert _read(path) == CONTENT
+    assert server.requests == [f"bytes={len(CONTENT)}-"]
+
+
+async def test_download_restarts_when_the_range_is_refused(
+    archiver: SDCPTimelapseArchiver, server: TimelapseServer, add_entry: Callable
+) -> None:
+    """A download refused without the size of the file starts over."""
+    entry = add_entry()
+    job = _job(server)
+    # a truncated download, which must not be archived
+    _write(f"{archiver.path(entry, job)}.part", CONTENT[:100])
+    server.replies.append(_refuse_range)
+
+    (path,) = await _async_archive(archiver, entry, job)
+
+    assert _read(path) == CONTENT
+    assert server.requests == ["bytes=100-", None]
+
+
+async def test_incomplete_download_is_not_archived(
+    archiver: SDCPTimelapseArchiver, server: TimelapseServer, add_entry: Callable
+) -> None:
+    """A download smaller than announced is retried, then given up."""
+    server.replies.extend([_announce_more] * (RETRIES + 1))
+
+    (path,) = await _async_archive(archiver, add_entry(), _job(server))
+
+    assert _read(path) is None
+    assert len(server.requests) == RETRIES + 1
+    # resumed, since the partial download may be right
+    assert server.requests[1] == f"bytes={len(CONTENT)}-"
+
+
+async def test_downloads_share_the_concurrency_of_all_printers(
+    archiver: SDCPTimelapseArchiver, server: TimelapseServer, add_entry: Callable
+) -> None:
+    """At most TIMELAPSE_CONCURRENCY timelapses are downloaded at once."""
+    server.release = asyncio.Event()
+    saturn, mars = add_entry("Saturn"), add_entry("Mars")
+    saturn_jobs = [_job(server, index) for index in (1, 2)]
+    mars_jobs = [_job(server, index) for index in (3, 4)]
+    archiver.async_schedule(saturn, saturn_jobs)
+    archiver.async_schedule(mars, mars_jobs)
+
+    await _async_wait_for(lambda: server.active == TIMELAPSE_CONCURRENCY)
+    await asyncio.sleep(0.05)
+    assert len(server.requests) == TIMELAPSE_CONCURRENCY
+
+    server.release.set()
+    await _async_wait_for(lambda: not archiver._downloads)
+
+    assert server.max_active == TIMELAPSE_CONCURRENCY
+    assert len(server.requests) == 4
+    for entry, jobs in ((saturn, saturn_jobs), (mars, mars_jobs)):
+        for job in jobs:
+            assert _read(archiver.path(entry, job)) == CONTENT
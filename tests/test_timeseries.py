@@ -0,0 +1,101 @@
+"""Tests for the time series of a printer's status frames."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from custom_components.chitubox_printer.timeseries import SDCPTimeSeries
+
+
+class FrameClient:
+    """Client double, passing frames to its listeners."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.listeners = []
+        self.status = SimpleNamespace(
+            print_current_layer=None,
+            uvled_temperature=31.5,
+            enclosure_temperature=None,
+        )
+
+    def add_frame_listener(self, listener):
+        """Register a frame listener."""
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener)
+
+    def receive(self, topic: str) -> None:
+        """Pass a frame to the listeners."""
+        for listener in self.listeners:
+            listener(topic, "{}")
+
+
+def _fill(timeseries: SDCPTimeSeries, count: int) -> None:
+    """Append count samples, one per second."""
+    for index in range(count):
+        timeseries.append(float(index), index, 30.0 + index, 20.0 + index)
+
+
+def test_samples_before_the_buffer_is_full() -> None:
+    """Samples are returned oldest first."""
+    timeseries = SDCPTimeSeries(4)
+    _fill(timeseries, 3)
+
+    assert len(timeseries) == 3
+    assert timeseries.samples() == {
+        "size": 4,
+        "timestamp": [0.0, 1.0, 2.0],
+        "layer": [0, 1, 2],
+        "uvled_temperature": [30.0, 31.0, 32.0],
+        "enclosure_temperature": [20.0, 21.0, 22.0],
+    }
+
+
+def test_oldest_samples_are_overwritten() -> None:
+    """A full buffer wraps around, and stays ordered."""
+    timeseries = SDCPTimeSeries(4)
+    _fill(timeseries, 6)
+
+    samples = timeseries.samples()
+    assert len(timeseries) == 4
+    assert samples["timestamp"] == [2.0, 3.0, 4.0, 5.0]
+    assert samples["layer"] == [2, 3, 4, 5]
+    assert samples["uvled_temperature"] == [32.0, 33.0, 34.0, 35.0]
+
+
+def test_samples_since() -> None:
+    """Only the samples recorded at or after since are returned."""
+    timeseries = SDCPTimeSeries(4)
+    _fill(timeseries, 6)
+
+    assert timeseries.samples(since=3.5)["timestamp"] == [4.0, 5.0]
+    assert timeseries.samples(since=4.0)["layer"] == [4, 5]
+    assert timeseries.samples(since=10.0)["timestamp"] == []
+
+
+def test_missing_values() -> None:
+    """Missing layers and temperatures are returned as None."""
+    timeseries = SDCPTimeSeries(4)
+    timeseries.append(1.0, -1, None, 25.123)
+
+    samples = timeseries.samples()
+    assert samples["layer"] == [None]
+    assert samples["uvled_temperature"] == [None]
+    assert samples["enclosure_temperature"] == [25.12]
+
+
+def test_status_frames_are_recorded() -> None:
+    """Status frames of the attached client are recorded, other frames not."""
+    client = FrameClient()
+    timeseries = SDCPTimeSeries(4)
+    timeseries.async_attach(client)
+
+    client.receive("status")
+    client.receive("attributes")
+
+    samples = timeseries.samples()
+    assert samples["layer"] == [None]
+    assert samples["uvled_temperature"] == [31.5]
+
+    timeseries.async_attach(None)
+    assert client.listeners == []
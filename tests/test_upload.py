@@ -0,0 +1,199 @@
+"""Tests for the chunked file upload to a printer."""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import AsyncIterator, Callable
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+
+from custom_components.chitubox_printer.const import UPLOAD_RETRIES, SDCPCommand
+from custom_components.chitubox_printer.upload import (
+    SDCPFileUploader,
+    SDCPUploadStatus,
+)
+
+# the uploader talks to a local stand-in for the printer
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+UPLOAD = "custom_components.chitubox_printer.upload"
+CHUNK_SIZE = 1024
+
+
+class UploadServer:
+    """Local stand-in for the upload endpoint of a printer."""
+
+    def __init__(self) -> None:
+        """Initialize"""
+        self.requests: list[dict[str, str]] = []
+        self.content = bytearray()
+        self.reply: Callable[[int], web.Response] = lambda offset: web.json_response(
+            {"success": True}
+        )
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Store a chunk, at its offset."""
+        form = await request.post()
+        chunk = form["File"].file.read()
+        offset = int(form["Offset"])
+        self.requests.append(
+            {
+                "offset": offset,
+                "size": len(chunk),
+                "md5": form["S-File-MD5"],
+                "uuid": form["Uuid"],
+                "total_size": int(form["TotalSize"]),
+            }
+        )
+        response = self.reply(offset)
+        if response.status == 200:
+            self.content[offset : offset + len(chunk)] = chunk
+
+        return response
+
+
+@pytest.fixture(autouse=True)
+def small_chunks() -> None:
+    """Upload in small chunks, retry without delay."""
+    with (
+        patch(f"{UPLOAD}.UPLOAD_CHUNK_SIZE", CHUNK_SIZE),
+        patch(f"{UPLOAD}.UPLOAD_RETRY_DELAY", 0),
+    ):
+        yield
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[UploadServer]:
+    """Run the upload endpoint on the loopback interface."""
+    upload_server = UploadServer()
+    app = web.Application()
+    app.router.add_post("/uploadFile/upload", upload_server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    upload_server.url = f"http://127.0.0.1:{runner.addresses[0][1]}/uploadFile/upload"
+    yield upload_server
+    await runner.cleanup()
+
+
+@pytest.fixture
+def uploader(hass: HomeAssistant, server: UploadServer) -> SDCPFileUploader:
+    """Return an uploader sending to the local endpoint."""
+    config_entry = SimpleNamespace(
+        data={},
+        runtime_data=SimpleNamespace(
+            coordinator=MagicMock(),
+            files=MagicMock(),
+            commands=SimpleNamespace(async_send=AsyncMock()),
+        ),
+    )
+    return SDCPFileUploader(hass, config_entry, url=server.url)
+
+
+@pytest.fixture
+def content() -> bytes:
+    """Return the content of the file to upload."""
+    return bytes(range(256)) * 10
+
+
+@pytest.fixture
+def path(tmp_path, content: bytes) -> str:
+    """Return the path of the file to upload."""
+    file = tmp_path / "printme.ctb"
+    file.write_bytes(content)
+    return str(file)
+
+
+async def test_upload_in_chunks(
+    uploader: SDCPFileUploader, server: UploadServer, path: str, content: bytes
+) -> None:
+    """A file is sent in chunks, each carrying the digest of the file."""
+    await uploader.async_upload(path)
+
+    assert uploader.status == SDCPUploadStatus.COMPLETED
+    assert uploader.progress == 100
+    assert [(request["offset"], request["size"]) for request in server.requests] == [
+        (0, 1024),
+        (1024, 1024),
+        (2048, 512),
+    ]
+    assert {request["md5"] for request in server.requests} == {
+        hashlib.md5(content).hexdigest()
+    }
+    assert len({request["uuid"] for request in server.requests}) == 1
+    assert {request["total_size"] for request in server.requests} == {len(content)}
+    assert bytes(server.content) == content
+    uploader.config_entry.runtime_data.files.async_invalidate.assert_called_with(
+        "local"
+    )
+
+
+async def test_upload_resumes_after_a_failure(
+    uploader: SDCPFileUploader, server: UploadServer, path: str, content: bytes
+) -> None:
+    """A chunk which could not be sent is sent again, from the same offset."""
+    failures = [1024]
+
+    def reply(offset: int) -> web.Response:
+        if offset in failures:
+            failures.remove(offset)
+            return web.Response(status=500)
+        return web.json_response({"success": True})
+
+    server.reply = reply
+
+    await uploader.async_upload(path)
+
+    assert uploader.status == SDCPUploadStatus.COMPLETED
+    assert [request["offset"] for request in server.requests] == [0, 1024, 1024, 2048]
+    assert bytes(server.content) == content
+
+
+async def test_upload_gives_up_after_retries(
+    uploader: SDCPFileUploader, server: UploadServer, path: str
+) -> None:
+    """An upload fails once a chunk failed too often."""
+    server.reply = lambda offset: web.Response(status=500)
+
+    await uploader.async_upload(path)
+
+    assert uploader.status == SDCPUploadStatus.FAILED
+    assert len(server.requests) == UPLOAD_RETRIES + 1
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        web.Response(text="<html>busy</html>"),
+        web.json_response(["success"]),
+        web.json_response({"success": False, "messages": ["md5 mismatch"]}),
+    ],
+)
+async def test_upload_fails_on_an_unexpected_reply(
+    uploader: SDCPFileUploader,
+    server: UploadServer,
+    path: str,
+    response: web.Response,
+) -> None:
+    """A chunk the printer did not acknowledge fails the upload."""
+    server.reply = lambda offset: response
+
+    await uploader.async_upload(path)
+
+    assert uploader.status == SDCPUploadStatus.FAILED
+    assert uploader.error.startswith("Chunk at 0")
+    assert len(server.requests) == 1
+
+
+async def test_upload_and_print(uploader: SDCPFileUploader, path: str) -> None:
+    """An uploaded file is printed from the local storage."""
+    await uploader.async_upload(path, filename="renamed.ctb", start_print=True)
+
+    uploader.config_entry.runtime_data.commands.async_send.assert_awaited_once_with(
+        SDCPCommand.START_PRINT, {"Filename": "/local/renamed.ctb", "StartLayer": 0}
+    )
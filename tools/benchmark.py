@@ -0,0 +1,210 @@
+"""Load the integration against the SDCP simulator and report its cost.
+
+For every fleet size, a Home Assistant instance is booted from a temporary
+configuration directory holding one config entry per simulated printer.
+The simulator runs in a separate process, so its CPU time is not counted.
+
+Reported per fleet size:
+
+- setup time, until all config entries are loaded
+- event loop lag, sampled every 50 ms
+- CPU time of the Home Assistant process
+- state writes per second by the integration's entities
+- memory per printer (resident set size growth after setup)
+
+usage: python tools/benchmark.py --printers 1 10 50 --duration 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+from homeassistant import bootstrap
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.runner import RuntimeConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOMAIN = "chitubox_printer"
+SIMULATOR = os.path.join(ROOT, "tools", "sdcp_simulator.py")
+BASE_ADDRESS = "127.0.1."
+# the simulator derives the mainboard ids from it, like the config entries
+ID_PREFIX = "simulated"
+
+# EVENT_STATE_REPORTED is fired when a state is written without changes
+EVENT_STATE_REPORTED = "state_reported"
+
+
+def _rss() -> int:
+    """Return the resident set size of this process, in bytes."""
+    with open("/proc/self/statm", encoding="utf-8") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _prepare_config_dir(config_dir: str, printers: int) -> None:
+    """Write a configuration holding one config entry per printer."""
+    os.makedirs(os.path.join(config_dir, ".storage"))
+    os.makedirs(os.path.join(config_dir, "custom_components"))
+    os.symlink(
+        os.path.join(ROOT, "custom_components", DOMAIN),
+        os.path.join(config_dir, "custom_components", DOMAIN),
+    )
+    with open(os.path.join(config_dir, "configuration.yaml"), "w") as file:
+        file.write("logger:\n  default: warning\n")
+
+    entries = []
+    for index in range(printers):
+        host = f"{BASE_ADDRESS}{index + 1}"
+        unique_id = f"{ID_PREFIX}{index:07d}"
+        entries.append(
+            {
+                "entry_id": uuid.uuid4().hex,
+                "version": 2,
+                "minor_version": 1,
+                "domain": DOMAIN,
+                "title": f"Simulated Saturn {index}",
+                "data": {
+                    "name": f"Simulated Saturn {index}",
+                    "host": host,
+                    "id": host.replace(".", "_"),
+                    "device_machine_brand_id": 0,
+                    "device_mainboard_id": unique_id,
+                    "device_model": "Saturn 4 Ultra",
+                    "device_brand": "ELEGOO",
+                },
+                "options": {},
+                "pref_disable_new_entities": False,
+                "pref_disable_polling": False,
+                "source": "user",
+                "unique_id": unique_id,
+                "disabled_by": None,
+            }
+        )
+
+    with open(
+        os.path.join(config_dir, ".storage", "core.config_entries"), "w"
+    ) as file:
+        json.dump(
+            {
+                "version": 1,
+                "minor_version": 1,
+                "key": "core.config_entries",
+                "data": {"entries": entries},
+            },
+            file,
+        )
+
+
+async def _async_wait_loaded(hass: HomeAssistant) -> None:
+    """Wait until all config entries of the integration are loaded."""
+    while any(
+        entry.state != ConfigEntryState.LOADED
+        for entry in hass.config_entries.async_entries(DOMAIN)
+    ):
+        await asyncio.sleep(0.01)
+
+
+async def _async_measure_lag(samples: list[float], interval: float = 0.05) -> None:
+    """Sample the event loop lag."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+
+async def _async_benchmark(printers: int, duration: float) -> dict[str, float]:
+    """Benchmark a single fleet size."""
+    simulator = await asyncio.create_subprocess_exec(
+        sys.executable,
+        SIMULATOR,
+        "--printers",
+        str(printers),
+        "--id-prefix",
+        ID_PREFIX,
+    )
+    await asyncio.sleep(1 + printers / 100)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        _prepare_config_dir(config_dir, printers)
+        rss_before = _rss()
+
+        setup_start = time.perf_counter()
+        hass = await bootstrap.async_setup_hass(
+            RuntimeConfig(config_dir=config_dir, skip_pip=True)
+        )
+        await hass.async_start()
+        await _async_wait_loaded(hass)
+        setup_time = time.perf_counter() - setup_start
+        memory = (_rss() - rss_before) / printers
+
+        entity_ids = {
+            entity.entity_id
+            for entity in er.async_get(hass).entities.values()
+            if entity.platform == DOMAIN
+        }
+        writes = 0
+
+        @callback
+        def _count_write(event: Event) -> None:
+            nonlocal writes
+            if event.data["entity_id"] in entity_ids:
+                writes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _count_write)
+        hass.bus.async_listen(EVENT_STATE_REPORTED, _count_write)
+
+        lag: list[float] = []
+        lag_task = hass.async_create_background_task(
+            _async_measure_lag(lag), "benchmark lag"
+        )
+        cpu_start = time.process_time()
+        await asyncio.sleep(duration)
+        cpu_time = time.process_time() - cpu_start
+        lag_task.cancel()
+
+        await hass.async_stop()
+
+    simulator.terminate()
+    await simulator.wait()
+
+    lag.sort()
+    return {
+        "printers": printers,
+        "setup_s": setup_time,
+        "lag_mean_ms": statistics.fmean(lag) * 1000 if lag else 0.0,
+        "lag_p99_ms": lag[int(len(lag) * 0.99)] * 1000 if lag else 0.0,
+        "lag_max_ms": lag[-1] * 1000 if lag else 0.0,
+        "cpu_s_per_min": cpu_time / duration * 60,
+        "writes_per_s": writes / duration,
+        "memory_kib_per_printer": memory / 1024,
+    }
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Run the benchmark for every fleet size."""
+    results = [
+        await _async_benchmark(printers, args.duration) for printers in args.printers
+    ]
+    columns = list(results[0])
+    print(" | ".join(columns))
+    print(" | ".join("---" for _ in columns))
+    for result in results:
+        print(" | ".join(f"{result[column]:.2f}" for column in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--printers", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=60)
+    asyncio.run(_async_main(parser.parse_args()))
@@ -0,0 +1,522 @@
+"""Simulated fleet of SDCP v3 printers.
+
+Every virtual printer listens on its own loopback address (127.0.1.1,
+127.0.1.2, ...) and serves:
+
+- the SDCP websocket on `ws://<host>:3030/websocket`, pushing status frames
+  with layer progress, temperatures and status transitions, and answering
+  requests
+- the thumbnail of the current print job on `http://<host>:3030/thumbnail.bmp`
+- the timelapse of every print job on `http://<host>:3030/timelapse.mp4`,
+  honouring range requests
+- a stand-in for the camera on `http://<host>:3031/video`: an mjpeg stream of
+  a plain frame, instead of the printer's rtsp stream, refusing viewers beyond
+  the allowed number of video streams
+
+A single UDP responder, bound to all interfaces, answers the `M99999`
+discovery broadcast for all printers. The addresses it reports are loopback
+addresses, so only a client on the same machine can connect to the printers.
+
+Mainboard ids are random, unless `--id-prefix` is given: the printers are then
+`<prefix>0000000`, `<prefix>0000001`, ... as expected by tools/benchmark.py.
+
+usage: python tools/sdcp_simulator.py --printers 100 [--id-prefix simulated]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import random
+import struct
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from aiohttp import WSMsgType, web
+
+_LOGGER = logging.getLogger("sdcp_simulator")
+
+SDCP_PORT = 3030
+VIDEO_PORT = 3031
+VIDEO_STREAMS_ALLOWED = 2
+VIDEO_FRAME_RATE = 5
+DISCOVERY_PORT = 3000
+
+MACHINE_STATUS_IDLE = 0
+MACHINE_STATUS_PRINTING = 1
+
+PRINT_STATUS_IDLE = 0
+PRINT_STATUS_EXPOSURING = 3
+PRINT_STATUS_LIFTING = 4
+PRINT_STATUS_PAUSED = 6
+PRINT_STATUS_STOPPED = 8
+PRINT_STATUS_COMPLETE = 9
+
+
+def _bitmap(width: int = 64, height: int = 48) -> bytes:
+    """Return a 24 bit bitmap, like the printers serve as thumbnail."""
+    row = b"".join(bytes((x * 4 % 256, 96, 160)) for x in range(width))
+    row += b"\x00" * (-len(row) % 4)
+    pixels = row * height
+    header = struct.pack(
+        "<2sIHHIIiiHHIIiiII",
+        b"BM",
+        54 + len(pixels),
+        0,
+        0,
+        54,
+        40,
+        width,
+        height,
+        1,
+        24,
+        0,
+        len(pixels),
+        2835,
+        2835,
+        0,
+        0,
+    )
+    return header + pixels
+
+
+THUMBNAIL = _bitmap()
+
+# stands in for a timelapse video
+TIMELAPSE = bytes(range(256)) * 4096
+
+# a plain 64x48 jpeg frame
+VIDEO_FRAME = base64.b64decode(
+    """
+/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABALDA4MChAODQ4SERATGCgaGBYWGDEjJR0oOjM9PDkz
+ODdASFxOQERXRTc4UG1RV19iZ2hnPk1xeXBkeFxlZ2P/2wBDARESEhgVGC8aGi9jQjhCY2NjY2Nj
+Y2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2NjY2P/wAARCAAwAEADASIA
+AhEBAxEB/8QAHwAAAQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUFBAQA
+AAF9AQIDAAQRBRIhMUEGE1FhByJxFDKBkaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3
+ODk6Q0RFRkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWm
+p6ipqrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi4+Tl5ufo6erx8vP09fb3+Pn6/8QAHwEA
+AwEBAQEBAQEBAQAAAAAAAAECAwQFBgcICQoL/8QAtREAAgECBAQDBAcFBAQAAQJ3AAECAxEEBSEx
+BhJBUQdhcRMiMoEIFEKRobHBCSMzUvAVYnLRChYkNOEl8RcYGRomJygpKjU2Nzg5OkNERUZHSElK
+U1RVVldYWVpjZGVmZ2hpanN0dXZ3eHl6goOEhYaHiImKkpOUlZaXmJmaoqOkpaanqKmqsrO0tba3
+uLm6wsPExcbHyMnK0tPU1dbX2Nna4uPk5ebn6Onq8vP09fb3+Pn6/9oADAMBAAIRAxEAPwClRRRX
+eSFFFFABRRRQAUUUUAFFFFABRRRQAUUUUAFFFFABRRRQAUUUUAFFFFABRRRQB//Z
+"""
+)
+
+
+@dataclass
+class VirtualPrinter:
+    """A virtual SDCP printer."""
+
+    index: int
+    host: str
+    mainboard_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    layer_time: float = 4.0
+    machine_status: int = MACHINE_STATUS_IDLE
+    previous_status: int = MACHINE_STATUS_IDLE
+    print_status: int = PRINT_STATUS_IDLE
+    current_layer: int = 0
+    total_layers: int = 0
+    started_at: float = 0.0
+    filename: str = ""
+    task_id: str = ""
+    timelapse: int = 0
+    uvled_temperature: float = 25.0
+    enclosure_temperature: float = 22.0
+    history: list[str] = field(default_factory=list)
+    websockets: set[web.WebSocketResponse] = field(default_factory=set)
+    video_streams: int = 0
+
+    @property
+    def name(self) -> str:
+        """Return the name of the printer."""
+        return f"Simulated Saturn {self.index}"
+
+    def discovery_reply(self) -> bytes:
+        """Return the reply to the discovery broadcast."""
+        return json.dumps(
+            {
+                "Id": uuid.uuid4().hex,
+                "Data": {
+                    "Name": self.name,
+                    "MachineName": "Saturn 4 Ultra",
+                    "BrandName": "ELEGOO",
+                    "MainboardIP": self.host,
+                    "MainboardID": self.mainboard_id,
+                    "ProtocolVersion": "V3.0.0",
+                    "FirmwareVersion": "V1.0.0",
+                },
+            }
+        ).encode()
+
+    def _frame(self, topic: str, key: str, payload: dict) -> str:
+        """Return a frame as sent by the printer."""
+        return json.dumps(
+            {
+                key: payload,
+                "MainboardID": self.mainboard_id,
+                "TimeStamp": int(time.time()),
+                "Topic": f"sdcp/{topic}/{self.mainboard_id}",
+            }
+        )
+
+    def attributes_frame(self) -> str:
+        """Return an attributes frame."""
+        return self._frame(
+            "attributes",
+            "Attributes",
+            {
+                "Name": self.name,
+                "MachineName": "Saturn 4 Ultra",
+                "BrandName": "ELEGOO",
+                "ProtocolVersion": "V3.0.0",
+                "FirmwareVersion": "V1.0.0",
+                "Resolution": "7680x4320",
+                "MainboardIP": self.host,
+                "MainboardID": self.mainboard_id,
+                "NumberOfVideoStreamConnected": self.video_streams,
+                "MaximumVideoStreamAllowed": VIDEO_STREAMS_ALLOWED,
+                "NetworkStatus": "wlan",
+                "UsbDiskStatus": 1,
+                "Capabilities": ["FILE_TRANSFER", "PRINT_CONTROL", "VIDEO_STREAM"],
+                "SupportFileType": ["CTB", "GOO"],
+                "DevicesStatus": {
+                    "TempSensorStatusOfUVLED": 1,
+                    "LCDStatus": 1,
+                    "SgStatus": 1,
+                    "ZMotorStatus": 1,
+                    "RotateMotorStatus": 1,
+                    "RelaseFilmState": 1,
+                },
+                "ReleaseFilmMax": 60000,
+                "TempOfUVLEDMax": 70,
+                "CameraStatus": 1,
+            },
+        )
+
+    def status_frame(self) -> str:
+        """Return a status frame."""
+        elapsed = int((time.time() - self.started_at) * 1000) if self.task_id else 0
+        return self._frame(
+            "status",
+            "Status",
+            {
+                "CurrentStatus": [self.machine_status],
+                "PreviousStatus": self.previous_status,
+                "TempOfUVLED": round(self.uvled_temperature, 2),
+                "TempOfBox": round(self.enclosure_temperature, 2),
+                "TempTargetBox": 30,
+                "TimeLapseStatus": self.timelapse,
+                "PrintInfo": {
+                    "Status": self.print_status,
+                    "CurrentLayer": self.current_layer,
+                    "TotalLayer": self.total_layers,
+                    "CurrentTicks": elapsed,
+                    "TotalTicks": int(self.total_layers * self.layer_time * 1000),
+                    "Filename": self.filename,
+                    "ErrorNumber": 0,
+                    "TaskId": self.task_id,
+                },
+            },
+        )
+
+    def response_frame(self, request: dict, data: dict | None = None) -> str:
+        """Return the response to a request."""
+        return self._frame(
+            "response",
+            "Data",
+            {
+                "Cmd": request["Cmd"],
+                "Data": {"Ack": 0, **(data or {})},
+                "RequestID": request["RequestID"],
+                "MainboardID": self.mainboard_id,
+                "TimeStamp": int(time.time()),
+            },
+        )
+
+    def start(self, filename: str, start_layer: int = 0) -> None:
+        """Start a print job."""
+        self.previous_status = self.machine_status
+        self.machine_status = MACHINE_STATUS_PRINTING
+        self.print_status = PRINT_STATUS_EXPOSURING
+        self.filename = filename
+        self.task_id = uuid.uuid4().hex
+        self.total_layers = random.randint(200, 2000)
+        self.current_layer = start_layer
+        self.started_at = time.time()
+
+    def finish(self, print_status: int) -> None:
+        """End the current print job."""
+        self.previous_status = self.machine_status
+        self.machine_status = MACHINE_STATUS_IDLE
+        self.print_status = print_status
+        if self.task_id:
+            self.history.append(self.task_id)
+
+    def tick(self) -> None:
+        """Advance the printer by one step, alternating exposure and lift."""
+        printing = self.machine_status == MACHINE_STATUS_PRINTING
+        target = 45.0 if printing else 25.0
+        self.uvled_temperature += (target - self.uvled_temperature) * 0.05
+        self.enclosure_temperature += random.uniform(-0.05, 0.05)
+
+        if not printing or self.print_status == PRINT_STATUS_PAUSED:
+            return
+
+        if self.print_status == PRINT_STATUS_EXPOSURING:
+            self.print_status = PRINT_STATUS_LIFTING
+            return
+
+        self.print_status = PRINT_STATUS_EXPOSURING
+        self.current_layer += 1
+        if self.current_layer >= self.total_layers:
+            self.finish(PRINT_STATUS_COMPLETE)
+
+    def handle_request(self, request: dict) -> dict | None:
+        """Execute a request, return the data of the response."""
+        command = request["Cmd"]
+        data = request.get("Data") or {}
+        if command == 128:
+            self.start(data.get("Filename", "simulated.ctb"), data.get("StartLayer", 0))
+        elif command == 129:
+            self.print_status = PRINT_STATUS_PAUSED
+        elif command == 130:
+            self.finish(PRINT_STATUS_STOPPED)
+        elif command == 131:
+            self.print_status = PRINT_STATUS_EXPOSURING
+        elif command == 258:
+            return {
+                "FileList": [
+                    {"name": f"{data.get('Url', '/local')}/model{i}.ctb", "type": 1}
+                    for i in range(20)
+                ]
+            }
+        elif command == 320:
+            return {"HistoryData": self.history}
+        elif command == 321:
+            return {
+                "HisTaskDetailInfo": [
+                    {
+                        "TaskId": task_id,
+                        "TaskName": "simulated.ctb",
+                        "Thumbnail": f"http://{self.host}:{SDCP_PORT}/thumbnail.bmp",
+                        "TimeLapseVideoUrl": (
+                            f"http://{self.host}:{SDCP_PORT}/timelapse.mp4"
+                        ),
+                        "TaskStatus": 1,
+                        "BeginTime": int(self.started_at),
+                        "EndTime": int(time.time()),
+                    }
+                    for task_id in data.get("Id", [])
+                ]
+            }
+        elif command == 386:
+            return {"VideoUrl": f"http://{self.host}:{VIDEO_PORT}/video"}
+        elif command == 387:
+            self.timelapse = data.get("Enable", 0)
+        return None
+
+
+class SDCPSimulator:
+    """Run a fleet of virtual printers."""
+
+    def __init__(
+        self,
+        printers: int,
+        interval: float = 1.0,
+        printing_ratio: float = 0.5,
+        base_address: str = "127.0.1.",
+        id_prefix: str | None = None,
+    ) -> None:
+        """Initialize"""
+        self.interval = interval
+        self.printers = [
+            VirtualPrinter(index=index, host=f"{base_address}{index + 1}")
+            if id_prefix is None
+            else VirtualPrinter(
+                index=index,
+                host=f"{base_address}{index + 1}",
+                mainboard_id=f"{id_prefix}{index:07d}",
+            )
+            for index in range(printers)
+        ]
+        for printer in self.printers[: int(printers * printing_ratio)]:
+            printer.start("simulated.ctb")
+        self.frames_sent = 0
+        self._runners: list[web.AppRunner] = []
+        self._transport: asyncio.DatagramTransport | None = None
+        self._task: asyncio.Task | None = None
+
+    async def async_start(self, discovery_address: str = "0.0.0.0") -> None:
+        """Start serving all printers."""
+        for printer in self.printers:
+            app = web.Application()
+            app["printer"] = printer
+            app.router.add_get("/websocket", self._handle_websocket)
+            app.router.add_get("/thumbnail.bmp", self._handle_thumbnail)
+            app.router.add_get("/timelapse.mp4", self._handle_timelapse)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, printer.host, SDCP_PORT).start()
+            self._runners.append(runner)
+
+            app = web.Application()
+            app["printer"] = printer
+            app.router.add_get("/video", self._handle_video)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, printer.host, VIDEO_PORT).start()
+            self._runners.append(runner)
+
+        simulator = self
+
+        class DiscoveryResponder(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                if data.strip() != b"M99999":
+                    return
+                for printer in simulator.printers:
+                    self.transport.sendto(printer.discovery_reply(), addr)
+
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            DiscoveryResponder, local_addr=(discovery_address, DISCOVERY_PORT)
+        )
+        self._task = asyncio.create_task(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop serving all printers."""
+        if self._task is not None:
+            self._task.cancel()
+        if self._transport is not None:
+            self._transport.close()
+        for runner in self._runners:
+            await runner.cleanup()
+
+    async def _async_run(self) -> None:
+        """Push status frames, spread over the interval."""
+        while True:
+            delay = self.interval / max(1, len(self.printers))
+            for printer in self.printers:
+                printer.tick()
+                frame = printer.status_frame()
+                for websocket in tuple(printer.websockets):
+                    await websocket.send_str(frame)
+                    self.frames_sent += 1
+                await asyncio.sleep(delay)
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        """Serve the SDCP websocket of a printer."""
+        printer: VirtualPrinter = request.app["printer"]
+        websocket = web.WebSocketResponse(heartbeat=30)
+        await websocket.prepare(request)
+        printer.websockets.add(websocket)
+        try:
+            await websocket.send_str(printer.attributes_frame())
+            await websocket.send_str(printer.status_frame())
+            async for message in websocket:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                if message.data == "ping":
+                    await websocket.send_str("pong")
+                    continue
+                try:
+                    payload = json.loads(message.data)["Data"]
+                except (ValueError, KeyError):
+                    continue
+                data = printer.handle_request(payload)
+                await websocket.send_str(printer.response_frame(payload, data))
+                if payload["Cmd"] in (0, 128, 129, 130, 131, 387):
+                    await websocket.send_str(printer.status_frame())
+                elif payload["Cmd"] == 1:
+                    await websocket.send_str(printer.attributes_frame())
+        finally:
+            printer.websockets.discard(websocket)
+
+        return websocket
+
+    async def _handle_thumbnail(self, request: web.Request) -> web.Response:
+        """Serve the thumbnail of the current print job."""
+        return web.Response(body=THUMBNAIL, content_type="text/plain")
+
+    async def _handle_timelapse(self, request: web.Request) -> web.Response:
+        """Serve the timelapse of a print job, or the requested range of it."""
+        start = request.http_range.start or 0
+        if start >= len(TIMELAPSE):
+            return web.Response(
+                status=416, headers={"Content-Range": f"bytes */{len(TIMELAPSE)}"}
+            )
+        if not start:
+            return web.Response(body=TIMELAPSE, content_type="video/mp4")
+
+        return web.Response(
+            status=206,
+            body=TIMELAPSE[start:],
+            content_type="video/mp4",
+            headers={
+                "Content-Range": f"bytes {start}-{len(TIMELAPSE) - 1}/{len(TIMELAPSE)}"
+            },
+        )
+
+    async def _handle_video(self, request: web.Request) -> web.StreamResponse:
+        """Serve the camera of a printer as mjpeg, to a limited number of viewers."""
+        printer: VirtualPrinter = request.app["printer"]
+        if printer.video_streams >= VIDEO_STREAMS_ALLOWED:
+            return web.Response(status=503, text="Too many video streams")
+
+        printer.video_streams += 1
+        try:
+            response = web.StreamResponse()
+            response.content_type = "multipart/x-mixed-replace;boundary=frame"
+            await response.prepare(request)
+            while True:
+                await response.write(
+                    b"--frame\r\nContent-Type: image/jpeg\r\n"
+                    b"Content-Length: %d\r\n\r\n%s\r\n"
+                    % (len(VIDEO_FRAME), VIDEO_FRAME)
+                )
+                await asyncio.sleep(1 / VIDEO_FRAME_RATE)
+        except ConnectionResetError:
+            return response
+        finally:
+            printer.video_streams -= 1
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Run the simulator until interrupted."""
+    simulator = SDCPSimulator(
+        args.printers,
+        interval=args.interval,
+        printing_ratio=args.printing,
+        id_prefix=args.id_prefix,
+    )
+    await simulator.async_start(args.discovery_address)
+    _LOGGER.info(
+        "Serving %s printers on %s - %s",
+        len(simulator.printers),
+        simulator.printers[0].host,
+        simulator.printers[-1].host,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--printers", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--printing", type=float, default=0.5)
+    parser.add_argument("--id-prefix", default=None)
+    parser.add_argument("--discovery-address", default="0.0.0.0")
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_async_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass